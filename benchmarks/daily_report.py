@@ -0,0 +1,54 @@
+"""Tempo total do job das 7h contra Telegram e PostgREST falsos.
+
+    python -m benchmarks.daily_report --companies 10000 --concurrency 20
+
+Com o limite padrão de 30 msg/s, 10k empresas devem terminar em ~6 minutos,
+dentro da janela de 15 minutos.
+"""
+import argparse
+import asyncio
+import logging
+
+from benchmarks import harness
+from src.config import settings
+
+WINDOW_SECONDS = 15 * 60
+
+
+async def run(companies: int, entries: int, db_latency: float, telegram_latency: float, flood_every: int) -> dict:
+    fake_db, fake_tg = harness.install_fakes(db_latency, telegram_latency)
+    fake_tg.flood_every = flood_every
+    harness.seed_portfolio(fake_db, companies, entries)
+    summary = await harness.run_daily_report(fake_db, fake_tg)
+    await harness.close()
+    return summary
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--entries-per-company", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=settings.telegram_send_concurrency)
+    parser.add_argument("--rate", type=float, default=settings.telegram_rate_per_second)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--telegram-latency", type=float, default=0.05)
+    parser.add_argument("--flood-every", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    settings.telegram_rate_per_second = args.rate
+    settings.telegram_send_concurrency = args.concurrency
+
+    summary = asyncio.run(run(
+        args.companies, args.entries_per_company,
+        args.db_latency, args.telegram_latency, args.flood_every,
+    ))
+    verdict = "OK" if summary["wall_time_s"] < WINDOW_SECONDS else "FORA DA JANELA"
+    print(
+        f"{args.companies} empresas: {summary['sent']} enviados, {summary['failed']} falhas, "
+        f"{summary['skipped']} ignorados, {summary['flood_waits']} flood waits, "
+        f"{summary['db_calls']} chamadas ao banco em {summary['wall_time_s']:.1f}s [{verdict}]"
+    )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,74 @@
+"""Previsão de caixa do portfólio inteiro em um lote NumPy.
+
+    python -m benchmarks.forecast --companies 100000
+
+Mede a montagem do EntriesStore a partir dos rollups diários e a projeção de
+90 dias de forecast_portfolio, o mesmo caminho de python -m src.services.forecast.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from src.services.entries_store import EntriesStore
+from src.services.forecast import forecast_portfolio
+
+
+def synthetic_portfolio(companies: int, days: int = 56) -> tuple[list[dict], dict[str, float], list[dict]]:
+    rng = random.Random(42)
+    today = date.today()
+    company_rows = [
+        {"id": f"c{i}", "fixed_cost_avg": rng.choice([3000, 9000, 20000]), "variable_cost_percent": 30, "cash_minimum": 5000}
+        for i in range(companies)
+    ]
+    balances = {c["id"]: round(rng.uniform(-2000, 60000), 2) for c in company_rows}
+    rollups = [
+        {
+            "company_id": c["id"],
+            "day": (today - timedelta(days=offset)).isoformat(),
+            "revenue_total": round(rng.uniform(0, 3000), 2),
+            "expense_total": round(rng.uniform(0, 2000), 2),
+        }
+        for c in company_rows
+        for offset in range(1, days + 1, 3)
+    ]
+    return company_rows, balances, rollups
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=100_000)
+    parser.add_argument("--horizon", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    as_of = date.today()
+    companies, balances, rollups = synthetic_portfolio(args.companies)
+    company_ids = [c["id"] for c in companies]
+    receivables = [
+        {"company_id": c, "amount": 1500, "due_date": (as_of + timedelta(days=i % 60)).isoformat(), "status": "pending"}
+        for i, c in enumerate(company_ids)
+    ]
+
+    build = best_of(lambda: EntriesStore.from_rollups(rollups, company_ids), args.repeat)
+    store = EntriesStore.from_rollups(rollups, company_ids)
+    forecast = best_of(
+        lambda: forecast_portfolio(companies, store, balances, receivables, as_of, args.horizon, 56), args.repeat,
+    )
+
+    print(f"{args.companies} empresas, {len(rollups)} rollups")
+    print(f"  montagem do store:   {build * 1000:8.1f} ms")
+    print(f"  previsão {args.horizon} dias:    {forecast * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
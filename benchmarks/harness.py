@@ -0,0 +1,107 @@
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from src import database, main
+from src.handlers.daily_report import send_daily_reports
+from src.services import outbox
+from src.services import telegram as telegram_service
+from src.services.cache import clear_caches
+from src.services.dedup import deduplicator
+from tests.fakes import FakePostgrest, FakeTelegram, make_update, seed_active_company, use_fake_database
+
+COMMANDS = ["/receita 150", "/despesa 40", "/relatorio"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def seed_portfolio(fake_db: FakePostgrest, companies: int, entries_per_company: int, days: int = 90) -> None:
+    rng = random.Random(42)
+    today = date.today()
+    for chat_id in range(1, companies + 1):
+        company, _ = seed_active_company(fake_db, chat_id)
+        for _ in range(entries_per_company):
+            fake_db.insert("vigia_entries", {
+                "company_id": company["id"],
+                "entry_date": (today - timedelta(days=rng.randint(0, days))).isoformat(),
+                "amount": round(rng.uniform(50, 5000), 2),
+                "type": "revenue" if rng.random() < 0.6 else "expense",
+            })
+
+
+def install_fakes(db_latency: float, telegram_latency: float, blocking: bool = False) -> tuple[FakePostgrest, FakeTelegram]:
+    fake_db = FakePostgrest(latency=db_latency, blocking=blocking)
+    fake_tg = FakeTelegram(latency=telegram_latency)
+    use_fake_database(fake_db)
+    telegram_service.get_bot(fake_tg.request())
+    outbox._sender = None
+    clear_caches()
+    deduplicator.clear()
+    return fake_db, fake_tg
+
+
+async def drive_webhook(fake_db: FakePostgrest, fake_tg: FakeTelegram, chats: int, messages: int, interval: float) -> dict:
+    main.telegram_app = main.build_telegram_app(fake_tg.request())
+    await main.telegram_app.initialize()
+    fake_db.reset_calls()
+
+    latencies: list[float] = []
+
+    async def chat_session(client: httpx.AsyncClient, chat_id: int) -> None:
+        for i in range(messages):
+            scheduled = started + i * interval
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            update = make_update(chat_id * 100_000 + i, chat_id, COMMANDS[i % len(COMMANDS)])
+            await client.post("/webhook", json=update)
+            latencies.append(time.perf_counter() - scheduled)
+
+    transport = httpx.ASGITransport(app=main.app)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(chat_session(client, chat_id) for chat_id in range(1, chats + 1)))
+    elapsed = time.perf_counter() - started
+
+    await main.telegram_app.shutdown()
+    main.telegram_app = None
+
+    return {
+        "messages": len(latencies),
+        "msgs_per_s": round(len(latencies) / elapsed, 2),
+        "db_calls_per_message": round(len(fake_db.calls) / len(latencies), 2),
+        **latency_summary(latencies),
+    }
+
+
+async def run_daily_report(fake_db: FakePostgrest, fake_tg: FakeTelegram) -> dict:
+    telegram_service.get_bot(fake_tg.request())
+    fake_db.reset_calls()
+    started = time.perf_counter()
+    summary = await send_daily_reports()
+    return {
+        **summary,
+        "wall_time_s": round(time.perf_counter() - started, 3),
+        "db_calls": len(fake_db.calls),
+        "flood_waits": fake_tg.flooded,
+    }
+
+
+async def close() -> None:
+    await outbox.close_sender()
+    await database.close_async_supabase()
+    telegram_service._bot = None
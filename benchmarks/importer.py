@@ -0,0 +1,87 @@
+"""Importação de extrato CSV grande contra PostgREST falso.
+
+    python -m benchmarks.importer --rows 50000 --chunk-size 1000
+
+Mede o tempo total da importação (parse + dedup + inserts em lote) e o pico
+de memória só do parse, que deve ficar estável independente do tamanho do
+arquivo (o conjunto de chaves de dedup é o único termo que cresce).
+"""
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks import harness
+from src.services.importer import import_statement, open_statement, parse_csv
+from tests.fakes import seed_active_company
+
+
+def write_statement(handle, rows: int) -> None:
+    rng = random.Random(42)
+    today = date.today()
+    handle.write("Data;Descrição;Valor\n".encode())
+    for i in range(rows):
+        day = (today - timedelta(days=rng.randint(0, 365))).strftime("%d/%m/%Y")
+        amount = rng.uniform(10, 9000) * (1 if rng.random() < 0.6 else -1)
+        value = f"{amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        handle.write(f"{day};Lançamento {i};{value}\n".encode())
+    handle.flush()
+
+
+def parse_peak_kb(handle) -> float:
+    handle.seek(0)
+    tracemalloc.start()
+    text, _ = open_statement(handle, "extrato.csv")
+    for _ in parse_csv(text):
+        pass
+    text.detach()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+async def run(rows: int, chunk_size: int, db_latency: float) -> dict:
+    fake_db, _ = harness.install_fakes(db_latency, 0.0)
+    company, _ = seed_active_company(fake_db, 1)
+    with tempfile.TemporaryFile() as handle:
+        write_statement(handle, rows)
+        size_kb = round(handle.tell() / 1024, 1)
+        peak_kb = parse_peak_kb(handle)
+        handle.seek(0)
+        fake_db.reset_calls()
+        started = time.perf_counter()
+        summary = await import_statement(company["id"], handle, "extrato.csv", chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+    await harness.close()
+    return {
+        "rows": rows,
+        "file_kb": size_kb,
+        "imported": summary["imported"],
+        "wall_time_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed),
+        "db_calls": len(fake_db.calls),
+        "parse_peak_kb": peak_kb,
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    result = asyncio.run(run(args.rows, args.chunk_size, args.db_latency))
+    print(f"{result['rows']} linhas ({result['file_kb']} KB), {result['imported']} importadas")
+    print(f"  tempo total:        {result['wall_time_s']} s ({result['rows_per_s']} linhas/s)")
+    print(f"  chamadas ao banco:  {result['db_calls']}")
+    print(f"  pico de memória do parse: {result['parse_peak_kb']} KB")
+
+
+if __name__ == "__main__":
+    main_cli()
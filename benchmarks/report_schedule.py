@@ -0,0 +1,114 @@
+"""Pico de QPS no banco e no Telegram: todos às 7h vs. janela escalonada.
+
+    python -m benchmarks.report_schedule --companies 3000 --window 30 --slot 5
+
+"antes" dispara o relatório de toda a carteira de uma vez, como o antigo
+CronTrigger(hour=7, minute=0). "depois" roda um tick por fatia da janela
+(send_due_reports), cada um só com as empresas cujo report_offset cai na
+fatia. Os ticks rodam em sequência, mas no servidor ficam --slot minutos
+separados, então o pico relevante é o maior pico de um tick isolado.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks import harness
+from src.config import settings
+from src.handlers.daily_report import send_daily_reports, send_due_reports
+from tests.fakes import seed_active_company
+
+TIMEZONES = ("America/Sao_Paulo", "America/Sao_Paulo", "America/Sao_Paulo", "America/Manaus", "America/Noronha")
+SAMPLE_SECONDS = 0.05
+
+
+def seed(fake_db, companies: int) -> None:
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    for chat_id in range(1, companies + 1):
+        company, _ = seed_active_company(fake_db, chat_id, timezone=TIMEZONES[chat_id % len(TIMEZONES)])
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": yesterday, "amount": 1000, "type": "revenue",
+        })
+
+
+async def measure(fake_db, fake_tg, job) -> dict:
+    samples: list[tuple[float, int, int]] = []
+    done = asyncio.Event()
+
+    async def sampler() -> None:
+        while not done.is_set():
+            samples.append((time.perf_counter(), len(fake_db.calls), len(fake_tg.sent)))
+            await asyncio.sleep(SAMPLE_SECONDS)
+
+    task = asyncio.create_task(sampler())
+    started = time.perf_counter()
+    await job()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await task
+    samples.append((time.perf_counter(), len(fake_db.calls), len(fake_tg.sent)))
+
+    def peak(column: int) -> int:
+        best, first = 0, 0
+        for last in range(len(samples)):
+            while samples[last][0] - samples[first][0] > 1.0:
+                first += 1
+            best = max(best, samples[last][column] - samples[first][column])
+        return best
+
+    return {"seconds": elapsed, "db_peak": peak(1), "telegram_peak": peak(2)}
+
+
+async def run(companies: int, db_latency: float, telegram_latency: float) -> dict:
+    results = {}
+    for mode in ("antes", "depois"):
+        fake_db, fake_tg = harness.install_fakes(db_latency, telegram_latency)
+        seed(fake_db, companies)
+        fake_db.reset_calls()
+        if mode == "antes":
+            ticks = [await measure(fake_db, fake_tg, send_daily_reports)]
+        else:
+            first_slot = datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=8)
+            slots = range(0, 4 * 60, settings.report_slot_minutes)
+            ticks = []
+            for minutes in slots:
+                slot = first_slot + timedelta(minutes=minutes)
+                ticks.append(await measure(fake_db, fake_tg, lambda slot=slot: send_due_reports(slot)))
+        results[mode] = {
+            "sent": len(fake_tg.sent),
+            "busy_seconds": round(sum(t["seconds"] for t in ticks), 1),
+            "longest_burst_s": round(max(t["seconds"] for t in ticks), 1),
+            "db_peak_qps": max(t["db_peak"] for t in ticks),
+            "telegram_peak_qps": max(t["telegram_peak"] for t in ticks),
+            "db_calls": len(fake_db.calls),
+        }
+        await harness.close()
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=3000)
+    parser.add_argument("--window", type=int, default=settings.report_window_minutes)
+    parser.add_argument("--slot", type=int, default=settings.report_slot_minutes)
+    parser.add_argument("--rate", type=float, default=settings.telegram_rate_per_second)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    settings.report_window_minutes = args.window
+    settings.report_slot_minutes = args.slot
+    settings.telegram_rate_per_second = args.rate
+
+    results = asyncio.run(run(args.companies, args.db_latency, args.telegram_latency))
+    for mode, result in results.items():
+        print(
+            f"{mode:>6}: {result['sent']} enviados, rajada mais longa {result['longest_burst_s']}s, "
+            f"pico {result['db_peak_qps']} q/s no banco e {result['telegram_peak_qps']} msg/s no Telegram "
+            f"({result['db_calls']} chamadas ao banco)"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,107 @@
+"""Latência do relatório e das consultas quentes com 1 a 5 anos de histórico.
+
+    python -m benchmarks.retention --companies 100 --years 1 2 3 4 5
+
+Para cada tamanho de histórico roda o job diário e uma leitura de 30 dias
+(get_entries_by_company) duas vezes: com todo o histórico em vigia_entries e
+depois de compact_entries ter levado o que passou de ENTRY_RETENTION_DAYS
+para o arquivo. O relatório lê só rollups e saldos, então fica plano nos dois
+casos; a leitura de lançamentos cresce com o histórico sem retenção e para de
+crescer com ela.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks import harness
+from src.config import settings
+from src.services import retention
+from src.services import supabase as supabase_service
+from tests.fakes import FakePostgrest, seed_active_company
+
+SAMPLED_COMPANIES = 20
+
+
+def seed_history(fake_db: FakePostgrest, companies: int, years: int, entries_per_day: int) -> list[str]:
+    rng = random.Random(42)
+    today = date.today()
+    company_ids = []
+    for chat_id in range(1, companies + 1):
+        company, _ = seed_active_company(fake_db, chat_id)
+        company_ids.append(company["id"])
+        balance = 0.0
+        for offset in range(years * 365, 0, -1):
+            day = (today - timedelta(days=offset)).isoformat()
+            totals = {"revenue": 0.0, "expense": 0.0}
+            for _ in range(entries_per_day):
+                kind = "revenue" if rng.random() < 0.6 else "expense"
+                amount = round(rng.uniform(50, 2000), 2)
+                totals[kind] += amount
+                fake_db.tables["vigia_entries"].append({
+                    "id": f"{chat_id}-{offset}-{len(totals)}-{rng.random()}", "company_id": company["id"],
+                    "entry_date": day, "amount": amount, "type": kind,
+                })
+            balance += totals["revenue"] - totals["expense"]
+            fake_db.tables["vigia_daily_rollups"].append({
+                "company_id": company["id"], "day": day, "revenue_total": totals["revenue"],
+                "expense_total": totals["expense"], "entry_count": entries_per_day,
+            })
+        fake_db.tables["vigia_company_balances"].append({
+            "company_id": company["id"], "balance": balance, "entry_count": years * 365 * entries_per_day,
+        })
+    fake_db._indexes = {}
+    return company_ids
+
+
+async def hot_read(company_ids: list[str]) -> float:
+    started = time.perf_counter()
+    for company_id in company_ids[:SAMPLED_COMPANIES]:
+        await supabase_service.get_entries_by_company(company_id, 30)
+    return (time.perf_counter() - started) / min(len(company_ids), SAMPLED_COMPANIES)
+
+
+async def run(companies: int, years: list[int], entries_per_day: int, db_latency: float, telegram_latency: float) -> list[dict]:
+    results = []
+    for span in years:
+        for compacted in (False, True):
+            fake_db, fake_tg = harness.install_fakes(db_latency, telegram_latency)
+            company_ids = seed_history(fake_db, companies, span, entries_per_day)
+            if compacted:
+                await retention.compact_entries()
+            report = await harness.run_daily_report(fake_db, fake_tg)
+            results.append({
+                "years": span,
+                "retention": compacted,
+                "hot_entries": len(fake_db.tables["vigia_entries"]),
+                "report_s": report["wall_time_s"],
+                "report_db_calls": report["db_calls"],
+                "entries_30d_ms": round(await hot_read(company_ids) * 1000, 2),
+            })
+            await harness.close()
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=100)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--entries-per-day", type=int, default=3)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    settings.retention_max_batches = 10_000
+
+    for r in asyncio.run(run(args.companies, args.years, args.entries_per_day, args.db_latency, args.telegram_latency)):
+        print(
+            f"{r['years']} ano(s) {'com' if r['retention'] else 'sem'} retenção: "
+            f"{r['hot_entries']} lançamentos quentes, relatório {r['report_s']}s ({r['report_db_calls']} chamadas), "
+            f"leitura de 30 dias {r['entries_30d_ms']} ms"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,98 @@
+"""Suíte completa: webhook + job diário, com resultado salvo em JSON.
+
+    python -m benchmarks.run --companies 500 --entries-per-company 200 --chats 50
+    python -m benchmarks.run --compare benchmarks/results/anterior.json
+
+Cada execução grava benchmarks/results/<timestamp>.json (ou --output) para
+comparar regressões entre commits.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import harness
+from src.config import settings
+
+RESULTS_DIR = Path(__file__).parent / "results"
+COMPARED_METRICS = {
+    "webhook": ["msgs_per_s", "p50_ms", "p95_ms", "p99_ms", "db_calls_per_message"],
+    "daily_report": ["wall_time_s", "db_calls"],
+}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(args: argparse.Namespace) -> dict:
+    fake_db, fake_tg = harness.install_fakes(args.db_latency, args.telegram_latency)
+    harness.seed_portfolio(fake_db, args.companies, args.entries_per_company)
+
+    webhook = await harness.drive_webhook(fake_db, fake_tg, min(args.chats, args.companies), args.messages, args.interval)
+    daily_report = await harness.run_daily_report(fake_db, fake_tg)
+    await harness.close()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "webhook": webhook,
+        "daily_report": daily_report,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    lines = []
+    for section, metrics in COMPARED_METRICS.items():
+        for metric in metrics:
+            before = baseline.get(section, {}).get(metric)
+            after = current[section].get(metric)
+            if before is None or after is None:
+                continue
+            change = ((after - before) / before * 100) if before else 0.0
+            lines.append(f"{section}.{metric}: {before} -> {after} ({change:+.1f}%)")
+    return lines
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--entries-per-company", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=9)
+    parser.add_argument("--interval", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=settings.telegram_send_concurrency)
+    parser.add_argument("--rate", type=float, default=settings.telegram_rate_per_second)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    settings.telegram_rate_per_second = args.rate
+    settings.telegram_send_concurrency = args.concurrency
+
+    result = asyncio.run(run_suite(args))
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    print(json.dumps({"webhook": result["webhook"], "daily_report": result["daily_report"]}, indent=2))
+    print(f"Resultado salvo em {output}")
+    if args.compare:
+        for line in compare(result, json.loads(args.compare.read_text())):
+            print(line)
+
+
+if __name__ == "__main__":
+    main_cli()
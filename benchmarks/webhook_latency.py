@@ -0,0 +1,43 @@
+"""Latência do /webhook com N chats concorrentes.
+
+    python -m benchmarks.webhook_latency --chats 50 --messages 10 --db-latency 0.02
+
+Cada chat envia uma mensagem a cada --interval segundos e a latência é medida
+a partir do horário previsto de envio, então fila no event loop também conta.
+O modo "blocking" reproduz o cliente síncrono antigo (cada chamada ao banco
+trava o event loop); o modo "async" usa a camada assíncrona atual.
+"""
+import argparse
+import asyncio
+import logging
+
+from benchmarks import harness
+
+
+async def run(mode: str, chats: int, messages: int, db_latency: float, interval: float) -> dict:
+    fake_db, fake_tg = harness.install_fakes(db_latency, 0.0, blocking=mode == "blocking")
+    harness.seed_portfolio(fake_db, chats, entries_per_company=0)
+    result = await harness.drive_webhook(fake_db, fake_tg, chats, messages, interval)
+    await harness.close()
+    return {"mode": mode, **result}
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    for mode in ("blocking", "async"):
+        result = asyncio.run(run(mode, args.chats, args.messages, args.db_latency, args.interval))
+        print(
+            f"{result['mode']:>8}: {result['messages']} msgs, {result['msgs_per_s']:.1f} msgs/s, "
+            f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -11,5 +11,75 @@ class Settings(BaseSettings):
     environment: str = "development"
     log_level: str = "INFO"
 
+    db_pool_max_connections: int = 50
+    db_pool_max_keepalive: int = 20
+    db_timeout_seconds: float = 10.0
+    db_pool_timeout_seconds: float = 5.0
+
+    bulk_fetch_page_size: int = 1000
+
+    forecast_horizon_days: int = 90
+    forecast_lookback_days: int = 56
+    alerts_enabled: bool = True
+    alert_state_ttl_seconds: float = 600.0
+
+    cache_ttl_seconds: float = 60.0
+    cache_max_entries: int = 10_000
+
+    interaction_flush_seconds: float = 30.0
+    interaction_flush_max_users: int = 500
+    audit_enabled: bool = True
+    audit_buffer_size: int = 10_000
+    audit_batch_size: int = 500
+    audit_flush_seconds: float = 5.0
+    audit_max_retries: int = 3
+    audit_text_max_length: int = 1000
+
+    webhook_async_ingestion: bool = True
+    ingestion_workers: int = 16
+    ingestion_queue_size: int = 2000
+    ingestion_enqueue_timeout_seconds: float = 2.0
+    ingestion_drain_timeout_seconds: float = 25.0
+
+    dedup_window: int = 50_000
+    dedup_persistent: bool = False
+    dedup_retention_hours: int = 48
+
+    retention_enabled: bool = True
+    message_log_retention_days: int = 90
+    message_log_archive_months: int = 12
+    entry_retention_days: int = 730
+    retention_batch_size: int = 5000
+    retention_max_batches: int = 200
+
+    telegram_pool_size: int = 64
+    telegram_http2: bool = True
+    telegram_connect_timeout_seconds: float = 5.0
+    telegram_read_timeout_seconds: float = 10.0
+    telegram_pool_timeout_seconds: float = 5.0
+    telegram_send_concurrency: int = 20
+    telegram_send_queue_size: int = 20_000
+    telegram_rate_per_second: float = 30.0
+    telegram_chat_interval_seconds: float = 1.0
+    telegram_send_retries: int = 3
+    telegram_retry_backoff_seconds: float = 1.0
+
+    scheduler_lock_backend: str = "postgres"
+    scheduler_lock_dir: str = "/tmp/vigia-locks"
+    scheduler_lease_seconds: int = 60
+    report_shards: int = 16
+    report_shard_concurrency: int = 4
+    report_checkpoint_size: int = 200
+    report_max_attempts: int = 8
+    report_default_timezone: str = "America/Sao_Paulo"
+    report_window_minutes: int = 30
+    report_slot_minutes: int = 5
+
+    import_chunk_size: int = 1000
+    import_max_bytes: int = 20 * 1024 * 1024
+    import_spool_bytes: int = 1024 * 1024
+    import_progress_interval_seconds: float = 2.0
+    import_api_token: str = ""
+
 
 settings = Settings()
@@ -1,8 +1,44 @@
+from importlib.util import find_spec
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from supabase import create_client, Client, ClientOptions
 from src.config import settings
 
 _client: Client | None = None
 _service_client: Client | None = None
+_async_client: AsyncPostgrestClient | None = None
+_async_service_client: AsyncPostgrestClient | None = None
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    def __init__(self, key: str, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._transport = transport
+        super().__init__(
+            f"{settings.supabase_url}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+            },
+            timeout=httpx.Timeout(settings.db_timeout_seconds, pool=settings.db_pool_timeout_seconds),
+        )
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=find_spec("h2") is not None,
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=settings.db_pool_max_connections,
+                max_keepalive_connections=settings.db_pool_max_keepalive,
+            ),
+        )
 
 
 def get_supabase() -> Client:
@@ -32,3 +68,27 @@ def get_supabase_admin() -> Client:
             )
         )
     return _service_client
+
+
+def get_async_supabase() -> AsyncPostgrestClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = PooledPostgrestClient(settings.supabase_key)
+    return _async_client
+
+
+def get_async_supabase_admin() -> AsyncPostgrestClient:
+    global _async_service_client
+    if _async_service_client is None:
+        key = settings.supabase_service_role_key or settings.supabase_key
+        _async_service_client = PooledPostgrestClient(key)
+    return _async_service_client
+
+
+async def close_async_supabase() -> None:
+    global _async_client, _async_service_client
+    for client in (_async_client, _async_service_client):
+        if client is not None:
+            await client.aclose()
+    _async_client = None
+    _async_service_client = None
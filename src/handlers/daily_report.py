@@ -1,37 +1,296 @@
-from datetime import date, timedelta
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import AsyncIterator, Callable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from src.config import settings
+from src.services import locks
 from src.services import supabase as supabase_service
-from src.services.telegram import send_message
+from src.services.report_metrics import compute_metrics_for, metrics_for
+from src.services.outbox import get_sender
 from src.utils.burn_rate import calculate_daily_burn, calculate_runway, get_alert_level
-from src.utils.formatters import format_daily_report, format_currency
+from src.utils.formatters import format_daily_report
 
+logger = logging.getLogger(__name__)
 
-async def send_daily_reports() -> None:
-    companies = supabase_service.get_all_active_companies()
+
+@lru_cache(maxsize=None)
+def _zone(name: str) -> ZoneInfo | None:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Fuso horário desconhecido: {name}")
+        return None
+
+
+def company_zone(company: dict) -> ZoneInfo:
+    return _zone(company.get("timezone") or settings.report_default_timezone) or _zone(settings.report_default_timezone)
+
+
+def local_day(company: dict, moment: datetime) -> date:
+    return moment.astimezone(company_zone(company)).date()
+
+
+def already_sent(company: dict, day: date) -> bool:
+    sent_at = company.get("last_report_sent_at")
+    if not sent_at:
+        return False
+    return local_day(company, datetime.fromisoformat(sent_at)) >= day
+
+
+def slot_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    return moment.replace(minute=moment.minute - moment.minute % settings.report_slot_minutes, second=0, microsecond=0)
+
+
+def due_buckets(slot: datetime, timezones: list[str]) -> list[tuple[str, int, int, int]]:
+    window = min(max(settings.report_window_minutes, settings.report_slot_minutes), 60)
+    buckets = []
+    for name in timezones:
+        zone = _zone(name)
+        if zone is None:
+            continue
+        local = slot.astimezone(zone)
+        if local.minute >= window:
+            continue
+        low = local.minute * 60 // window
+        high = min(60, (local.minute + settings.report_slot_minutes) * 60 // window)
+        buckets.append((name, local.hour, low, high))
+    return buckets
+
+
+async def send_daily_reports(as_of: date | None = None) -> dict:
+    as_of = as_of or date.today()
+    return await _run_reports(
+        f"daily:{as_of.isoformat()}",
+        as_of,
+        settings.report_shards,
+        supabase_service.iter_report_companies,
+        lambda company: as_of,
+    )
+
+
+async def send_due_reports(now: datetime | None = None) -> dict | None:
+    slot = slot_start(now or datetime.now(timezone.utc))
+    timezones = await supabase_service.get_report_timezones()
+    buckets = due_buckets(slot, timezones or [settings.report_default_timezone])
+    if not buckets:
+        return None
+    probe = await supabase_service.get_due_report_companies(buckets, settings.report_shards * settings.report_checkpoint_size)
+    if not probe:
+        return None
+    
+    shards = min(settings.report_shards, -(-len(probe) // settings.report_checkpoint_size))
+    return await _run_reports(
+        f"slot:{slot.isoformat()}",
+        slot.date(),
+        shards,
+        lambda low, high: supabase_service.iter_due_report_companies(buckets, low, high),
+        lambda company: local_day(company, slot),
+    )
+
+
+async def _run_reports(
+    key: str,
+    run_date: date,
+    shards: int,
+    stream: Callable[[str | None, str | None], AsyncIterator[dict]],
+    day_of: Callable[[dict], date],
+) -> dict:
+    started = time.monotonic()
+    run = await supabase_service.start_report_run(key, run_date.isoformat(), shards)
+    shards = run["shards"]
+    summary = {
+        "run_id": run["id"], "sent": 0, "failed": 0, "retrying": 0, "skipped": 0, "already_sent": 0,
+        "shards": [], "failed_shards": [],
+    }
+    
+    if run["status"] == "completed":
+        logger.info(f"Relatório {key} já concluído")
+        summary["duration"] = round(time.monotonic() - started, 3)
+        return summary
     
+    async def send_shard(shard: int) -> None:
+        low, high = locks.shard_range(shard, shards)
+        counts = await _send_shard(run["id"], shard, stream(low, high), day_of)
+        for name, value in counts.items():
+            summary[name] += value
+        if counts["retrying"]:
+            raise RuntimeError(f"{counts['retrying']} entrega(s) a repetir")
+        await supabase_service.complete_report_shard(run["id"], shard, counts["sent"], counts["failed"], counts["skipped"])
+    
+    summary["shards"], summary["failed_shards"] = await locks.run_sharded(
+        f"report:{key}",
+        shards,
+        send_shard,
+        settings.report_shard_concurrency,
+        skip=run["completed_shards"],
+    )
+    summary["duration"] = round(time.monotonic() - started, 3)
+    logger.info(
+        f"Relatório {key} ({len(summary['shards'])}/{shards} shards): {summary['sent']} enviados, "
+        f"{summary['failed']} falhas, {summary['retrying']} a repetir, {summary['skipped']} ignorados, "
+        f"{summary['already_sent']} já enviados em {summary['duration']}s"
+    )
+    return summary
+
+
+async def resume_daily_reports() -> dict | None:
+    now = datetime.now(timezone.utc)
+    runs = await supabase_service.get_unfinished_report_runs(
+        (now - timedelta(days=1)).isoformat(),
+        (now - timedelta(seconds=settings.scheduler_lease_seconds)).isoformat(),
+    )
+    if not runs:
+        return None
+    totals = {"runs": 0, "sent": 0, "failed": 0, "retrying": 0, "skipped": 0, "already_sent": 0}
+    for run in runs:
+        logger.info(f"Retomando relatório {run['run_key']} ({len(run['completed_shards'])}/{run['shards']} shards concluídos)")
+        kind, _, value = run["run_key"].partition(":")
+        if kind == "slot":
+            summary = await send_due_reports(datetime.fromisoformat(value))
+        else:
+            summary = await send_daily_reports(date.fromisoformat(value))
+        if summary is None:
+            continue
+        totals["runs"] += 1
+        for name in ("sent", "failed", "retrying", "skipped", "already_sent"):
+            totals[name] += summary[name]
+    return totals
+
+
+def _delivery(run_id: str, shard: int, company_id: str, outcome: dict, previous: dict | None = None) -> dict:
+    return {
+        "run_id": run_id,
+        "company_id": company_id,
+        "shard": shard,
+        "status": outcome["status"],
+        "attempts": ((previous or {}).get("attempts") or 0) + outcome["attempts"],
+        "message_id": outcome["message_id"],
+        "error": outcome["error"],
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _failure(run_id: str, shard: int, company_id: str, outcome: dict, deliveries: dict[str, dict], counts: dict) -> dict:
+    row = _delivery(run_id, shard, company_id, outcome, deliveries.get(company_id))
+    counts["failed" if row["attempts"] >= settings.report_max_attempts else "retrying"] += 1
+    return row
+
+
+async def _send_shard(run_id: str, shard: int, companies: AsyncIterator[dict], day_of: Callable[[dict], date]) -> dict:
+    counts = {"sent": 0, "failed": 0, "retrying": 0, "skipped": 0, "already_sent": 0}
+    deliveries = await supabase_service.get_report_deliveries(run_id, shard)
+    chunk: list[dict] = []
+    async for company in companies:
+        chunk.append(company)
+        if len(chunk) >= settings.report_checkpoint_size:
+            await _send_chunk(run_id, shard, chunk, deliveries, day_of, counts)
+            chunk = []
+    if chunk:
+        await _send_chunk(run_id, shard, chunk, deliveries, day_of, counts)
+    return counts
+
+
+async def _load_metrics(days: dict[str, date]) -> dict[str, dict]:
+    by_day: dict[date, list[str]] = {}
+    for company_id, day in days.items():
+        by_day.setdefault(day, []).append(company_id)
+    metrics: dict[str, dict] = {}
+    for batch in await asyncio.gather(*(compute_metrics_for(ids, day) for day, ids in by_day.items())):
+        metrics.update(batch)
+    return metrics
+
+
+async def _send_chunk(
+    run_id: str,
+    shard: int,
+    companies: list[dict],
+    deliveries: dict[str, dict],
+    day_of: Callable[[dict], date],
+    counts: dict,
+) -> None:
+    due: list[dict] = []
+    days: dict[str, date] = {}
     for company in companies:
+        days[company["id"]] = day_of(company)
+        previous = deliveries.get(company["id"]) or {}
+        if not company.get("chat_id"):
+            counts["skipped"] += 1
+        elif already_sent(company, days[company["id"]]) or previous.get("status") == "sent":
+            counts["already_sent"] += 1
+        elif previous.get("status") == "failed" and (previous.get("attempts") or 0) >= settings.report_max_attempts:
+            counts["failed"] += 1
+        else:
+            due.append(company)
+    if not due:
+        return
+    
+    metrics = await _load_metrics({company["id"]: days[company["id"]] for company in due})
+    pending: list[tuple[dict, str]] = []
+    checkpoint: list[dict] = []
+    for company in due:
         try:
-            await _send_company_report(company)
+            pending.append((company, build_company_report(company, metrics_for(metrics, company["id"]))))
         except Exception as e:
-            print(f"Erro ao enviar relatório para {company.get('name')}: {e}")
+            checkpoint.append(_failure(run_id, shard, company["id"], {
+                "status": "failed", "attempts": 1, "message_id": None, "error": str(e),
+            }, deliveries, counts))
+            logger.error(f"Erro ao montar relatório para {company.get('name')}: {e}")
+    
+    if pending:
+        await supabase_service.upsert_report_deliveries([
+            {"run_id": run_id, "company_id": company["id"], "shard": shard, "status": "pending"}
+            for company, _ in pending
+        ])
+    
+    async def flush() -> None:
+        rows = checkpoint[:]
+        checkpoint.clear()
+        delivered = [row["company_id"] for row in rows if row["status"] == "sent"]
+        if delivered:
+            await supabase_service.mark_reports_sent(delivered, datetime.now(timezone.utc).isoformat())
+        if rows:
+            await supabase_service.upsert_report_deliveries(rows)
+    
+    sender = get_sender()
+    
+    async def deliver(company: dict, text: str) -> None:
+        outcome = await sender.send(company["chat_id"], text)
+        if outcome["status"] == "sent":
+            counts["sent"] += 1
+            checkpoint.append(_delivery(run_id, shard, company["id"], outcome, deliveries.get(company["id"])))
+        else:
+            checkpoint.append(_failure(run_id, shard, company["id"], outcome, deliveries, counts))
+    
+    tasks = [asyncio.ensure_future(deliver(company, text)) for company, text in pending]
+    try:
+        for completed in asyncio.as_completed(tasks):
+            await completed
+            if len(checkpoint) >= settings.report_checkpoint_size:
+                await flush()
+    finally:
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await flush()
 
 
-async def _send_company_report(company: dict) -> None:
-    company_id = company["id"]
-    
-    yesterday_revenue = _get_yesterday_revenue(company_id)
-    avg_revenue = _get_avg_revenue(company_id)
-    cash_balance = _get_cash_balance(company_id)
-    overdue_total = _get_overdue_total(company_id)
+def build_company_report(company: dict, metrics: dict) -> str:
+    yesterday_revenue = metrics["yesterday_revenue"]
+    avg_revenue = metrics["avg_revenue"]
+    cash_balance = metrics["cash_balance"]
+    overdue_total = metrics["overdue_total"]
     
     fixed_cost = company.get("fixed_cost_avg", 0) or 0
     variable_percent = company.get("variable_cost_percent", 30) or 30
     
-    daily_burn = calculate_daily_burn(fixed_cost, avg_revenue / 7, variable_percent)
+    daily_burn = calculate_daily_burn(fixed_cost, avg_revenue, variable_percent)
     days_of_cash = calculate_runway(cash_balance, daily_burn)
     
     alert_emoji, alert_level = get_alert_level(int(days_of_cash))
     
-    message = format_daily_report(
+    return format_daily_report(
         company_name=company.get("name", "Empresa"),
         revenue_yesterday=yesterday_revenue,
         revenue_avg=avg_revenue,
@@ -41,35 +300,3 @@ async def _send_company_report(company: dict) -> None:
         alert_emoji=alert_emoji,
         alert_level=alert_level
     )
-    
-    chat_id = company.get("chat_id")
-    if chat_id:
-        await send_message(chat_id, message)
-
-
-def _get_yesterday_revenue(company_id: str) -> float:
-    yesterday = (date.today() - timedelta(days=1)).isoformat()
-    entries = supabase_service.get_entries_yesterday(company_id)
-    return sum(e["amount"] for e in entries if e["type"] == "revenue")
-
-
-def _get_avg_revenue(company_id: str) -> float:
-    entries = supabase_service.get_entries_by_company(company_id, days=7)
-    revenues = [e["amount"] for e in entries if e["type"] == "revenue"]
-    return sum(revenues) / 7 if revenues else 0
-
-
-def _get_cash_balance(company_id: str) -> float:
-    entries = supabase_service.get_entries_by_company(company_id, days=90)
-    cash = 0
-    for e in entries:
-        if e["type"] == "revenue":
-            cash += e["amount"]
-        elif e["type"] == "expense":
-            cash -= e["amount"]
-    return cash
-
-
-def _get_overdue_total(company_id: str) -> float:
-    receivables = supabase_service.get_receivables_pending(company_id)
-    return sum(r["amount"] for r in receivables)
@@ -1,37 +1,12 @@
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-from src.database import get_supabase
+from src.services.unit_of_work import UnitOfWork
+from src.utils.formatters import format_currency, parse_number
 
 logger = logging.getLogger(__name__)
 
 
-def get_company_by_id(company_id: str) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_companies").select("*").eq("id", company_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
-def update_company(company_id: str, data: dict) -> dict | None:
-    from src.database import get_supabase_admin
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_companies").update(data).eq("id", company_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
-def update_user(user_id: str, data: dict) -> dict | None:
-    from src.database import get_supabase_admin
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_users").update(data).eq("id", user_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
 def get_current_step(company: dict, onboarding_step: int) -> int:
     if onboarding_step > 0 and onboarding_step <= 4:
         return onboarding_step
@@ -50,15 +25,6 @@ def is_waiting_for_input(company: dict, onboarding_step: int) -> bool:
     return step < 4
 
 
-def parse_number(value: str) -> tuple[bool, float | None, str]:
-    cleaned = value.replace("R", "").replace("r", "").replace("$", "").replace(" ", "").replace(".", "")
-    cleaned = cleaned.replace(",", ".")
-    try:
-        return True, float(cleaned), ""
-    except ValueError:
-        return False, None, "Por favor, digite apenas números (ex: 5000)"
-
-
 def validate_input(value: float, step: int) -> tuple[bool, str]:
     if step == 1:
         if value <= 0:
@@ -72,27 +38,21 @@ def validate_input(value: float, step: int) -> tuple[bool, str]:
     return True, ""
 
 
-def format_currency(value: float) -> str:
-    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-
-async def process_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict, message_text: str | None) -> None:
+async def process_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE, uow: UnitOfWork, message_text: str | None) -> None:
     from src.handlers.operation import process_operation
-    from src.handlers.router import get_user_by_chat_id
     
     chat_id = update.effective_chat.id
-    company_id = user.get("company_id")
+    user = uow.user
     
-    current_user = get_user_by_chat_id(chat_id)
-    if current_user and current_user.get("state") == "active":
-        await process_operation(update, context, current_user, message_text)
+    if user.get("state") == "active":
+        await process_operation(update, context, uow, message_text)
         return
     
-    if not company_id:
+    if not user.get("company_id"):
         await context.bot.send_message(chat_id=chat_id, text="❌ Erro: empresa não encontrada")
         return
     
-    company = get_company_by_id(company_id)
+    company = await uow.get_company()
     if not company:
         await context.bot.send_message(chat_id=chat_id, text="❌ Erro: empresa não encontrada")
         return
@@ -111,8 +71,8 @@ async def process_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE,
             return
         
         if current_step == 1:
-            update_company(company_id, {"fixed_cost_avg": value})
-            update_user(user["id"], {"onboarding_step": 2, "current_action": "awaiting_variable_cost"})
+            await uow.update_company({"fixed_cost_avg": value})
+            await uow.update_user({"onboarding_step": 2, "current_action": "awaiting_variable_cost"})
             await context.bot.send_message(
                 chat_id=chat_id,
                 text=f"✅ Custo fixo registrado: {format_currency(value)}\n\n"
@@ -122,8 +82,8 @@ async def process_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE,
             )
             return
         elif current_step == 2:
-            update_company(company_id, {"variable_cost_percent": value})
-            update_user(user["id"], {"onboarding_step": 3, "current_action": "awaiting_cash_minimum"})
+            await uow.update_company({"variable_cost_percent": value})
+            await uow.update_user({"onboarding_step": 3, "current_action": "awaiting_cash_minimum"})
             await context.bot.send_message(
                 chat_id=chat_id,
                 text=f"✅ Custo variável: {value}%\n\n"
@@ -133,8 +93,8 @@ async def process_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE,
             )
             return
         elif current_step == 3:
-            update_company(company_id, {"cash_minimum": value})
-            update_user(user["id"], {"onboarding_step": 4, "state": "active", "current_action": None})
+            await uow.update_company({"cash_minimum": value})
+            await uow.update_user({"onboarding_step": 4, "state": "active", "current_action": None})
             await context.bot.send_message(
                 chat_id=chat_id,
                 text=f"✅ Caixa mínimo: {format_currency(value)}\n\n"
@@ -1,103 +1,40 @@
 import logging
-from datetime import date, timedelta
+import tempfile
+import time
+from datetime import date
 from telegram import Update
 from telegram.ext import ContextTypes
-from src.database import get_supabase
+from src.config import settings
+from src.services import alerts
+from src.services import receivables
+from src.services import supabase as supabase_service
+from src.services.importer import MAX_AMOUNT, import_statement
+from src.services.report_metrics import get_company_metrics
+from src.services.unit_of_work import UnitOfWork
+from src.utils.burn_rate import calculate_daily_burn, calculate_runway
+from src.utils.formatters import format_currency, parse_number
 
 logger = logging.getLogger(__name__)
 
 
-def get_company_by_id(company_id: str) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_companies").select("*").eq("id", company_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
-def get_entries_by_company(company_id: str) -> list[dict]:
-    supabase = get_supabase()
-    result = supabase.table("vigia_entries").select("*").eq("company_id", company_id).execute()
-    return result.data
-
-
-def get_yesterday_revenue(company_id: str) -> float:
-    supabase = get_supabase()
-    yesterday = (date.today() - timedelta(days=1)).isoformat()
-    result = supabase.table("vigia_entries").select("amount").eq("company_id", company_id).eq("type", "revenue").eq("entry_date", yesterday).execute()
-    return sum(r["amount"] for r in result.data)
-
-
-def get_avg_revenue_7days(company_id: str) -> float:
-    supabase = get_supabase()
-    start_date = (date.today() - timedelta(days=7)).isoformat()
-    result = supabase.table("vigia_entries").select("amount").eq("company_id", company_id).eq("type", "revenue").gte("entry_date", start_date).execute()
-    revenues = [r["amount"] for r in result.data]
-    return sum(revenues) / 7 if revenues else 0
-
-
-def get_cash_balance(company_id: str) -> float:
-    supabase = get_supabase()
-    result = supabase.table("vigia_entries").select("amount", "type").eq("company_id", company_id).execute()
-    cash = 0
-    for r in result.data:
-        if r["type"] == "revenue":
-            cash += r["amount"]
-        else:
-            cash -= r["amount"]
-    return cash
-
-
-def get_overdue_receivables(company_id: str) -> tuple[int, float]:
-    supabase = get_supabase()
-    result = supabase.table("vigia_receivables").select("amount").eq("company_id", company_id).eq("status", "pending").execute()
-    count = len(result.data)
-    total = sum(r["amount"] for r in result.data)
-    return count, total
-
-
-def calculate_daily_burn(fixed_cost_avg: float, avg_daily_revenue: float, variable_percent: float) -> float:
-    return (fixed_cost_avg / 30) + (avg_daily_revenue * variable_percent / 100)
-
-
-def calculate_runway(cash_balance: float, daily_burn: float) -> int:
-    if daily_burn <= 0:
-        return 999
-    return int(cash_balance / daily_burn)
-
-
-def create_entry(data: dict) -> dict:
-    supabase = get_supabase()
-    result = supabase.table("vigia_entries").insert(data).execute()
-    return result.data[0]
-
-
-def update_company(company_id: str, data: dict) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_companies").update(data).eq("id", company_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
-def format_currency(value: float) -> str:
-    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-
-async def process_operation(update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict, message_text: str | None) -> None:
+async def process_operation(update: Update, context: ContextTypes.DEFAULT_TYPE, uow: UnitOfWork, message_text: str | None) -> None:
     chat_id = update.effective_chat.id
-    company_id = user.get("company_id")
+    user = uow.user
     first_name = user.get("first_name", "Usuário")
     
-    if not company_id:
+    if not user.get("company_id"):
         await context.bot.send_message(chat_id=chat_id, text="❌ Erro: empresa não encontrada")
         return
     
-    company = get_company_by_id(company_id)
+    company = await uow.get_company()
     if not company:
         await context.bot.send_message(chat_id=chat_id, text="❌ Erro: empresa não encontrada")
         return
     
+    if update.message and update.message.document:
+        await _handle_import(context, chat_id, company, user, update.message.document)
+        return
+    
     if not message_text:
         await context.bot.send_message(chat_id=chat_id, text="❌ Mensagem vazia")
         return
@@ -112,6 +49,8 @@ async def process_operation(update: Update, context: ContextTypes.DEFAULT_TYPE,
                  "/receita - Registrar faturamento do dia\n"
                  "/despesa - Registrar despesa do dia\n"
                  "/relatorio - Ver situação atual\n"
+                 "/importar - Importar extrato CSV ou OFX\n"
+                 "/receber - Contas a receber\n"
                  "/ajuda - Ver todos os comandos"
         )
     elif text.startswith("/receita"):
@@ -120,6 +59,10 @@ async def process_operation(update: Update, context: ContextTypes.DEFAULT_TYPE,
         await _handle_expense(context, chat_id, company, text)
     elif text.startswith("/relatorio"):
         await _handle_report(context, chat_id, company, first_name)
+    elif text.startswith("/importar"):
+        await _handle_import_instructions(context, chat_id)
+    elif text.startswith("/receber"):
+        await _handle_receivables(context, chat_id, company, message_text.strip())
     elif text.startswith("/ajuda") or text.startswith("/help"):
         await _handle_help(context, chat_id)
     else:
@@ -130,6 +73,16 @@ async def process_operation(update: Update, context: ContextTypes.DEFAULT_TYPE,
         )
 
 
+async def _send_alerts(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, entry: dict) -> None:
+    try:
+        raised = await alerts.evaluate_entry(company, entry)
+    except Exception as e:
+        logger.error(f"Erro ao avaliar alertas da empresa {company['id']}: {e}")
+        return
+    for alert in raised:
+        await context.bot.send_message(chat_id=chat_id, text=alert["message"])
+
+
 async def _handle_revenue(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, text: str) -> None:
     parts = text.split()
     if len(parts) < 2:
@@ -148,18 +101,20 @@ async def _handle_revenue(context: ContextTypes.DEFAULT_TYPE, chat_id: int, comp
         await context.bot.send_message(chat_id=chat_id, text="❌ Valor inválido. Use: /receita 1500")
         return
     
-    create_entry({
+    entry = {
         "company_id": company["id"],
         "entry_date": date.today().isoformat(),
         "amount": amount,
         "type": "revenue",
         "source": "manual"
-    })
+    }
+    await supabase_service.create_entry(entry)
     
     await context.bot.send_message(
         chat_id=chat_id,
         text=f"✅ Receita de {format_currency(amount)} registrada!"
     )
+    await _send_alerts(context, chat_id, company, entry)
 
 
 async def _handle_expense(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, text: str) -> None:
@@ -180,33 +135,159 @@ async def _handle_expense(context: ContextTypes.DEFAULT_TYPE, chat_id: int, comp
         await context.bot.send_message(chat_id=chat_id, text="❌ Valor inválido. Use: /despesa 500")
         return
     
-    create_entry({
+    entry = {
         "company_id": company["id"],
         "entry_date": date.today().isoformat(),
         "amount": amount,
         "type": "expense",
         "source": "manual"
-    })
+    }
+    await supabase_service.create_entry(entry)
     
     await context.bot.send_message(
         chat_id=chat_id,
         text=f"✅ Despesa de {format_currency(amount)} registrada!"
     )
+    await _send_alerts(context, chat_id, company, entry)
+
+
+RECEIVABLES_USAGE = (
+    "📝 Para cadastrar um valor a receber, digite:\n"
+    "/receber 1500 15/03 Nome do cliente\n\n"
+    "Para ver as contas em aberto: /receber\n"
+    "Para dar baixa no item 2 da lista: /receber pago 2"
+)
+
+
+def _format_receivables(items: list[dict], totals: dict) -> str:
+    if not items:
+        return "📑 Nenhuma conta a receber em aberto.\n\n" + RECEIVABLES_USAGE
+    message = "📑 Contas a receber\n\n"
+    for position, item in enumerate(items, start=1):
+        due = date.fromisoformat(item["due_date"]).strftime("%d/%m/%Y")
+        flag = " 🔴 em atraso" if receivables.is_overdue(item) else ""
+        message += f"{position}. {item['client_name']} - {format_currency(float(item['amount']))} - vence {due}{flag}\n"
+    if totals["open_count"] > len(items):
+        message += f"... e mais {totals['open_count'] - len(items)}\n"
+    message += f"\nEm aberto: {totals['open_count']} somando {format_currency(totals['open_total'])}"
+    if totals["overdue_count"]:
+        message += f"\nEm atraso: {totals['overdue_count']} somando {format_currency(totals['overdue_total'])}"
+    return message
+
+
+async def _handle_receivables(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, message_text: str) -> None:
+    parts = message_text.split()
+    
+    if len(parts) == 1:
+        items, totals = await receivables.get_company_receivables(company["id"])
+        await context.bot.send_message(chat_id=chat_id, text=_format_receivables(items, totals))
+        return
+    
+    if parts[1].lower() == "pago":
+        items, _ = await receivables.get_company_receivables(company["id"])
+        if len(parts) < 3 or not parts[2].isdigit() or not 1 <= int(parts[2]) <= len(items):
+            await context.bot.send_message(chat_id=chat_id, text="❌ Informe o número do item na lista. Ex: /receber pago 2")
+            return
+        item = items[int(parts[2]) - 1]
+        if await receivables.mark_paid(company["id"], item) is None:
+            await context.bot.send_message(chat_id=chat_id, text="❌ Esse valor já foi baixado.")
+            return
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=f"✅ Recebimento de {item['client_name']} confirmado! "
+                 f"{format_currency(float(item['amount']))} lançado como receita de hoje."
+        )
+        return
+    
+    valid, amount, _ = parse_number(parts[1])
+    amount = round(amount, 2) if valid else 0.0
+    due_date = receivables.parse_due_date(parts[2]) if len(parts) > 2 else None
+    client_name = " ".join(parts[3:])
+    if not 0 < amount < MAX_AMOUNT or due_date is None or not client_name:
+        await context.bot.send_message(chat_id=chat_id, text="❌ Não entendi.\n\n" + RECEIVABLES_USAGE)
+        return
+    
+    await receivables.create_receivable(company["id"], client_name, amount, due_date)
+    status = "já vencido" if due_date < date.today() else "a vencer"
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"✅ {format_currency(amount)} de {client_name} cadastrado, {status} em {due_date.strftime('%d/%m/%Y')}."
+    )
 
 
-async def _handle_report(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, user_name: str = "Cliente") -> None:
-    company_id = company["id"]
+async def _handle_import_instructions(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text="📥 Para importar seu histórico, envie aqui o extrato do banco em CSV ou OFX.\n\n"
+             "No CSV, use as colunas data, valor e descrição (opcional). "
+             "Valores negativos viram despesas e os positivos, receitas.\n"
+             "Lançamentos repetidos são ignorados, então pode reenviar o mesmo arquivo sem problema."
+    )
+
+
+def _format_import_summary(summary: dict) -> str:
+    message = "✅ Importação concluída!\n\n"
+    message += f"{summary['imported']} lançamento(s) importado(s)\n"
+    if summary["duplicates"]:
+        message += f"{summary['duplicates']} repetido(s) ignorado(s)\n"
+    if summary["invalid"]:
+        message += f"{summary['invalid']} linha(s) inválida(s)\n"
+        message += "".join(f"• {error}\n" for error in summary["errors"])
+    return message.rstrip()
+
+
+async def _handle_import(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, user: dict, document) -> None:
+    if document.file_size and document.file_size > settings.import_max_bytes:
+        limit_mb = settings.import_max_bytes // (1024 * 1024)
+        await context.bot.send_message(chat_id=chat_id, text=f"❌ Arquivo muito grande. O limite é {limit_mb} MB.")
+        return
+    
+    progress = await context.bot.send_message(chat_id=chat_id, text=f"⏳ Importando {document.file_name or 'arquivo'}...")
+    last_update = time.monotonic()
+    
+    async def report_progress(summary: dict) -> None:
+        nonlocal last_update
+        if time.monotonic() - last_update < settings.import_progress_interval_seconds:
+            return
+        last_update = time.monotonic()
+        try:
+            await context.bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=progress.message_id,
+                text=f"⏳ {summary['imported'] + summary['duplicates']} de {summary['rows']} linha(s) processada(s)..."
+            )
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar o progresso da importação: {e}")
     
-    yesterday_revenue = get_yesterday_revenue(company_id)
-    avg_revenue = get_avg_revenue_7days(company_id)
-    cash_balance = get_cash_balance(company_id)
-    overdue_count, overdue_total = get_overdue_receivables(company_id)
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=settings.import_spool_bytes) as buffer:
+            telegram_file = await context.bot.get_file(document.file_id)
+            await telegram_file.download_to_memory(buffer)
+            buffer.seek(0)
+            summary = await import_statement(company["id"], buffer, document.file_name, user["id"], report_progress)
+        text = _format_import_summary(summary)
+    except ValueError as e:
+        text = f"❌ {e}"
+    except Exception as e:
+        logger.error(f"Erro ao importar extrato da empresa {company['id']}: {e}")
+        text = "❌ Não consegui importar o arquivo. Tente novamente em alguns minutos."
+    
+    await context.bot.edit_message_text(chat_id=chat_id, message_id=progress.message_id, text=text)
+
+
+async def _handle_report(context: ContextTypes.DEFAULT_TYPE, chat_id: int, company: dict, user_name: str = "Cliente") -> None:
+    metrics = await get_company_metrics(company["id"])
+    yesterday_revenue = metrics["yesterday_revenue"]
+    avg_revenue = metrics["avg_revenue"]
+    cash_balance = metrics["cash_balance"]
+    overdue_count = metrics["overdue_count"]
+    overdue_total = metrics["overdue_total"]
     
     fixed_cost = company.get("fixed_cost_avg", 0) or 0
     variable_percent = company.get("variable_cost_percent", 30) or 30
     
     daily_burn = calculate_daily_burn(fixed_cost, avg_revenue, variable_percent)
-    runway_days = calculate_runway(cash_balance, daily_burn)
+    runway_days = int(calculate_runway(cash_balance, daily_burn))
     
     if avg_revenue > 0:
         variation = ((yesterday_revenue - avg_revenue) / avg_revenue) * 100
@@ -251,8 +332,19 @@ async def _handle_help(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None
 /relatorio
 → Envia relatório detalhado do momento
 
-📑 *Outros*
-/receber - Cadastrar cliente em atraso (em breve)
+📥 *Importação*
+/importar
+→ Importa o extrato do banco (CSV ou OFX)
+
+📑 *Contas a receber*
+/receber 1500 15/03 Cliente
+→ Cadastra um valor a receber
+/receber
+→ Lista as contas em aberto e em atraso
+/receber pago 2
+→ Dá baixa no item 2 da lista
+
+❓ *Outros*
 /ajuda - Mostra esta mensagem
 
 💡 *Dica:* Use /relatorio a qualquer momento para ver a situação do seu caixa!"""
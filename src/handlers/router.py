@@ -1,31 +1,18 @@
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes, Application
-from src.database import get_supabase, get_supabase_admin
+from src.services import metrics
+from src.services.audit import audit_log
+from src.services import supabase as supabase_service
+from src.services.interactions import interaction_buffer
+from src.services.unit_of_work import UnitOfWork
 
 logger = logging.getLogger(__name__)
 
 
-def get_user_by_chat_id(chat_id: int) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_users").select("*").eq("chat_id", chat_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
-def get_company_by_id(company_id: str) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_companies").select("*").eq("id", company_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
-
-
-def create_company(first_name: str, chat_id: int) -> dict:
-    supabase = get_supabase_admin()
+async def create_company(first_name: str, chat_id: int) -> dict:
     company_name = f"{first_name} - Empresa"
-    result = supabase.table("vigia_companies").insert({
+    return await supabase_service.create_company({
         "name": company_name,
         "status": "trial",
         "plan": "early_adopter",
@@ -33,28 +20,22 @@ def create_company(first_name: str, chat_id: int) -> dict:
         "variable_cost_percent": 30,
         "cash_minimum": 5000,
         "chat_id": chat_id
-    }).execute()
-    return result.data[0]
+    })
 
 
-def create_user(chat_id: int, telegram_id: int, first_name: str, company_id: str) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_users").insert({
+async def create_user(chat_id: int, telegram_id: int, first_name: str, company_id: str) -> dict:
+    return await supabase_service.create_user({
         "chat_id": chat_id,
         "telegram_id": telegram_id,
         "first_name": first_name,
         "state": "new",
         "onboarding_step": 0,
         "company_id": company_id
-    }).execute()
-    return result.data[0]
+    })
 
 
 def update_last_interaction(user_id: str) -> None:
-    supabase = get_supabase()
-    supabase.table("vigia_users").update({
-        "last_interaction_at": "now()"
-    }).eq("id", user_id).execute()
+    interaction_buffer.record(user_id)
 
 
 async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -75,12 +56,14 @@ async def route_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.warning(f"chat_id ausente na mensagem de {telegram_user_id}")
         return
 
-    user = get_user_by_chat_id(chat_id)
+    uow = UnitOfWork(chat_id)
+    user = await uow.load()
 
     if user is None:
         try:
-            company = create_company(first_name, chat_id)
-            user = create_user(chat_id, telegram_user_id, first_name, company["id"])
+            company = await create_company(first_name, chat_id)
+            user = await create_user(chat_id, telegram_user_id, first_name, company["id"])
+            uow.user, uow.company = user, company
             logger.info(f"Novo usuário criado: {user['id']}, empresa: {company['id']}")
         except Exception as e:
             logger.error(f"Erro ao criar usuário/empresa: {e}")
@@ -90,12 +73,15 @@ async def route_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
             )
             return
 
-    try:
-        update_last_interaction(user["id"])
-    except Exception:
-        pass
+    update_last_interaction(user["id"])
+    document = update.message.document if update.message else None
+    if document:
+        audit_log.record_inbound(user, chat_id, message_text, message_id, kind="document", file_name=document.file_name)
+    else:
+        audit_log.record_inbound(user, chat_id, message_text, message_id)
 
     state = user.get("state", "new")
+    metrics.routed_messages.inc(state=state)
     message_text_raw = message_text if message_text else ""
     message_text_lower = message_text_raw.lower().strip()
     
@@ -110,6 +96,8 @@ async def route_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                      "/receita <valor> - Registrar faturamento\n"
                      "/despesa <valor> - Registrar despesa\n"
                      "/relatorio - Ver situacao atual\n"
+                     "/importar - Importar extrato CSV ou OFX\n"
+                     "/receber - Contas a receber\n"
                      "/ajuda - Esta mensagem\n\n"
                      "Use /relatorio para ver a situacao do seu caixa!"
             )
@@ -119,15 +107,14 @@ async def route_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
     if state == "new":
         if message_text_lower.startswith("/start"):
-            from src.database import get_supabase
-            get_supabase().table("vigia_users").update({"state": "onboarding"}).eq("id", user["id"]).execute()
-            await _delegate_to_onboarding(update, context, user, message_text)
+            await uow.update_user({"state": "onboarding"})
+            await _delegate_to_onboarding(update, context, uow, message_text)
         else:
             await _send_welcome_message(update, context, user)
     elif state == "onboarding":
-        await _delegate_to_onboarding(update, context, user, message_text)
+        await _delegate_to_onboarding(update, context, uow, message_text)
     elif state == "active":
-        await _delegate_to_operation(update, context, user, message_text)
+        await _delegate_to_operation(update, context, uow, message_text)
     elif state == "paused":
         await context.bot.send_message(
             chat_id=chat_id,
@@ -140,7 +127,7 @@ async def route_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
     else:
         logger.warning(f"Estado desconhecido: {state}, tratando como new")
-        await _delegate_to_onboarding(update, context, user, message_text)
+        await _delegate_to_onboarding(update, context, uow, message_text)
 
 
 async def _send_welcome_message(update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict) -> None:
@@ -166,11 +153,11 @@ Digite /start quando quiser começar!"""
     await context.bot.send_message(chat_id=chat_id, text=message)
 
 
-async def _delegate_to_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict, message_text: str | None) -> None:
+async def _delegate_to_onboarding(update: Update, context: ContextTypes.DEFAULT_TYPE, uow: UnitOfWork, message_text: str | None) -> None:
     from src.handlers.onboarding import process_onboarding
-    await process_onboarding(update, context, user, message_text)
+    await process_onboarding(update, context, uow, message_text)
 
 
-async def _delegate_to_operation(update: Update, context: ContextTypes.DEFAULT_TYPE, user: dict, message_text: str | None) -> None:
+async def _delegate_to_operation(update: Update, context: ContextTypes.DEFAULT_TYPE, uow: UnitOfWork, message_text: str | None) -> None:
     from src.handlers.operation import process_operation
-    await process_operation(update, context, user, message_text)
+    await process_operation(update, context, uow, message_text)
@@ -1,14 +1,33 @@
 from contextlib import asynccontextmanager
 import logging
+import hmac
 import sys
+import tempfile
+import time
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.request import BaseRequest
 
 from src.config import settings
+from src.database import close_async_supabase
 from src.services.scheduler import start_scheduler, shutdown_scheduler
 from src.handlers.router import route_message
-from src.handlers.daily_report import send_daily_reports
+from src.handlers.daily_report import resume_daily_reports, send_due_reports
+from src.services import cache, locks, metrics
+from src.services import telegram as telegram_service
+from src.services.audit import audit_log
+from src.services.cache import get_cache_stats
+from src.services.dedup import deduplicator, purge_processed_updates
+from src.services.importer import import_statement
+from src.services.ingestion import UpdateQueue
+from src.services.interactions import interaction_buffer
+from src.services.outbox import close_sender, get_sender
+from src.services.ledger import snapshot_daily_balances
+from src.services.receivables import sweep_overdue
+from src.services.retention import run_retention
+from src.services import supabase as supabase_service
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,11 +37,28 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 telegram_app: Application | None = None
+update_queue: UpdateQueue | None = None
+
+metrics.gauge("vigia_ingestion_queue_depth", "Updates aguardando processamento", lambda: update_queue.depth if update_queue else None)
+metrics.gauge("vigia_outbox_depth", "Mensagens aguardando envio ao Telegram", lambda: get_sender().depth)
+metrics.gauge("vigia_interactions_pending", "last_interaction_at aguardando gravação", lambda: interaction_buffer.pending)
+metrics.gauge("vigia_audit_pending", "Registros de auditoria aguardando gravação", lambda: audit_log.pending)
+metrics.gauge("vigia_audit_dropped", "Registros de auditoria descartados por falta de espaço", lambda: audit_log.dropped)
+metrics.gauge("vigia_cache_users_size", "Entradas no cache de usuários", lambda: cache.users.stats()["size"])
+metrics.gauge("vigia_cache_companies_size", "Entradas no cache de empresas", lambda: cache.companies.stats()["size"])
+
+
+def build_telegram_app(request: BaseRequest | None = None) -> Application:
+    application = Application.builder().bot(telegram_service.get_bot(request)).build()
+    application.add_handler(CommandHandler("start", route_message))
+    application.add_handler(MessageHandler(filters.TEXT, route_message))
+    application.add_handler(MessageHandler(filters.Document.ALL, route_message))
+    return application
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global telegram_app
+    global telegram_app, update_queue
     
     logger.info("Iniciando VigIA...")
     
@@ -30,26 +66,76 @@ async def lifespan(app: FastAPI):
     from apscheduler.triggers.cron import CronTrigger
     from src.services.scheduler import scheduler
     scheduler.add_job(
-        send_daily_reports,
-        CronTrigger(hour=7, minute=0),
+        metrics.instrument_job("daily_report", send_due_reports),
+        CronTrigger(minute=f"*/{settings.report_slot_minutes}", timezone="UTC"),
         id="daily_report",
+        misfire_grace_time=60,
         replace_existing=True
     )
-    logger.info("Scheduler configurado - relatório diário às 7h")
-    
-    telegram_app = Application.builder().token(settings.telegram_bot_token).build()
+    scheduler.add_job(
+        metrics.instrument_job("resume_daily_report", resume_daily_reports),
+        CronTrigger(minute="2-59/15", timezone="UTC"),
+        id="resume_daily_report",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        metrics.instrument_job("balance_snapshot", locks.run_exclusive("balance_snapshot", snapshot_daily_balances)),
+        CronTrigger(hour=23, minute=55),
+        id="balance_snapshot",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        metrics.instrument_job("receivables_sweep", locks.run_exclusive("receivables_sweep", sweep_overdue)),
+        CronTrigger(hour=0, minute=5, timezone=settings.report_default_timezone),
+        id="receivables_sweep",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        metrics.instrument_job("retention", locks.run_exclusive("retention", run_retention)),
+        CronTrigger(hour=3, minute=30),
+        id="retention",
+        replace_existing=True
+    )
+    if settings.dedup_persistent:
+        scheduler.add_job(
+            metrics.instrument_job("purge_processed_updates", locks.run_exclusive("purge_processed_updates", purge_processed_updates)),
+            CronTrigger(hour=3, minute=0),
+            id="purge_processed_updates",
+            replace_existing=True
+        )
+    logger.info(f"Scheduler configurado - relatório diário no horário local de cada empresa, em janelas de {settings.report_window_minutes} min")
     
-    telegram_app.add_handler(CommandHandler("start", route_message))
-    telegram_app.add_handler(MessageHandler(filters.TEXT, route_message))
+    telegram_app = build_telegram_app()
     
     await telegram_app.initialize()
     await telegram_app.start()
     logger.info("Telegram bot iniciado")
     
+    if settings.webhook_async_ingestion:
+        update_queue = UpdateQueue(
+            telegram_app.process_update,
+            workers=settings.ingestion_workers,
+            max_size=settings.ingestion_queue_size,
+            enqueue_timeout=settings.ingestion_enqueue_timeout_seconds,
+        )
+        update_queue.start()
+        logger.info(f"Ingestão assíncrona ativa com {settings.ingestion_workers} workers")
+    
+    get_sender().start()
+    interaction_buffer.start()
+    audit_log.start()
+    
     yield
     
+    if update_queue:
+        await update_queue.drain(timeout=settings.ingestion_drain_timeout_seconds)
+        update_queue = None
+    await close_sender(timeout=settings.ingestion_drain_timeout_seconds)
     await telegram_app.stop()
+    await interaction_buffer.stop()
+    await audit_log.stop()
     shutdown_scheduler()
+    await close_async_supabase()
     logger.info("VigIA encerrado")
 
 
@@ -61,22 +147,84 @@ async def health_check():
     return {"status": "healthy", "service": "vigia"}
 
 
+def _webhook_response(outcome: str, started: float, status_code: int = 200, content: str = "OK") -> Response:
+    metrics.webhook_seconds.observe(time.perf_counter() - started, outcome=outcome)
+    return Response(status_code=status_code, content=content)
+
+
 @app.post("/webhook")
 async def telegram_webhook(request: Request) -> Response:
     if not telegram_app:
         return Response(status_code=503, content="Bot não inicializado")
     
+    started = time.perf_counter()
     try:
         data = await request.json()
         update = Update.de_json(data, telegram_app.bot)
-        
-        if update:
-            await telegram_app.process_update(update)
-        
-        return Response(status_code=200, content="OK")
     except Exception as e:
-        logger.error(f"Erro no webhook: {e}")
-        return Response(status_code=500, content=str(e))
+        logger.error(f"Update inválido recebido no webhook: {e}")
+        return _webhook_response("invalid", started)
+    
+    if not update:
+        return _webhook_response("invalid", started)
+    
+    if await deduplicator.is_duplicate(update):
+        logger.info(f"Update {update.update_id} duplicado ignorado")
+        return _webhook_response("duplicate", started)
+    
+    if update_queue:
+        if not await update_queue.submit(update):
+            await deduplicator.release(update)
+            return _webhook_response("rejected", started, 503, "Fila cheia")
+        return _webhook_response("queued", started)
+    
+    try:
+        await telegram_app.process_update(update)
+    except Exception as e:
+        logger.error(f"Erro ao processar update {update.update_id}: {e}")
+        return _webhook_response("error", started)
+    return _webhook_response("processed", started)
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "cache": get_cache_stats(),
+        "interactions": interaction_buffer.stats(),
+        "audit": audit_log.stats(),
+        "ingestion": update_queue.stats() if update_queue else None,
+        "dedup": deduplicator.stats(),
+        "outbox": get_sender().stats(),
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/companies/{company_id}/entries/import")
+async def import_entries(company_id: str, request: Request, filename: str | None = None):
+    if not settings.import_api_token:
+        return JSONResponse(status_code=404, content={"detail": "Importação via API desabilitada"})
+    token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(token, settings.import_api_token):
+        return JSONResponse(status_code=401, content={"detail": "Token inválido"})
+    if await supabase_service.get_company_by_id(company_id) is None:
+        return JSONResponse(status_code=404, content={"detail": "Empresa não encontrada"})
+    
+    with tempfile.SpooledTemporaryFile(max_size=settings.import_spool_bytes) as buffer:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.import_max_bytes:
+                return JSONResponse(status_code=413, content={"detail": "Arquivo muito grande"})
+            buffer.write(chunk)
+        buffer.seek(0)
+        try:
+            return await import_statement(company_id, buffer, filename)
+        except ValueError as e:
+            return JSONResponse(status_code=422, content={"detail": str(e)})
 
 
 @app.get("/webhook-info")
@@ -84,5 +232,5 @@ async def webhook_info():
     return {
         "status": "ativo",
         "endpoint": "/webhook (POST)",
-        "scheduler": "relatório diário às 7h"
+        "scheduler": f"relatório diário no horário local de cada empresa, em janelas de {settings.report_window_minutes} min"
     }
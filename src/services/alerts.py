@@ -0,0 +1,110 @@
+import logging
+from datetime import date, timedelta
+from src.config import settings
+from src.services import supabase as supabase_service
+from src.services.cache import runway_states
+from src.services.report_metrics import get_company_metrics
+from src.utils.burn_rate import ALERT_LEVELS, calculate_daily_burn, calculate_runway, get_alert_level
+from src.utils.formatters import format_currency
+
+logger = logging.getLogger(__name__)
+
+REVENUE_WINDOW_DAYS = 7
+NORMAL_LEVEL = len(ALERT_LEVELS) - 1
+
+
+def assess(company: dict, cash_balance: float, revenue_7d: float) -> dict:
+    daily_burn = calculate_daily_burn(
+        company.get("fixed_cost_avg", 0) or 0,
+        revenue_7d / REVENUE_WINDOW_DAYS,
+        company.get("variable_cost_percent", 30) or 30,
+    )
+    days = int(calculate_runway(cash_balance, daily_burn))
+    return {
+        "days": days,
+        "level": ALERT_LEVELS.index(get_alert_level(days)),
+        "below_minimum": cash_balance < float(company.get("cash_minimum") or 0),
+    }
+
+
+def _apply(state: dict, entry: dict, direction: int, today: date) -> None:
+    amount = direction * float(entry["amount"])
+    state["entry_count"] += direction
+    if entry["type"] == "revenue":
+        state["cash_balance"] += amount
+        if entry["entry_date"] >= (today - timedelta(days=REVENUE_WINDOW_DAYS)).isoformat():
+            state["revenue_7d"] += amount
+    else:
+        state["cash_balance"] -= amount
+
+
+def _in_sync(state: dict, entry: dict, ledger: dict, today: date) -> bool:
+    expected = dict(state)
+    _apply(expected, entry, 1, today)
+    return expected["entry_count"] == ledger["entry_count"] and round(expected["cash_balance"], 2) == round(ledger["balance"], 2)
+
+
+async def _load_state(company: dict, entry: dict, today: date) -> dict:
+    ledger = await supabase_service.get_company_ledger(company["id"])
+    state = runway_states.get(company["id"])
+    if state is not None and state["day"] == today.isoformat() and _in_sync(state, entry, ledger, today):
+        return state
+    metrics = await get_company_metrics(company["id"], today)
+    state = {
+        "day": today.isoformat(),
+        "cash_balance": metrics["cash_balance"],
+        "revenue_7d": metrics["avg_revenue"] * REVENUE_WINDOW_DAYS,
+        "entry_count": ledger["entry_count"],
+    }
+    _apply(state, entry, -1, today)
+    state.update(assess(company, state["cash_balance"], state["revenue_7d"]))
+    return state
+
+
+def _runway_message(level: int, days: int) -> str:
+    emoji, name = ALERT_LEVELS[level]
+    if level == 0:
+        return f"{emoji} Alerta {name}: com o último lançamento seu caixa cobre só {days} dias. Reveja as despesas."
+    return f"{emoji} {name.capitalize()}: seu caixa agora cobre {days} dias."
+
+
+async def evaluate_entry(company: dict, entry: dict) -> list[dict]:
+    if not settings.alerts_enabled:
+        return []
+    today = date.today()
+    state = await _load_state(company, entry, today)
+    previous = {"level": state["level"], "below_minimum": state["below_minimum"]}
+    _apply(state, entry, 1, today)
+    state.update(assess(company, state["cash_balance"], state["revenue_7d"]))
+    runway_states.set(company["id"], state)
+
+    raised = []
+    data = {"days": state["days"], "cash_balance": round(state["cash_balance"], 2)}
+    if state["level"] != previous["level"]:
+        if state["level"] == NORMAL_LEVEL:
+            await supabase_service.resolve_alerts(company["id"], "runway")
+        else:
+            alert = await supabase_service.raise_alert(
+                company["id"], "runway", ALERT_LEVELS[state["level"]][1], _runway_message(state["level"], state["days"]), data,
+            )
+            if alert:
+                raised.append(alert)
+    if state["below_minimum"] != previous["below_minimum"]:
+        if not state["below_minimum"]:
+            await supabase_service.resolve_alerts(company["id"], "cash_minimum")
+        else:
+            minimum = float(company.get("cash_minimum") or 0)
+            alert = await supabase_service.raise_alert(
+                company["id"], "cash_minimum", ALERT_LEVELS[1][1],
+                f"⚠️ Seu caixa ({format_currency(state['cash_balance'])}) ficou abaixo do mínimo de {format_currency(minimum)}.",
+                data,
+            )
+            if alert:
+                raised.append(alert)
+    if raised:
+        logger.info(f"{len(raised)} alerta(s) gerado(s) para a empresa {company['id']}")
+    return raised
+
+
+def invalidate(company_id: str) -> None:
+    runway_states.invalidate(company_id)
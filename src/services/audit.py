@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from src.config import settings
+from src.services import cache
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float, max_retries: int = 3) -> None:
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+        self._retries = 0
+        self.last_flush_seconds = 0.0
+        self._buffer: deque[dict] = deque(maxlen=capacity)
+        self._task: asyncio.Task | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def record(self, row: dict) -> None:
+        if not settings.audit_enabled:
+            return
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append(row)
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def record_inbound(self, user: dict, chat_id: int, text: str | None, message_id: int | None, kind: str = "text", **payload) -> None:
+        self.record({
+            "company_id": user.get("company_id"),
+            "user_id": user.get("id"),
+            "direction": "in",
+            "message_text": _truncate(text),
+            "telegram_message_id": message_id,
+            "payload": {"chat_id": chat_id, "kind": kind, **payload},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    def record_outbound(self, chat_id: int, text: str | None, message_id: int | None, kind: str = "send") -> None:
+        user = cache.users.peek(("chat_id", chat_id)) or {}
+        self.record({
+            "company_id": user.get("company_id"),
+            "user_id": user.get("id"),
+            "direction": "out",
+            "message_text": _truncate(text),
+            "telegram_message_id": message_id,
+            "payload": {"chat_id": chat_id, "kind": kind},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def flush(self) -> int:
+        async with self._lock:
+            written = 0
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                started = time.perf_counter()
+                try:
+                    if self._retries >= self.max_retries:
+                        written += await self._write_isolating(batch)
+                    else:
+                        await supabase_service.log_messages(batch)
+                        written += len(batch)
+                    self._retries = 0
+                except Exception as e:
+                    self.failed_flushes += 1
+                    self._retries += 1
+                    logger.error(f"Erro ao gravar {len(batch)} registro(s) de auditoria: {e}")
+                    room = self.capacity - len(self._buffer)
+                    self.dropped += max(0, len(batch) - room)
+                    self._buffer.extendleft(reversed(batch[:room]))
+                    break
+                finally:
+                    self.last_flush_seconds = time.perf_counter() - started
+            self.flushed += written
+            return written
+
+    async def _write_isolating(self, batch: list[dict]) -> int:
+        try:
+            await supabase_service.log_messages(batch)
+            return len(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self.rejected += 1
+                logger.error(f"Registro de auditoria descartado após {self.max_retries} tentativa(s): {e}")
+                return 0
+        middle = len(batch) // 2
+        return await self._write_isolating(batch[:middle]) + await self._write_isolating(batch[middle:])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self.recorded = self.flushed = self.dropped = self.rejected = self.failed_flushes = self._retries = 0
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": round(self.last_flush_seconds, 4),
+        }
+
+
+def _truncate(text: str | None) -> str | None:
+    if text is None:
+        return None
+    return text[:settings.audit_text_max_length]
+
+
+audit_log = AuditLog(settings.audit_buffer_size, settings.audit_batch_size, settings.audit_flush_seconds, settings.audit_max_retries)
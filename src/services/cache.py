@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from src.config import settings
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[object, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: object) -> object | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: object) -> object | None:
+        item = self._data.get(key)
+        return item[1] if item else None
+
+    def set(self, key: object, value: object) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: object) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+users = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+companies = TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+runway_states = TTLCache(settings.cache_max_entries, settings.alert_state_ttl_seconds)
+
+
+def cache_user(user: dict) -> None:
+    users.set(("chat_id", user["chat_id"]), user)
+    users.set(("id", user["id"]), user)
+
+
+def invalidate_user(user_id: str) -> None:
+    cached = users.peek(("id", user_id))
+    if cached is not None:
+        users.invalidate(("chat_id", cached["chat_id"]))
+    users.invalidate(("id", user_id))
+
+
+def get_cache_stats() -> dict:
+    return {"users": users.stats(), "companies": companies.stats(), "runway_states": runway_states.stats()}
+
+
+def clear_caches() -> None:
+    users.clear()
+    companies.clear()
+    runway_states.clear()
@@ -0,0 +1,74 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from telegram import Update
+from src.config import settings
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    def __init__(self, window: int, persistent: bool = False) -> None:
+        self.window = window
+        self.persistent = persistent
+        self.duplicates = 0
+        self._seen: OrderedDict[tuple, None] = OrderedDict()
+
+    @staticmethod
+    def _keys(update: Update) -> list[tuple]:
+        keys = [("update", update.update_id)]
+        message = update.effective_message
+        if message and update.effective_chat:
+            keys.append(("message", update.effective_chat.id, message.message_id))
+        return keys
+
+    def _remember(self, keys: list[tuple]) -> None:
+        for key in keys:
+            self._seen[key] = None
+        while len(self._seen) > self.window:
+            self._seen.popitem(last=False)
+
+    async def is_duplicate(self, update: Update) -> bool:
+        keys = self._keys(update)
+        if any(key in self._seen for key in keys):
+            self.duplicates += 1
+            return True
+        self._remember(keys)
+
+        if self.persistent:
+            chat_id = update.effective_chat.id if update.effective_chat else None
+            message_id = update.effective_message.message_id if update.effective_message else None
+            try:
+                claimed = await supabase_service.claim_update(update.update_id, chat_id, message_id)
+            except Exception as e:
+                logger.error(f"Erro ao registrar update {update.update_id}, seguindo sem dedup persistente: {e}")
+                return False
+            if not claimed:
+                self.duplicates += 1
+                return True
+        return False
+
+    async def release(self, update: Update) -> None:
+        for key in self._keys(update):
+            self._seen.pop(key, None)
+        if self.persistent:
+            try:
+                await supabase_service.release_update(update.update_id)
+            except Exception as e:
+                logger.error(f"Erro ao liberar update {update.update_id} recusado: {e}")
+
+    def clear(self) -> None:
+        self._seen.clear()
+        self.duplicates = 0
+
+    def stats(self) -> dict:
+        return {"window": len(self._seen), "duplicates": self.duplicates}
+
+
+deduplicator = UpdateDeduplicator(settings.dedup_window, persistent=settings.dedup_persistent)
+
+
+async def purge_processed_updates() -> int:
+    before = datetime.now(timezone.utc) - timedelta(hours=settings.dedup_retention_hours)
+    return await supabase_service.purge_processed_updates(before.isoformat())
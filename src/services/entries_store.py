@@ -0,0 +1,51 @@
+from datetime import date
+from typing import Iterable
+import numpy as np
+
+REVENUE = 0
+EXPENSE = 1
+
+
+def day_number(day: date) -> int:
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+class EntriesStore:
+    def __init__(
+        self,
+        company_ids: list[str],
+        company_idx: np.ndarray,
+        day: np.ndarray,
+        amount: np.ndarray,
+        type_code: np.ndarray,
+    ) -> None:
+        self.company_ids = company_ids
+        self.company_idx = company_idx
+        self.day = day
+        self.amount = amount
+        self.type_code = type_code
+        self._positions = {company_id: i for i, company_id in enumerate(company_ids)}
+
+    @classmethod
+    def from_rollups(cls, rows: list[dict], company_ids: Iterable[str] = ()) -> "EntriesStore":
+        positions = {company_id: i for i, company_id in enumerate(company_ids)}
+        company_idx = np.fromiter(
+            (positions.setdefault(r["company_id"], len(positions)) for r in rows), dtype=np.int32, count=len(rows)
+        )
+        day = np.array([r["day"] for r in rows], dtype="datetime64[D]").astype(np.int32)
+        revenue = np.fromiter((float(r["revenue_total"]) for r in rows), dtype=np.float64, count=len(rows))
+        expense = np.fromiter((float(r["expense_total"]) for r in rows), dtype=np.float64, count=len(rows))
+        return cls(
+            list(positions),
+            np.concatenate([company_idx, company_idx]),
+            np.concatenate([day, day]),
+            np.concatenate([revenue, -expense]),
+            np.repeat(np.array([REVENUE, EXPENSE], dtype=np.int8), len(rows)),
+        )
+
+    @property
+    def company_count(self) -> int:
+        return len(self.company_ids)
+
+    def positions(self, company_ids: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self._positions.get(c, -1) for c in company_ids), dtype=np.int64)
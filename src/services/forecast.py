@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+from datetime import date, timedelta
+import numpy as np
+from src.config import settings
+from src.services import supabase as supabase_service
+from src.services.entries_store import REVENUE, EntriesStore, day_number
+
+def weekday_revenue_profile(store: EntriesStore, as_of: date, lookback_days: int) -> np.ndarray:
+    today = day_number(as_of)
+    days = np.arange(today - lookback_days, today)
+    occurrences = np.bincount((days + 3) % 7, minlength=7)
+    mask = (store.type_code == REVENUE) & (store.day >= today - lookback_days) & (store.day < today)
+    slots = store.company_idx[mask].astype(np.int64) * 7 + (store.day[mask] + 3) % 7
+    totals = np.bincount(slots, weights=store.amount[mask], minlength=store.company_count * 7)
+    return totals.reshape(store.company_count, 7) / np.maximum(occurrences, 1)
+
+
+def receivables_schedule(
+    receivables: list[dict],
+    positions: dict[str, int],
+    companies: int,
+    as_of: date,
+    horizon: int,
+) -> np.ndarray:
+    schedule = np.zeros((companies, horizon))
+    if not receivables:
+        return schedule
+    today = day_number(as_of)
+    rows = np.fromiter((positions.get(r["company_id"], -1) for r in receivables), dtype=np.int64, count=len(receivables))
+    offsets = np.array([r["due_date"] for r in receivables], dtype="datetime64[D]").astype(np.int64) - today - 1
+    amounts = np.array([r["amount"] for r in receivables], dtype=np.float64)
+    pending = np.fromiter((r.get("status") == "pending" for r in receivables), dtype=bool, count=len(receivables))
+    keep = pending & (rows >= 0) & (offsets < horizon)
+    np.add.at(schedule, (rows[keep], np.maximum(offsets[keep], 0)), amounts[keep])
+    return schedule
+
+
+def _first_crossing(curve: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+    below = curve < threshold[:, None]
+    return np.where(below.any(axis=1), below.argmax(axis=1) + 1, -1)
+
+
+def project_cash(
+    cash: np.ndarray,
+    weekday_revenue: np.ndarray,
+    receivables: np.ndarray,
+    fixed_cost_avg: np.ndarray,
+    variable_cost_percent: np.ndarray,
+    cash_minimum: np.ndarray,
+    as_of: date,
+) -> dict[str, np.ndarray]:
+    horizon = receivables.shape[1]
+    weekdays = (day_number(as_of) + 1 + np.arange(horizon) + 3) % 7
+    revenue = weekday_revenue[:, weekdays]
+    net = revenue * (1 - variable_cost_percent[:, None] / 100) - fixed_cost_avg[:, None] / 30 + receivables
+    curve = cash[:, None] + np.cumsum(net, axis=1)
+    return {
+        "curve": curve,
+        "days_to_minimum": _first_crossing(curve, cash_minimum),
+        "days_to_zero": _first_crossing(curve, np.zeros(len(cash))),
+        "lowest_balance": curve.min(axis=1) if horizon else cash.copy(),
+    }
+
+
+def forecast_portfolio(
+    companies: list[dict],
+    store: EntriesStore,
+    balances: dict[str, float],
+    receivables: list[dict],
+    as_of: date,
+    horizon: int,
+    lookback_days: int,
+) -> dict[str, np.ndarray]:
+    positions = store.positions(c["id"] for c in companies)
+    profile = weekday_revenue_profile(store, as_of, lookback_days)
+    weekday_revenue = np.where(positions[:, None] >= 0, profile[np.maximum(positions, 0)], 0.0) if len(profile) else np.zeros((len(companies), 7))
+
+    def column(key: str, default: float) -> np.ndarray:
+        return np.fromiter((float(c.get(key) or default) for c in companies), dtype=np.float64, count=len(companies))
+
+    return project_cash(
+        cash=np.fromiter((balances.get(c["id"], 0.0) for c in companies), dtype=np.float64, count=len(companies)),
+        weekday_revenue=weekday_revenue,
+        receivables=receivables_schedule(receivables, {c["id"]: i for i, c in enumerate(companies)}, len(companies), as_of, horizon),
+        fixed_cost_avg=column("fixed_cost_avg", 0),
+        variable_cost_percent=column("variable_cost_percent", 30),
+        cash_minimum=column("cash_minimum", 0),
+        as_of=as_of,
+    )
+
+
+def _crossing_date(as_of: date, days: int) -> str | None:
+    return (as_of + timedelta(days=days)).isoformat() if days > 0 else None
+
+
+def forecast_rows(companies: list[dict], forecast: dict[str, np.ndarray], as_of: date) -> dict[str, dict]:
+    rows = {}
+    for i, company in enumerate(companies):
+        days_to_minimum = int(forecast["days_to_minimum"][i])
+        days_to_zero = int(forecast["days_to_zero"][i])
+        rows[company["id"]] = {
+            "as_of": as_of.isoformat(),
+            "days_to_minimum": days_to_minimum if days_to_minimum > 0 else None,
+            "days_to_zero": days_to_zero if days_to_zero > 0 else None,
+            "date_below_minimum": _crossing_date(as_of, days_to_minimum),
+            "date_below_zero": _crossing_date(as_of, days_to_zero),
+            "lowest_balance": round(float(forecast["lowest_balance"][i]), 2),
+            "curve": np.round(forecast["curve"][i], 2).tolist(),
+        }
+    return rows
+
+
+async def forecast_all(as_of: date | None = None, horizon: int | None = None) -> dict[str, dict]:
+    as_of = as_of or date.today()
+    lookback_days = settings.forecast_lookback_days
+    companies, rollups, balances, receivables = await asyncio.gather(
+        supabase_service.get_all_active_companies(),
+        supabase_service.get_all_daily_rollups(since=(as_of - timedelta(days=lookback_days)).isoformat()),
+        supabase_service.get_all_company_balances(),
+        supabase_service.get_all_receivables_pending(),
+    )
+    store = EntriesStore.from_rollups(rollups, (c["id"] for c in companies))
+    forecast = forecast_portfolio(companies, store, balances, receivables, as_of, horizon or settings.forecast_horizon_days, lookback_days)
+    return forecast_rows(companies, forecast, as_of)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Projeta o caixa de todas as empresas ativas")
+    parser.add_argument("--horizon", type=int, help="dias de projeção")
+    args = parser.parse_args()
+
+    rows = asyncio.run(forecast_all(horizon=args.horizon))
+    for company_id, row in rows.items():
+        print(f"{company_id}: abaixo do mínimo em {row['date_below_minimum'] or '-'}, zera em {row['date_below_zero'] or '-'}")
+    print(f"{len(rows)} empresa(s) projetada(s)")
+
+
+if __name__ == "__main__":
+    main()
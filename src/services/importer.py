@@ -0,0 +1,270 @@
+import codecs
+import csv
+import hashlib
+import io
+import logging
+import math
+import re
+import time
+import unicodedata
+from datetime import date, datetime
+from typing import IO, Awaitable, Callable, Iterable, Iterator
+from src.config import settings
+from src.services import alerts
+from src.services import supabase as supabase_service
+from src.utils.formatters import parse_number
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 5
+DESCRIPTION_MAX_LENGTH = 200
+MAX_AMOUNT = 10_000_000_000
+CSV_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y")
+CSV_COLUMNS = {
+    "date": ("data", "date", "dt", "data lancamento", "data do lancamento", "data movimento"),
+    "amount": ("valor", "amount", "value", "valor (r$)", "valor r$", "quantia"),
+    "description": ("descricao", "description", "historico", "memo", "lancamento", "detalhe"),
+    "type": ("tipo", "type", "natureza"),
+}
+ENTRY_TYPES = {
+    "receita": "revenue", "revenue": "revenue", "credito": "revenue", "c": "revenue", "entrada": "revenue",
+    "despesa": "expense", "expense": "expense", "debito": "expense", "d": "expense", "saida": "expense",
+}
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+_DOT_DECIMAL = re.compile(r"^[+-]?\d+\.\d{1,2}$")
+
+ProgressCallback = Callable[[dict], Awaitable[None]]
+
+
+def _normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.strip().lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def detect_encoding(head: bytes) -> str:
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def detect_format(filename: str | None, head: bytes) -> str:
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("ofx", "qfx"):
+        return "ofx"
+    if extension in ("csv", "txt"):
+        return "csv"
+    upper = head.upper()
+    return "ofx" if b"<OFX>" in upper or b"OFXHEADER" in upper else "csv"
+
+
+def open_statement(binary: IO[bytes], filename: str | None = None) -> tuple[io.TextIOWrapper, str]:
+    head = binary.read(64 * 1024)
+    binary.seek(0)
+    text = io.TextIOWrapper(binary, encoding=detect_encoding(head), errors="replace", newline="")
+    return text, detect_format(filename, head)
+
+
+def parse_amount(value: str) -> float | None:
+    cleaned = value.strip()
+    negative = cleaned.startswith("(") and cleaned.endswith(")")
+    cleaned = cleaned.strip("()")
+    if cleaned[-1:].upper() in ("D", "C") and not cleaned[-2:-1].isalpha():
+        negative = negative or cleaned[-1].upper() == "D"
+        cleaned = cleaned[:-1]
+    cleaned = cleaned.replace(" ", "")
+    if "," in cleaned and "." in cleaned:
+        thousands, decimal = (".", ",") if cleaned.rfind(",") > cleaned.rfind(".") else (",", ".")
+        try:
+            amount = float(cleaned.replace("R$", "").replace(thousands, "").replace(decimal, "."))
+        except ValueError:
+            return None
+    elif _DOT_DECIMAL.match(cleaned):
+        amount = float(cleaned)
+    else:
+        valid, amount, _ = parse_number(cleaned)
+        if not valid:
+            return None
+    if not math.isfinite(amount):
+        return None
+    return -abs(amount) if negative else amount
+
+
+def parse_date(value: str) -> date | None:
+    value = value.strip()[:10]
+    for fmt in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def import_key(entry_date: str, amount: float, entry_type: str, description: str) -> str:
+    signed = amount if entry_type == "revenue" else -amount
+    raw = f"{entry_date}|{signed:.2f}|{' '.join(description.lower().split())}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _row(line: int, entry_date: date | None, amount: float | None, description: str, entry_type: str | None = None) -> dict:
+    if entry_date is None:
+        return {"line": line, "error": "data inválida"}
+    if entry_date > date.today():
+        return {"line": line, "error": "data no futuro"}
+    if amount is None:
+        return {"line": line, "error": "valor inválido"}
+    rounded = round(abs(amount), 2)
+    if rounded == 0:
+        return {"line": line, "error": "valor zerado"}
+    if rounded >= MAX_AMOUNT:
+        return {"line": line, "error": "valor inválido"}
+    if entry_type is None:
+        entry_type = "revenue" if amount > 0 else "expense"
+    return {
+        "line": line,
+        "entry_date": entry_date.isoformat(),
+        "amount": rounded,
+        "type": entry_type,
+        "description": " ".join(description.split())[:DESCRIPTION_MAX_LENGTH],
+    }
+
+
+def _csv_columns(header: list[str]) -> dict[str, int]:
+    columns = {}
+    for position, name in enumerate(header):
+        normalized = _normalize(name)
+        for column, aliases in CSV_COLUMNS.items():
+            if column not in columns and normalized in aliases:
+                columns[column] = position
+    return columns
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[dict]:
+    lines = iter(lines)
+    skipped = 0
+    header_line = None
+    for header_line in lines:
+        skipped += 1
+        if header_line.strip():
+            break
+    if header_line is None or not header_line.strip():
+        raise ValueError("Arquivo vazio")
+
+    delimiter = max(";,\t", key=header_line.count)
+    columns = _csv_columns(next(csv.reader([header_line], delimiter=delimiter)))
+    if "date" not in columns or "amount" not in columns:
+        raise ValueError("O CSV precisa das colunas data e valor")
+
+    reader = csv.reader(lines, delimiter=delimiter)
+    for fields in reader:
+        line = skipped + reader.line_num
+        if not any(f.strip() for f in fields):
+            continue
+        if len(fields) <= max(columns.values()):
+            yield {"line": line, "error": "colunas faltando"}
+            continue
+        entry_type = None
+        if "type" in columns:
+            entry_type = ENTRY_TYPES.get(_normalize(fields[columns["type"]]))
+            if entry_type is None:
+                yield {"line": line, "error": "tipo inválido"}
+                continue
+        description = fields[columns["description"]] if "description" in columns else ""
+        yield _row(line, parse_date(fields[columns["date"]]), parse_amount(fields[columns["amount"]]), description, entry_type)
+
+
+def _ofx_row(transaction: dict) -> dict:
+    try:
+        entry_date = datetime.strptime(transaction.get("DTPOSTED", "")[:8], "%Y%m%d").date()
+    except ValueError:
+        entry_date = None
+    try:
+        amount = float(transaction.get("TRNAMT", "").replace(",", "."))
+    except ValueError:
+        amount = None
+    description = transaction.get("MEMO") or transaction.get("NAME") or ""
+    return _row(transaction["line"], entry_date, amount, description)
+
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[dict]:
+    transaction = None
+    for line_number, line in enumerate(lines, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if transaction is not None:
+                    yield _ofx_row(transaction)
+                transaction = None if closing else {"line": line_number}
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+    if transaction is not None:
+        yield _ofx_row(transaction)
+
+
+async def import_statement(
+    company_id: str,
+    binary: IO[bytes],
+    filename: str | None = None,
+    user_id: str | None = None,
+    on_progress: ProgressCallback | None = None,
+    chunk_size: int | None = None,
+) -> dict:
+    chunk_size = chunk_size or settings.import_chunk_size
+    started = time.perf_counter()
+    text, fmt = open_statement(binary, filename)
+    parser = parse_ofx if fmt == "ofx" else parse_csv
+    summary = {"format": fmt, "rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "errors": [], "seconds": 0.0}
+    seen: set[bytes] = set()
+    chunk: list[dict] = []
+
+    async def flush() -> None:
+        inserted = await supabase_service.import_entries(chunk)
+        summary["imported"] += inserted
+        summary["duplicates"] += len(chunk) - inserted
+        chunk.clear()
+        if on_progress:
+            await on_progress(summary)
+
+    try:
+        for row in parser(text):
+            summary["rows"] += 1
+            if "error" in row:
+                summary["invalid"] += 1
+                if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                    summary["errors"].append(f"linha {row['line']}: {row['error']}")
+                continue
+            key = import_key(row["entry_date"], row["amount"], row["type"], row["description"])
+            digest = bytes.fromhex(key)
+            if digest in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(digest)
+            chunk.append({
+                "company_id": company_id,
+                "user_id": user_id,
+                "entry_date": row["entry_date"],
+                "amount": row["amount"],
+                "type": row["type"],
+                "source": "import",
+                "description": row["description"] or None,
+                "import_key": key,
+            })
+            if len(chunk) >= chunk_size:
+                await flush()
+
+        if chunk:
+            await flush()
+    finally:
+        text.detach()
+        if summary["imported"]:
+            alerts.invalidate(company_id)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Importação {fmt} da empresa {company_id}: {summary['imported']} lançamento(s), "
+        f"{summary['duplicates']} duplicado(s), {summary['invalid']} inválido(s) em {summary['seconds']}s"
+    )
+    return summary
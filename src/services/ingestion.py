@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateQueue:
+    def __init__(
+        self,
+        process: Callable[[Update], Awaitable[None]],
+        workers: int,
+        max_size: int,
+        enqueue_timeout: float,
+    ) -> None:
+        self.process = process
+        self.enqueue_timeout = enqueue_timeout
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        shard_size = max(1, max_size // workers)
+        self._shards: list[asyncio.Queue[Update]] = [asyncio.Queue(maxsize=shard_size) for _ in range(workers)]
+        self._tasks: list[asyncio.Task] = []
+        self._accepting = False
+
+    @property
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._shards)
+
+    def _shard_for(self, update: Update) -> asyncio.Queue[Update]:
+        key = update.effective_chat.id if update.effective_chat else update.update_id
+        return self._shards[hash(key) % len(self._shards)]
+
+    async def submit(self, update: Update) -> bool:
+        if not self._accepting:
+            self.rejected += 1
+            return False
+        try:
+            await asyncio.wait_for(self._shard_for(update).put(update), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"Fila de updates cheia, update {update.update_id} recusado")
+            return False
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        return True
+
+    async def _worker(self, queue: asyncio.Queue[Update]) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self.process(update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Erro ao processar update {update.update_id}: {e}")
+            finally:
+                queue.task_done()
+
+    def start(self) -> None:
+        self._accepting = True
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(q)) for q in self._shards]
+
+    async def drain(self, timeout: float | None = None) -> None:
+        self._accepting = False
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._shards)), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Encerrando com {self.depth} update(s) não processados")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "workers": len(self._shards),
+        }
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from src.config import settings
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionBuffer:
+    def __init__(self, flush_interval: float, max_pending: int) -> None:
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+        self._pending: dict[str, str] = {}
+        self._task: asyncio.Task | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, user_id: str) -> None:
+        self._pending[user_id] = datetime.now(timezone.utc).isoformat()
+        if len(self._pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            started = time.perf_counter()
+            try:
+                await supabase_service.touch_users([
+                    {"id": user_id, "seen_at": seen_at} for user_id, seen_at in batch.items()
+                ])
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Erro ao gravar last_interaction_at de {len(batch)} usuário(s): {e}")
+                for user_id, seen_at in batch.items():
+                    self._pending.setdefault(user_id, seen_at)
+                return 0
+            finally:
+                self.last_flush_seconds = time.perf_counter() - started
+            self.flushed += len(batch)
+            return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": round(self.last_flush_seconds, 4),
+        }
+
+
+interaction_buffer = InteractionBuffer(settings.interaction_flush_seconds, settings.interaction_flush_max_users)
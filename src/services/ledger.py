@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+
+def signed_amount(entry: dict) -> float:
+    amount = float(entry["amount"])
+    return amount if entry["type"] == "revenue" else -amount
+
+
+async def snapshot_daily_balances(snapshot_date: date | None = None) -> int:
+    day = (snapshot_date or date.today()).isoformat()
+    count = await supabase_service.take_balance_snapshots(day)
+    logger.info(f"Snapshot de saldos {day}: {count} empresas")
+    return count
+
+
+async def reconcile_balances(fix: bool = False, tolerance: float = 0.005) -> list[dict]:
+    entries, ledger, compacted = await asyncio.gather(
+        supabase_service.get_all_entry_amounts(),
+        supabase_service.get_all_company_balances(),
+        supabase_service.get_compacted_balances(),
+    )
+
+    expected: dict[str, float] = defaultdict(float)
+    counts: dict[str, int] = defaultdict(int)
+    for c in compacted:
+        expected[c["company_id"]] += float(c["balance"])
+        counts[c["company_id"]] += int(c["entry_count"])
+    for e in entries:
+        expected[e["company_id"]] += signed_amount(e)
+        counts[e["company_id"]] += 1
+
+    mismatches = []
+    for company_id in expected.keys() | ledger.keys():
+        actual = ledger.get(company_id, 0.0)
+        if abs(expected[company_id] - actual) > tolerance:
+            mismatches.append({
+                "company_id": company_id,
+                "expected": round(expected[company_id], 2),
+                "actual": round(actual, 2),
+            })
+
+    if mismatches:
+        logger.warning(f"Saldo divergente em {len(mismatches)} empresa(s)")
+    if fix and mismatches:
+        await supabase_service.upsert_company_balances([
+            {
+                "company_id": m["company_id"],
+                "balance": m["expected"],
+                "entry_count": counts[m["company_id"]],
+            }
+            for m in mismatches
+        ])
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalcula e confere vigia_company_balances a partir de vigia_entries")
+    parser.add_argument("--fix", action="store_true", help="corrige os saldos divergentes")
+    args = parser.parse_args()
+
+    mismatches = asyncio.run(reconcile_balances(fix=args.fix))
+    for m in mismatches:
+        print(f"{m['company_id']}: esperado {m['expected']:.2f}, ledger {m['actual']:.2f}")
+    print(f"{len(mismatches)} divergência(s){' corrigida(s)' if args.fix and mismatches else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+import zlib
+from datetime import date
+from functools import wraps
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, TypeVar
+from src.config import settings
+from src.services import supabase as supabase_service
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+EXCLUSIVE_LEASE_SECONDS = 24 * 60 * 60
+
+_held: set[tuple[str, int]] = set()
+
+
+def shard_of(key: str, shards: int) -> int:
+    return zlib.crc32(key.encode()) % shards
+
+
+def shard_range(shard: int, shards: int) -> tuple[str | None, str | None]:
+    def bound(k: int) -> str | None:
+        return None if k in (0, shards) else str(uuid.UUID(int=(k << 128) // shards))
+    return bound(shard), bound(shard + 1)
+
+
+class PostgresLeaseBackend:
+    async def acquire(self, name: str, shard: int, owner: str, ttl: int) -> bool:
+        return await supabase_service.acquire_lease(name, shard, owner, ttl)
+
+    async def release(self, name: str, shard: int, owner: str) -> None:
+        await supabase_service.release_lease(name, shard, owner)
+
+
+class FileLeaseBackend:
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, name: str, shard: int) -> Path:
+        return self.directory / f"{name.replace('/', '_').replace(':', '_')}.{shard}.lease"
+
+    def _update(self, name: str, shard: int, owner: str, expires_at: float | None) -> bool:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(name, shard), "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            handle.seek(0)
+            try:
+                current = json.loads(handle.read() or "{}")
+            except ValueError:
+                current = {}
+            held_by_other = current.get("owner") not in (None, owner) and current.get("expires_at", 0) > time.time()
+            if held_by_other or (expires_at is None and current.get("owner") != owner):
+                return False
+            handle.seek(0)
+            handle.truncate()
+            json.dump({"owner": owner if expires_at else None, "expires_at": expires_at or 0}, handle)
+            return True
+
+    async def acquire(self, name: str, shard: int, owner: str, ttl: int) -> bool:
+        return await asyncio.to_thread(self._update, name, shard, owner, time.time() + ttl)
+
+    async def release(self, name: str, shard: int, owner: str) -> None:
+        await asyncio.to_thread(self._update, name, shard, owner, None)
+
+
+_backend: PostgresLeaseBackend | FileLeaseBackend | None = None
+
+
+def get_lease_backend() -> PostgresLeaseBackend | FileLeaseBackend:
+    global _backend
+    if _backend is None:
+        if settings.scheduler_lock_backend == "file":
+            _backend = FileLeaseBackend(settings.scheduler_lock_dir)
+        else:
+            _backend = PostgresLeaseBackend()
+    return _backend
+
+
+async def acquire(name: str, shard: int = 0, ttl: int | None = None, owner: str | None = None) -> bool:
+    acquired = await get_lease_backend().acquire(name, shard, owner or NODE_ID, ttl or settings.scheduler_lease_seconds)
+    if not acquired:
+        logger.info(f"Lease {name}#{shard} pertence a outro nó")
+    return acquired
+
+
+async def release(name: str, shard: int = 0, owner: str | None = None) -> None:
+    await get_lease_backend().release(name, shard, owner or NODE_ID)
+
+
+async def _heartbeat(name: str, shard: int, owner: str) -> None:
+    interval = max(1.0, settings.scheduler_lease_seconds / 3)
+    while True:
+        await asyncio.sleep(interval)
+        if not await acquire(name, shard, owner=owner):
+            logger.warning(f"Lease {name}#{shard} perdida durante a execução")
+
+
+async def run_sharded(
+    name: str,
+    shards: int,
+    handle: Callable[[int], Awaitable[None]],
+    concurrency: int = 1,
+    owner: str | None = None,
+    skip: Iterable[int] = (),
+) -> tuple[list[int], list[int]]:
+    owner = owner or NODE_ID
+    start = shard_of(owner, shards)
+    skipped = set(skip)
+    order = iter([s for s in ((start + offset) % shards for offset in range(shards)) if s not in skipped])
+    done: list[int] = []
+    failed: list[int] = []
+
+    async def worker() -> None:
+        for shard in order:
+            if (name, shard) in _held or not await acquire(name, shard, owner=owner):
+                continue
+            _held.add((name, shard))
+            heartbeat = asyncio.create_task(_heartbeat(name, shard, owner))
+            try:
+                await handle(shard)
+                done.append(shard)
+            except Exception as e:
+                failed.append(shard)
+                logger.error(f"Erro no shard {shard} de {name}: {e}")
+                await release(name, shard, owner)
+            finally:
+                heartbeat.cancel()
+                _held.discard((name, shard))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, shards)))))
+    return done, failed
+
+
+def run_key(job: str, day: date | None = None) -> str:
+    return f"{job}:{(day or date.today()).isoformat()}"
+
+
+def run_exclusive(job: str, fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T | None]]:
+    @wraps(fn)
+    async def wrapper(*args, **kwargs) -> T | None:
+        name = run_key(job)
+        if not await acquire(name, ttl=EXCLUSIVE_LEASE_SECONDS):
+            return None
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            await release(name)
+            raise
+    return wrapper
@@ -0,0 +1,192 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Awaitable, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0, 1800.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+    def reset(self) -> None:
+        self._values.clear()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labels))
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(round(total, 6))}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+    def reset(self) -> None:
+        self._series.clear()
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, read: Callable[[], float | None]) -> None:
+        self.name = name
+        self.description = description
+        self.read = read
+
+    def samples(self) -> Iterator[str]:
+        value = self.read()
+        if value is not None:
+            yield f"{self.name} {_format_value(value)}"
+
+    def reset(self) -> None:
+        pass
+
+
+_registry: list[Counter | Histogram | Gauge] = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def counter(name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+    return _register(Counter(name, description, labels))
+
+
+def histogram(
+    name: str,
+    description: str,
+    labels: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _register(Histogram(name, description, labels, buckets))
+
+
+def gauge(name: str, description: str, read: Callable[[], float | None]) -> Gauge:
+    return _register(Gauge(name, description, read))
+
+
+webhook_seconds = histogram("vigia_webhook_seconds", "Tempo de resposta do /webhook", ("outcome",))
+routed_messages = counter("vigia_routed_messages_total", "Mensagens roteadas por estado do usuário", ("state",))
+db_seconds = histogram("vigia_db_seconds", "Latência das chamadas ao Supabase", ("table", "operation"))
+db_errors = counter("vigia_db_errors_total", "Chamadas ao Supabase com erro", ("table", "operation"))
+telegram_seconds = histogram("vigia_telegram_send_seconds", "Latência de envio ao Telegram")
+telegram_deliveries = counter("vigia_telegram_deliveries_total", "Mensagens processadas pela fila de saída", ("status",))
+telegram_errors = counter("vigia_telegram_errors_total", "Erros de envio ao Telegram", ("error",))
+job_seconds = histogram("vigia_job_seconds", "Duração dos jobs agendados", ("job",), JOB_BUCKETS)
+job_errors = counter("vigia_job_errors_total", "Jobs agendados que falharam", ("job",))
+
+
+@contextmanager
+def timed(metric: Histogram, errors: Counter | None = None, **labels: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        metric.observe(time.perf_counter() - started, **labels)
+
+
+def db_call(table: str, operation: str):
+    return timed(db_seconds, db_errors, table=table, operation=operation)
+
+
+def instrument_db(table: str, operation: str):
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            with db_call(table, operation):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_job(job: str, fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    @wraps(fn)
+    async def wrapper(*args, **kwargs) -> T:
+        with timed(job_seconds, job_errors, job=job):
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    for metric in _registry:
+        metric.reset()
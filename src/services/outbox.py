@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Iterable
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+from src.config import settings
+from src.services import metrics
+from src.services import telegram as telegram_service
+
+logger = logging.getLogger(__name__)
+
+
+class MessageSender:
+    def __init__(
+        self,
+        concurrency: int,
+        max_queue: int,
+        retries: int,
+        backoff: float,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.retries = retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.errors: dict[str, int] = {}
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop is asyncio.get_running_loop() and any(not t.done() for t in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [self._loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float | None = None) -> None:
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Encerrando com {self.depth} mensagem(ns) não enviadas")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> dict:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((chat_id, text, kwargs, future))
+        return await future
+
+    async def send_many(self, messages: Iterable[tuple[int, str]]) -> list[dict]:
+        return await asyncio.gather(*(self.send(chat_id, text) for chat_id, text in messages))
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id, text, kwargs, future = await self._queue.get()
+            try:
+                outcome = await self._deliver(chat_id, text, kwargs)
+                if not future.done():
+                    future.set_result(outcome)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, chat_id: int, text: str, kwargs: dict) -> dict:
+        started = time.perf_counter()
+        error: Exception | None = None
+        attempt = 0
+        for attempt in range(1, self.retries + 2):
+            try:
+                message = await telegram_service.send_message(chat_id, text, **kwargs)
+                self.sent += 1
+                metrics.telegram_deliveries.inc(status="sent")
+                return {
+                    "chat_id": chat_id,
+                    "status": "sent",
+                    "message_id": message.message_id,
+                    "attempts": attempt,
+                    "error": None,
+                    "seconds": round(time.perf_counter() - started, 4),
+                }
+            except RetryAfter as e:
+                error = e
+                if attempt > self.retries:
+                    break
+                await asyncio.sleep(telegram_service.retry_after_seconds(e))
+            except (BadRequest, Forbidden) as e:
+                error = e
+                break
+            except NetworkError as e:
+                error = e
+                if attempt > self.retries:
+                    break
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            except Exception as e:
+                error = e
+                break
+            self.retried += 1
+
+        self.failed += 1
+        error_name = type(error).__name__
+        self.errors[error_name] = self.errors.get(error_name, 0) + 1
+        metrics.telegram_deliveries.inc(status="failed")
+        logger.error(f"Falha ao enviar mensagem para {chat_id} após {attempt} tentativa(s): {error}")
+        return {
+            "chat_id": chat_id,
+            "status": "failed",
+            "message_id": None,
+            "attempts": attempt,
+            "error": str(error),
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "errors": dict(self.errors),
+            "concurrency": self.concurrency,
+        }
+
+
+_sender: MessageSender | None = None
+
+
+def get_sender() -> MessageSender:
+    global _sender
+    if _sender is None:
+        _sender = MessageSender(
+            concurrency=settings.telegram_send_concurrency,
+            max_queue=settings.telegram_send_queue_size,
+            retries=settings.telegram_send_retries,
+            backoff=settings.telegram_retry_backoff_seconds,
+        )
+    return _sender
+
+
+async def close_sender(timeout: float | None = None) -> None:
+    global _sender
+    if _sender is not None:
+        await _sender.stop(timeout)
+    _sender = None
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def block_for(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class KeyedRateLimiter:
+    def __init__(self, interval: float, max_keys: int = 10_000) -> None:
+        self.interval = interval
+        self.max_keys = max_keys
+        self._next_allowed: dict[object, float] = {}
+
+    async def acquire(self, key: object) -> None:
+        now = time.monotonic()
+        allowed_at = self._next_allowed.get(key, now)
+        self._next_allowed[key] = max(allowed_at, now) + self.interval
+        if allowed_at > now:
+            await asyncio.sleep(allowed_at - now)
+        if len(self._next_allowed) > self.max_keys:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        self._next_allowed = {k: t for k, t in self._next_allowed.items() if t > now}
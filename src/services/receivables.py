@@ -0,0 +1,89 @@
+import logging
+from datetime import date, datetime, timezone
+from src.services import alerts
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+LIST_LIMIT = 10
+
+
+def parse_due_date(value: str, today: date | None = None) -> date | None:
+    today = today or date.today()
+    parts = value.strip().replace("-", "/").split("/")
+    if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts):
+        return None
+    day, month = int(parts[0]), int(parts[1])
+    year = int(parts[2]) if len(parts) == 3 else today.year
+    if year < 100:
+        year += 2000
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def is_overdue(receivable: dict, as_of: date | None = None) -> bool:
+    as_of = as_of or date.today()
+    return receivable["status"] == "overdue" or date.fromisoformat(receivable["due_date"]) < as_of
+
+
+def _empty_totals() -> dict:
+    return {"open_count": 0, "open_total": 0.0, "overdue_count": 0, "overdue_total": 0.0, "next_due_date": None}
+
+
+def _totals_from_row(row: dict) -> dict:
+    return {
+        "open_count": int(row["open_count"] or 0),
+        "open_total": float(row["open_total"] or 0),
+        "overdue_count": int(row["overdue_count"] or 0),
+        "overdue_total": float(row["overdue_total"] or 0),
+        "next_due_date": row["next_due_date"],
+    }
+
+
+async def get_totals(company_ids: list[str] | None = None, as_of: date | None = None) -> dict[str, dict]:
+    rows = await supabase_service.get_receivable_totals(company_ids, (as_of or date.today()).isoformat())
+    return {row["company_id"]: _totals_from_row(row) for row in rows}
+
+
+async def get_company_receivables(company_id: str, as_of: date | None = None) -> tuple[list[dict], dict]:
+    receivables = await supabase_service.get_open_receivables(company_id, LIST_LIMIT)
+    if len(receivables) < LIST_LIMIT:
+        totals = _empty_totals()
+        for receivable in receivables:
+            overdue = is_overdue(receivable, as_of)
+            totals["open_count"] += 1
+            totals["open_total"] += float(receivable["amount"])
+            totals["overdue_count"] += overdue
+            totals["overdue_total"] += float(receivable["amount"]) if overdue else 0.0
+        return receivables, totals
+    totals = await get_totals([company_id], as_of)
+    return receivables, totals.get(company_id) or _empty_totals()
+
+
+async def create_receivable(company_id: str, client_name: str, amount: float, due_date: date) -> dict:
+    return await supabase_service.create_receivable({
+        "company_id": company_id,
+        "client_name": client_name,
+        "amount": amount,
+        "due_date": due_date.isoformat(),
+        "status": "overdue" if due_date < date.today() else "pending",
+    })
+
+
+async def mark_paid(company_id: str, receivable: dict) -> dict | None:
+    updated = await supabase_service.settle_receivable(
+        receivable["id"], company_id, datetime.now(timezone.utc).isoformat(), date.today().isoformat(),
+    )
+    if updated is None:
+        return None
+    alerts.invalidate(company_id)
+    return updated
+
+
+async def sweep_overdue(as_of: date | None = None) -> int:
+    day = (as_of or date.today()).isoformat()
+    count = await supabase_service.mark_overdue_receivables(day)
+    logger.info(f"Varredura de recebíveis {day}: {count} marcado(s) como em atraso")
+    return count
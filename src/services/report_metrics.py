@@ -0,0 +1,36 @@
+from datetime import date
+from src.services import supabase as supabase_service
+
+
+def _empty_metrics() -> dict:
+    return {
+        "yesterday_revenue": 0.0,
+        "avg_revenue": 0.0,
+        "cash_balance": 0.0,
+        "overdue_count": 0,
+        "overdue_total": 0.0,
+    }
+
+
+def _metrics_from_row(row: dict) -> dict:
+    return {
+        "yesterday_revenue": float(row["yesterday_revenue"] or 0),
+        "avg_revenue": float(row["avg_revenue_7d"] or 0),
+        "cash_balance": float(row["cash_balance"] or 0),
+        "overdue_count": int(row["overdue_count"] or 0),
+        "overdue_total": float(row["overdue_total"] or 0),
+    }
+
+
+async def get_company_metrics(company_id: str, as_of: date | None = None) -> dict:
+    row = await supabase_service.get_report_metrics(company_id, (as_of or date.today()).isoformat())
+    return _metrics_from_row(row) if row else _empty_metrics()
+
+
+async def compute_metrics_for(company_ids: list[str], as_of: date) -> dict[str, dict]:
+    rows = await supabase_service.get_report_metrics_for(company_ids, as_of.isoformat())
+    return {row["company_id"]: _metrics_from_row(row) for row in rows}
+
+
+def metrics_for(metrics: dict[str, dict], company_id: str) -> dict:
+    return metrics.get(company_id) or _empty_metrics()
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from src.config import settings
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+
+def log_cutoff(now: datetime | None = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=settings.message_log_retention_days)
+
+
+def log_archive_cutoff(now: datetime | None = None) -> date:
+    month = (now or datetime.now(timezone.utc)).date().replace(day=1)
+    for _ in range(settings.message_log_archive_months):
+        month = (month - timedelta(days=1)).replace(day=1)
+    return month
+
+
+def entry_cutoff(today: date | None = None) -> date:
+    return (today or date.today()) - timedelta(days=settings.entry_retention_days)
+
+
+async def _drain(move: Callable[[str, int], Awaitable[int]], before: str) -> int:
+    total = 0
+    for _ in range(settings.retention_max_batches):
+        moved = await move(before, settings.retention_batch_size)
+        total += moved
+        if moved < settings.retention_batch_size:
+            return total
+    logger.warning(f"Retenção interrompida após {settings.retention_max_batches} lote(s); o restante fica para a próxima execução")
+    return total
+
+
+async def archive_message_logs(now: datetime | None = None) -> dict:
+    moved = await _drain(supabase_service.archive_message_logs, log_cutoff(now).isoformat())
+    dropped = await supabase_service.drop_message_log_partitions(log_archive_cutoff(now).isoformat())
+    logger.info(f"Logs de mensagens: {moved} arquivado(s), {dropped} partição(ões) antiga(s) removida(s)")
+    return {"logs_archived": moved, "log_partitions_dropped": dropped}
+
+
+async def compact_entries(today: date | None = None) -> dict:
+    before = entry_cutoff(today)
+    moved = await _drain(supabase_service.compact_entries, before.isoformat())
+    logger.info(f"Lançamentos anteriores a {before}: {moved} compactado(s)")
+    return {"entries_compacted": moved}
+
+
+async def run_retention() -> dict | None:
+    if not settings.retention_enabled:
+        return None
+    return {**await archive_message_logs(), **await compact_entries()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Arquiva logs de mensagens e compacta lançamentos antigos")
+    parser.add_argument("--logs", action="store_true", help="só os logs de mensagens")
+    parser.add_argument("--entries", action="store_true", help="só os lançamentos")
+    args = parser.parse_args()
+
+    async def run() -> dict:
+        if args.logs == args.entries:
+            return {**await archive_message_logs(), **await compact_entries()}
+        return await (archive_message_logs() if args.logs else compact_entries())
+
+    for key, value in asyncio.run(run()).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
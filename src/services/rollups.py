@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from src.services import supabase as supabase_service
+
+logger = logging.getLogger(__name__)
+
+TOTAL_FIELDS = ("revenue_total", "expense_total", "entry_count")
+
+
+def _empty_totals() -> dict:
+    return {"revenue_total": 0.0, "expense_total": 0.0, "entry_count": 0}
+
+
+def rollup_entries(entries: list[dict]) -> dict[tuple[str, str], dict]:
+    totals: dict[tuple[str, str], dict] = defaultdict(_empty_totals)
+    for e in entries:
+        bucket = totals[(e["company_id"], e["entry_date"])]
+        bucket[f"{e['type']}_total"] += float(e["amount"])
+        bucket["entry_count"] += 1
+    return totals
+
+
+async def backfill_rollups(company_id: str | None = None) -> int:
+    count = await supabase_service.rebuild_daily_rollups(company_id)
+    logger.info(f"Rollups diários reconstruídos: {count} linha(s)")
+    return count
+
+
+async def reconcile_rollups(fix: bool = False, since: str | None = None, tolerance: float = 0.005) -> list[dict]:
+    entries, rollups, compacted = await asyncio.gather(
+        supabase_service.get_all_entry_amounts(since=since),
+        supabase_service.get_all_daily_rollups(since=since),
+        supabase_service.get_compacted_balances(),
+    )
+    compacted_through = {c["company_id"]: c["compacted_through"] for c in compacted}
+
+    expected = rollup_entries(entries)
+    actual = {
+        (r["company_id"], r["day"]): {field: float(r[field]) for field in TOTAL_FIELDS}
+        for r in rollups
+    }
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        if key[1] <= compacted_through.get(key[0], ""):
+            continue
+        want = expected.get(key) or _empty_totals()
+        have = actual.get(key) or _empty_totals()
+        if any(abs(want[field] - have[field]) > tolerance for field in TOTAL_FIELDS):
+            mismatches.append({
+                "company_id": key[0],
+                "day": key[1],
+                "expected": {field: round(want[field], 2) for field in TOTAL_FIELDS},
+                "actual": {field: round(have[field], 2) for field in TOTAL_FIELDS},
+            })
+
+    if mismatches:
+        logger.warning(f"Rollup divergente em {len(mismatches)} dia(s)")
+    if fix and mismatches:
+        await supabase_service.upsert_daily_rollups([
+            {"company_id": m["company_id"], "day": m["day"], **m["expected"]}
+            for m in mismatches
+        ])
+    return sorted(mismatches, key=lambda m: (m["company_id"], m["day"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Confere vigia_daily_rollups contra vigia_entries")
+    parser.add_argument("--fix", action="store_true", help="corrige os dias divergentes")
+    parser.add_argument("--since", help="confere só a partir desta data (AAAA-MM-DD)")
+    parser.add_argument("--backfill", action="store_true", help="reconstrói todos os rollups a partir dos lançamentos")
+    args = parser.parse_args()
+
+    if args.backfill:
+        print(f"{asyncio.run(backfill_rollups())} rollup(s) reconstruído(s)")
+        return
+
+    mismatches = asyncio.run(reconcile_rollups(fix=args.fix, since=args.since))
+    for m in mismatches:
+        print(f"{m['company_id']} {m['day']}: esperado {m['expected']}, rollup {m['actual']}")
+    print(f"{len(mismatches)} divergência(s){' corrigida(s)' if args.fix and mismatches else ''}")
+
+
+if __name__ == "__main__":
+    main()
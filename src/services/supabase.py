@@ -1,113 +1,486 @@
-from src.database import get_supabase, get_supabase_admin
+from typing import AsyncIterator
+from postgrest.types import ReturnMethod
+from src.config import settings
+from src.database import get_async_supabase, get_async_supabase_admin
+from src.services import cache
+from src.services.metrics import db_call, instrument_db
+
+USER_COLUMNS = "id,company_id,chat_id,first_name,state,current_action,onboarding_step"
+COMPANY_COLUMNS = "id,name,status,chat_id,fixed_cost_avg,variable_cost_percent,cash_minimum,alert_days_threshold"
+ENTRY_COLUMNS = "id,company_id,entry_date,amount,type"
+RECEIVABLE_COLUMNS = "id,company_id,client_name,amount,due_date,status"
+ROLLUP_COLUMNS = "company_id,day,revenue_total,expense_total,entry_count"
+REPORT_COMPANY_COLUMNS = f"{COMPANY_COLUMNS},last_report_sent_at,timezone,report_hour,report_offset"
+USER_WITH_COMPANY_COLUMNS = f"{USER_COLUMNS},company:vigia_companies({COMPANY_COLUMNS})"
+
+
+def _users(admin: bool = False):
+    return (get_async_supabase_admin() if admin else get_async_supabase()).table("vigia_users")
+
+
+def _companies(admin: bool = False):
+    return (get_async_supabase_admin() if admin else get_async_supabase()).table("vigia_companies")
+
+
+def _after(query, order: tuple[str, ...], row: dict):
+    if len(order) == 1:
+        return query.gt(order[0], row[order[0]])
+    conditions = []
+    for i, column in enumerate(order):
+        bounds = [f"{prefix}.eq.{row[prefix]}" for prefix in order[:i]] + [f"{column}.gt.{row[column]}"]
+        conditions.append(bounds[0] if len(bounds) == 1 else f"and({','.join(bounds)})")
+    return query.or_(",".join(conditions))
+
+
+async def _stream_pages(
+    build_query,
+    order: tuple[str, ...] = ("id",),
+    page_size: int | None = None,
+    table: str | None = None,
+) -> AsyncIterator[list[dict]]:
+    page_size = page_size or settings.bulk_fetch_page_size
+    last: dict | None = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = _after(query, order, last)
+        for column in order:
+            query = query.order(column)
+        if table:
+            with db_call(table, "select"):
+                result = await query.limit(page_size).execute()
+        else:
+            result = await query.limit(page_size).execute()
+        if result.data:
+            yield result.data
+        if len(result.data) < page_size:
+            return
+        last = result.data[-1]
+
+
+async def _fetch_pages(build_query, page_size: int | None = None, order: tuple[str, ...] = ("id",)) -> list[dict]:
+    return [row async for page in _stream_pages(build_query, order, page_size) for row in page]
+
+
+async def get_user_with_company(chat_id: int) -> tuple[dict | None, dict | None]:
+    user = cache.users.get(("chat_id", chat_id))
+    if user is not None:
+        return user, await get_company_by_id(user["company_id"]) if user.get("company_id") else None
+    with db_call("vigia_users", "select"):
+        result = await _users().select(USER_WITH_COMPANY_COLUMNS).eq("chat_id", chat_id).execute()
+    if not result.data:
+        return None, None
+    user = dict(result.data[0])
+    company = user.pop("company", None)
+    cache.cache_user(user)
+    if company:
+        cache.companies.set(company["id"], company)
+    return user, company
+
+
+@instrument_db("vigia_users", "insert")
+async def create_user(data: dict) -> dict:
+    result = await _users(admin=True).insert(data).execute()
+    cache.cache_user(result.data[0])
+    return result.data[0]
 
 
-def get_user_by_chat_id(chat_id: int) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_users").select("*").eq("chat_id", chat_id).execute()
+@instrument_db("vigia_users", "update")
+async def update_user(user_id: str, data: dict) -> dict | None:
+    cache.invalidate_user(user_id)
+    result = await _users(admin=True).update(data).eq("id", user_id).execute()
     if result.data:
+        cache.cache_user(result.data[0])
         return result.data[0]
     return None
 
 
-def get_user_by_id(user_id: str) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_users").select("*").eq("id", user_id).execute()
+async def get_company_by_id(company_id: str) -> dict | None:
+    cached = cache.companies.get(company_id)
+    if cached is not None:
+        return cached
+    with db_call("vigia_companies", "select"):
+        result = await _companies().select(COMPANY_COLUMNS).eq("id", company_id).execute()
     if result.data:
+        cache.companies.set(company_id, result.data[0])
         return result.data[0]
     return None
 
 
-def create_user(data: dict) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_users").insert(data).execute()
-    return result.data[0]
+def _id_range(query, low: str | None, high: str | None):
+    if low:
+        query = query.gte("id", low)
+    if high:
+        query = query.lt("id", high)
+    return query
 
 
-def update_user(user_id: str, data: dict) -> dict | None:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_users").update(data).eq("id", user_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
+async def iter_active_companies(page_size: int | None = None) -> AsyncIterator[dict]:
+    def build_query():
+        return _companies().select(COMPANY_COLUMNS).eq("status", "active")
+    async for page in _stream_pages(build_query, page_size=page_size, table="vigia_companies"):
+        for row in page:
+            yield row
 
 
-def get_company_by_id(company_id: str) -> dict | None:
-    supabase = get_supabase()
-    result = supabase.table("vigia_companies").select("*").eq("id", company_id).execute()
-    if result.data:
-        return result.data[0]
-    return None
+async def get_all_active_companies(page_size: int | None = None) -> list[dict]:
+    return [row async for row in iter_active_companies(page_size)]
+
+
+async def iter_report_companies(low: str | None = None, high: str | None = None, page_size: int | None = None) -> AsyncIterator[dict]:
+    def build_query():
+        return _id_range(_companies().select(REPORT_COMPANY_COLUMNS).eq("status", "active"), low, high)
+    async for page in _stream_pages(build_query, page_size=page_size, table="vigia_companies"):
+        for row in page:
+            yield row
+
 
+@instrument_db("vigia_report_timezones", "rpc")
+async def get_report_timezones() -> list[str]:
+    supabase = get_async_supabase()
+    result = await supabase.rpc("vigia_report_timezones", {}).execute()
+    return [row["timezone"] for row in result.data]
 
-def get_all_active_companies() -> list[dict]:
-    supabase = get_supabase()
-    result = supabase.table("vigia_companies").select("*").eq("status", "active").execute()
+
+def _due_report_query(buckets: list[tuple[str, int, int, int]]):
+    conditions = ",".join(
+        f"and(timezone.eq.{tz},report_hour.eq.{hour},report_offset.gte.{low},report_offset.lt.{high})"
+        for tz, hour, low, high in buckets
+    )
+    return _companies().select(REPORT_COMPANY_COLUMNS).eq("status", "active").or_(conditions)
+
+
+@instrument_db("vigia_companies", "select")
+async def get_due_report_companies(buckets: list[tuple[str, int, int, int]], limit: int) -> list[dict]:
+    result = await _due_report_query(buckets).order("id").limit(limit).execute()
     return result.data
 
 
-def create_company(data: dict) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_companies").insert(data).execute()
+async def iter_due_report_companies(
+    buckets: list[tuple[str, int, int, int]],
+    low: str | None = None,
+    high: str | None = None,
+    page_size: int | None = None,
+) -> AsyncIterator[dict]:
+    async for page in _stream_pages(lambda: _id_range(_due_report_query(buckets), low, high), page_size=page_size, table="vigia_companies"):
+        for row in page:
+            yield row
+
+
+@instrument_db("vigia_mark_reports_sent", "rpc")
+async def mark_reports_sent(company_ids: list[str], sent_at: str) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_mark_reports_sent", {"p_company_ids": company_ids, "p_sent_at": sent_at}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_companies", "insert")
+async def create_company(data: dict) -> dict:
+    result = await _companies(admin=True).insert(data).execute()
+    cache.companies.set(result.data[0]["id"], result.data[0])
     return result.data[0]
 
 
-def update_company(company_id: str, data: dict) -> dict | None:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_companies").update(data).eq("id", company_id).execute()
+@instrument_db("vigia_companies", "update")
+async def update_company(company_id: str, data: dict) -> dict | None:
+    cache.companies.invalidate(company_id)
+    result = await _companies(admin=True).update(data).eq("id", company_id).execute()
     if result.data:
+        cache.companies.set(company_id, result.data[0])
         return result.data[0]
     return None
 
 
-def create_entry(data: dict) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_entries").insert(data).execute()
-    return result.data[0]
+@instrument_db("vigia_entries", "insert")
+async def create_entry(data: dict) -> None:
+    supabase = get_async_supabase_admin()
+    await supabase.table("vigia_entries").insert(data, returning=ReturnMethod.minimal).execute()
+
+
+@instrument_db("vigia_import_entries", "rpc")
+async def import_entries(rows: list[dict]) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_import_entries", {"p_rows": rows}).execute()
+    return result.data or 0
+
 
+async def iter_entries_by_company(company_id: str, since: str | None = None, page_size: int | None = None) -> AsyncIterator[dict]:
+    def build_query():
+        query = get_async_supabase().table("vigia_entries").select(ENTRY_COLUMNS).eq("company_id", company_id)
+        return query.gte("entry_date", since) if since else query
+    async for page in _stream_pages(build_query, order=("entry_date", "id"), page_size=page_size, table="vigia_entries"):
+        for row in page:
+            yield row
 
-def get_entries_by_company(company_id: str, days: int = 30) -> list[dict]:
-    supabase = get_supabase()
+
+async def get_entries_by_company(company_id: str, days: int = 30) -> list[dict]:
     from datetime import date, timedelta
     start_date = (date.today() - timedelta(days=days)).isoformat()
-    result = supabase.table("vigia_entries").select("*").eq("company_id", company_id).gte("entry_date", start_date).execute()
+    return [row async for row in iter_entries_by_company(company_id, start_date)]
+
+
+@instrument_db("vigia_receivables", "insert")
+async def create_receivable(data: dict) -> dict:
+    supabase = get_async_supabase_admin()
+    result = await supabase.table("vigia_receivables").insert(data).execute()
+    return result.data[0]
+
+
+@instrument_db("vigia_receivables", "select")
+async def get_open_receivables(company_id: str, limit: int) -> list[dict]:
+    supabase = get_async_supabase()
+    result = await (
+        supabase.table("vigia_receivables").select(RECEIVABLE_COLUMNS)
+        .eq("company_id", company_id).in_("status", ["pending", "overdue"])
+        .order("due_date").order("id").limit(limit).execute()
+    )
     return result.data
 
 
-def get_entries_yesterday(company_id: str) -> list[dict]:
-    supabase = get_supabase()
-    from datetime import date, timedelta
-    yesterday = (date.today() - timedelta(days=1)).isoformat()
-    result = supabase.table("vigia_entries").select("*").eq("company_id", company_id).eq("entry_date", yesterday).execute()
+@instrument_db("vigia_settle_receivable", "rpc")
+async def settle_receivable(receivable_id: str, company_id: str, paid_at: str, entry_date: str) -> dict | None:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_settle_receivable", {
+        "p_id": receivable_id, "p_company_id": company_id, "p_paid_at": paid_at, "p_entry_date": entry_date,
+    }).execute()
+    return result.data[0] if result.data else None
+
+
+@instrument_db("vigia_receivable_totals", "rpc")
+async def get_receivable_totals(company_ids: list[str] | None, as_of: str) -> list[dict]:
+    supabase = get_async_supabase()
+    result = await supabase.rpc("vigia_receivable_totals", {"p_company_ids": company_ids, "p_as_of": as_of}).execute()
     return result.data
 
 
-def get_receivables_pending(company_id: str) -> list[dict]:
-    supabase = get_supabase()
-    result = supabase.table("vigia_receivables").select("*").eq("company_id", company_id).in_("status", ["pending", "overdue"]).execute()
+@instrument_db("vigia_mark_overdue_receivables", "rpc")
+async def mark_overdue_receivables(as_of: str) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_mark_overdue_receivables", {"p_as_of": as_of}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_message_logs", "insert")
+async def log_messages(rows: list[dict]) -> None:
+    supabase = get_async_supabase_admin()
+    await supabase.table("vigia_message_logs").insert(rows, returning=ReturnMethod.minimal).execute()
+
+
+@instrument_db("vigia_raise_alert", "rpc")
+async def raise_alert(company_id: str, alert_type: str, severity: str, message: str, data: dict | None = None) -> dict | None:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_raise_alert", {
+        "p_company_id": company_id, "p_alert_type": alert_type, "p_severity": severity,
+        "p_message": message, "p_data": data,
+    }).execute()
+    return result.data[0] if result.data else None
+
+
+@instrument_db("vigia_resolve_alerts", "rpc")
+async def resolve_alerts(company_id: str, alert_type: str) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_resolve_alerts", {"p_company_id": company_id, "p_alert_type": alert_type}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_company_balances", "select")
+async def get_company_ledger(company_id: str) -> dict:
+    supabase = get_async_supabase()
+    result = await supabase.table("vigia_company_balances").select("balance", "entry_count").eq("company_id", company_id).execute()
+    if result.data:
+        return {"balance": float(result.data[0]["balance"]), "entry_count": int(result.data[0]["entry_count"])}
+    return {"balance": 0.0, "entry_count": 0}
+
+
+@instrument_db("vigia_company_balances", "select")
+async def get_all_company_balances() -> dict[str, float]:
+    supabase = get_async_supabase()
+    rows = await _fetch_pages(lambda: supabase.table("vigia_company_balances").select("company_id", "balance"), order=("company_id",))
+    return {r["company_id"]: float(r["balance"]) for r in rows}
+
+
+@instrument_db("vigia_company_balances", "upsert")
+async def upsert_company_balances(rows: list[dict]) -> list[dict]:
+    supabase = get_async_supabase_admin()
+    result = await supabase.table("vigia_company_balances").upsert(rows, on_conflict="company_id").execute()
     return result.data
 
 
-def create_receivable(data: dict) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_receivables").insert(data).execute()
-    return result.data[0]
+@instrument_db("vigia_take_balance_snapshots", "rpc")
+async def take_balance_snapshots(snapshot_date: str) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_take_balance_snapshots", {"p_snapshot_date": snapshot_date}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_entries", "select")
+async def get_all_entry_amounts(page_size: int | None = None, since: str | None = None) -> list[dict]:
+    def build_query():
+        query = get_async_supabase().table("vigia_entries").select("id", "company_id", "entry_date", "amount", "type")
+        return query.gte("entry_date", since) if since else query
+    return await _fetch_pages(build_query, page_size)
+
+
+@instrument_db("vigia_receivables", "select")
+async def get_all_receivables_pending(page_size: int | None = None) -> list[dict]:
+    return await _fetch_pages(
+        lambda: get_async_supabase().table("vigia_receivables").select(RECEIVABLE_COLUMNS).in_("status", ["pending", "overdue"]),
+        page_size,
+    )
+
+
+@instrument_db("vigia_touch_users", "rpc")
+async def touch_users(touches: list[dict]) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_touch_users", {"p_touches": touches}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_processed_updates", "upsert")
+async def claim_update(update_id: int, chat_id: int | None, message_id: int | None) -> bool:
+    supabase = get_async_supabase_admin()
+    result = await supabase.table("vigia_processed_updates").upsert(
+        {"update_id": update_id, "chat_id": chat_id, "message_id": message_id},
+        on_conflict="update_id",
+        ignore_duplicates=True,
+    ).execute()
+    return bool(result.data)
+
+
+@instrument_db("vigia_processed_updates", "delete")
+async def release_update(update_id: int) -> None:
+    supabase = get_async_supabase_admin()
+    await supabase.table("vigia_processed_updates").delete().eq("update_id", update_id).execute()
+
+
+@instrument_db("vigia_processed_updates", "delete")
+async def purge_processed_updates(before: str) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.table("vigia_processed_updates").delete().lt("processed_at", before).execute()
+    return len(result.data)
+
+
+@instrument_db("vigia_archive_message_logs", "rpc")
+async def archive_message_logs(before: str, limit: int) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_archive_message_logs", {"p_before": before, "p_limit": limit}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_drop_message_log_partitions", "rpc")
+async def drop_message_log_partitions(before: str) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_drop_message_log_partitions", {"p_before": before}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_compact_entries", "rpc")
+async def compact_entries(before: str, limit: int) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_compact_entries", {"p_before": before, "p_limit": limit}).execute()
+    return result.data or 0
+
 
+@instrument_db("vigia_compacted_balances", "select")
+async def get_compacted_balances(page_size: int | None = None) -> list[dict]:
+    return await _fetch_pages(
+        lambda: get_async_supabase().table("vigia_compacted_balances").select("company_id,balance,entry_count,compacted_through"),
+        page_size,
+        order=("company_id",),
+    )
 
-def update_receivable(receivable_id: str, data: dict) -> dict | None:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_receivables").update(data).eq("id", receivable_id).execute()
+
+@instrument_db("vigia_report_metrics", "rpc")
+async def get_report_metrics(company_id: str, as_of: str) -> dict | None:
+    supabase = get_async_supabase()
+    result = await supabase.rpc("vigia_report_metrics", {"p_company_id": company_id, "p_as_of": as_of}).execute()
     if result.data:
         return result.data[0]
     return None
 
 
-def log_message(data: dict) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_message_logs").insert(data).execute()
+@instrument_db("vigia_report_metrics_for", "rpc")
+async def get_report_metrics_for(company_ids: list[str], as_of: str) -> list[dict]:
+    supabase = get_async_supabase()
+    result = await supabase.rpc("vigia_report_metrics_for", {"p_company_ids": company_ids, "p_as_of": as_of}).execute()
+    return result.data
+
+
+@instrument_db("vigia_daily_rollups", "select")
+async def get_all_daily_rollups(since: str | None = None, page_size: int | None = None) -> list[dict]:
+    def build_query():
+        query = get_async_supabase().table("vigia_daily_rollups").select(ROLLUP_COLUMNS)
+        return query.gte("day", since) if since else query
+    return await _fetch_pages(build_query, page_size, order=("company_id", "day"))
+
+
+@instrument_db("vigia_daily_rollups", "upsert")
+async def upsert_daily_rollups(rows: list[dict]) -> None:
+    supabase = get_async_supabase_admin()
+    await supabase.table("vigia_daily_rollups").upsert(rows, on_conflict="company_id,day", returning=ReturnMethod.minimal).execute()
+
+
+@instrument_db("vigia_rebuild_daily_rollups", "rpc")
+async def rebuild_daily_rollups(company_id: str | None = None) -> int:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_rebuild_daily_rollups", {"p_company_id": company_id}).execute()
+    return result.data or 0
+
+
+@instrument_db("vigia_acquire_lease", "rpc")
+async def acquire_lease(name: str, shard: int, owner: str, ttl_seconds: int) -> bool:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_acquire_lease", {
+        "p_name": name, "p_shard": shard, "p_owner": owner, "p_ttl_seconds": ttl_seconds,
+    }).execute()
+    return bool(result.data)
+
+
+@instrument_db("vigia_release_lease", "rpc")
+async def release_lease(name: str, shard: int, owner: str) -> bool:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_release_lease", {"p_name": name, "p_shard": shard, "p_owner": owner}).execute()
+    return bool(result.data)
+
+
+@instrument_db("vigia_start_report_run", "rpc")
+async def start_report_run(run_key: str, run_date: str, shards: int) -> dict:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_start_report_run", {
+        "p_run_key": run_key, "p_run_date": run_date, "p_shards": shards,
+    }).execute()
     return result.data[0]
 
 
-def create_alert(data: dict) -> dict:
-    supabase = get_supabase_admin()
-    result = supabase.table("vigia_alerts").insert(data).execute()
+@instrument_db("vigia_report_runs", "select")
+async def get_unfinished_report_runs(since: str, started_before: str) -> list[dict]:
+    supabase = get_async_supabase_admin()
+    result = await (
+        supabase.table("vigia_report_runs").select("*")
+        .eq("status", "running").gte("started_at", since).lt("started_at", started_before)
+        .order("started_at").execute()
+    )
+    return result.data
+
+
+@instrument_db("vigia_complete_report_shard", "rpc")
+async def complete_report_shard(run_id: str, shard: int, sent: int, failed: int, skipped: int) -> dict:
+    supabase = get_async_supabase_admin()
+    result = await supabase.rpc("vigia_complete_report_shard", {
+        "p_run_id": run_id, "p_shard": shard, "p_sent": sent, "p_failed": failed, "p_skipped": skipped,
+    }).execute()
     return result.data[0]
+
+
+@instrument_db("vigia_report_deliveries", "select")
+async def get_report_deliveries(run_id: str, shard: int) -> dict[str, dict]:
+    def build_query():
+        return get_async_supabase_admin().table("vigia_report_deliveries").select("company_id", "status", "attempts").eq("run_id", run_id).eq("shard", shard)
+    rows = await _fetch_pages(build_query, order=("company_id",))
+    return {row["company_id"]: row for row in rows}
+
+
+@instrument_db("vigia_report_deliveries", "upsert")
+async def upsert_report_deliveries(rows: list[dict]) -> None:
+    supabase = get_async_supabase_admin()
+    await supabase.table("vigia_report_deliveries").upsert(rows, on_conflict="run_id,company_id", returning=ReturnMethod.minimal).execute()
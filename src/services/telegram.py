@@ -1,16 +1,107 @@
-from telegram import Bot
+import asyncio
+from datetime import timedelta
+from importlib.util import find_spec
+from typing import Any, Callable, Coroutine
+from telegram import Message
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter, ExtBot
+from telegram.request import BaseRequest, HTTPXRequest
 from src.config import settings
+from src.services import metrics
+from src.services.audit import audit_log
+from src.services.rate_limit import KeyedRateLimiter, TokenBucket
 
-_bot: Bot | None = None
 
+class SharedRateLimiter(BaseRateLimiter):
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._bucket: TokenBucket | None = None
+        self._chat_limiter: KeyedRateLimiter | None = None
 
-def get_bot() -> Bot:
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _limits(self) -> tuple[TokenBucket, KeyedRateLimiter]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._bucket = TokenBucket(settings.telegram_rate_per_second)
+            self._chat_limiter = KeyedRateLimiter(settings.telegram_chat_interval_seconds)
+        return self._bucket, self._chat_limiter
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: Any,
+    ) -> Any:
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+        bucket, chat_limiter = self._limits()
+        await chat_limiter.acquire(str(chat_id))
+        await bucket.acquire()
+        try:
+            return await callback(*args, **kwargs)
+        except RetryAfter as e:
+            bucket.block_for(retry_after_seconds(e))
+            raise
+
+
+rate_limiter = SharedRateLimiter()
+
+
+class AuditedBot(ExtBot):
+    async def send_message(self, *args, **kwargs) -> Message:
+        message = await super().send_message(*args, **kwargs)
+        audit_log.record_outbound(message.chat_id, message.text, message.message_id)
+        return message
+
+    async def edit_message_text(self, *args, **kwargs):
+        message = await super().edit_message_text(*args, **kwargs)
+        if isinstance(message, Message):
+            audit_log.record_outbound(message.chat_id, message.text, message.message_id, kind="edit")
+        return message
+
+
+_bot: ExtBot | None = None
+
+
+def build_request() -> HTTPXRequest:
+    return HTTPXRequest(
+        connection_pool_size=settings.telegram_pool_size,
+        connect_timeout=settings.telegram_connect_timeout_seconds,
+        read_timeout=settings.telegram_read_timeout_seconds,
+        write_timeout=settings.telegram_read_timeout_seconds,
+        pool_timeout=settings.telegram_pool_timeout_seconds,
+        http_version="2" if settings.telegram_http2 and find_spec("h2") else "1.1",
+    )
+
+
+def get_bot(request: BaseRequest | None = None) -> ExtBot:
     global _bot
-    if _bot is None:
-        _bot = Bot(token=settings.telegram_bot_token)
+    if _bot is None or request is not None:
+        _bot = AuditedBot(token=settings.telegram_bot_token, request=request or build_request(), rate_limiter=rate_limiter)
     return _bot
 
 
-async def send_message(chat_id: int, text: str) -> None:
+async def send_message(chat_id: int, text: str, **kwargs) -> Message:
     bot = get_bot()
-    await bot.send_message(chat_id=chat_id, text=text)
+    try:
+        with metrics.timed(metrics.telegram_seconds):
+            return await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+    except Exception as e:
+        metrics.telegram_errors.inc(error=type(e).__name__)
+        raise
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    if isinstance(error.retry_after, timedelta):
+        return error.retry_after.total_seconds()
+    return float(error.retry_after)
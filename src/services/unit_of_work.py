@@ -0,0 +1,29 @@
+from src.services import supabase as supabase_service
+
+
+class UnitOfWork:
+    def __init__(self, chat_id: int) -> None:
+        self.chat_id = chat_id
+        self.user: dict | None = None
+        self.company: dict | None = None
+
+    async def load(self) -> dict | None:
+        self.user, self.company = await supabase_service.get_user_with_company(self.chat_id)
+        return self.user
+
+    async def get_company(self) -> dict | None:
+        if self.company is None and self.user and self.user.get("company_id"):
+            self.company = await supabase_service.get_company_by_id(self.user["company_id"])
+        return self.company
+
+    async def update_user(self, data: dict) -> dict | None:
+        updated = await supabase_service.update_user(self.user["id"], data)
+        if updated:
+            self.user = updated
+        return updated
+
+    async def update_company(self, data: dict) -> dict | None:
+        updated = await supabase_service.update_company(self.user["company_id"], data)
+        if updated:
+            self.company = updated
+        return updated
@@ -1,3 +1,7 @@
+ALERT_LEVELS = (("🔴", "crítico"), ("⚠️", "atenção"), ("✅", "normal"))
+ALERT_THRESHOLDS = (10, 20)
+
+
 def calculate_runway(cash: float, daily_burn: float) -> float:
     if daily_burn <= 0:
         return 999
@@ -14,9 +18,9 @@ def calculate_monthly_burn(fixed_cost_avg: float, avg_daily_revenue: float, vari
 
 
 def get_alert_level(days_of_cash: int) -> tuple[str, str]:
-    if days_of_cash <= 10:
-        return "🔴", "crítico"
-    elif days_of_cash <= 20:
-        return "⚠️", "atenção"
+    if days_of_cash <= ALERT_THRESHOLDS[0]:
+        return ALERT_LEVELS[0]
+    elif days_of_cash <= ALERT_THRESHOLDS[1]:
+        return ALERT_LEVELS[1]
     else:
-        return "✅", "normal"
+        return ALERT_LEVELS[2]
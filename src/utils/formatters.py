@@ -4,6 +4,15 @@ def format_currency(amount: float | None) -> str:
     return f"R$ {amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
+def parse_number(value: str) -> tuple[bool, float | None, str]:
+    cleaned = value.replace("R", "").replace("r", "").replace("$", "").replace(" ", "").replace(".", "")
+    cleaned = cleaned.replace(",", ".")
+    try:
+        return True, float(cleaned), ""
+    except ValueError:
+        return False, None, "Por favor, digite apenas números (ex: 5000)"
+
+
 def format_days(days: float) -> str:
     if days >= 999:
         return "∞"
@@ -0,0 +1,77 @@
+-- Running cash balance per company, kept in sync by a trigger on vigia_entries
+
+CREATE TABLE IF NOT EXISTS public.vigia_company_balances (
+    company_id UUID PRIMARY KEY REFERENCES public.vigia_companies(id) ON DELETE CASCADE,
+    balance DECIMAL(14,2) NOT NULL DEFAULT 0,
+    entry_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.vigia_balance_snapshots (
+    company_id UUID NOT NULL REFERENCES public.vigia_companies(id) ON DELETE CASCADE,
+    snapshot_date DATE NOT NULL,
+    balance DECIMAL(14,2) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (company_id, snapshot_date)
+);
+
+CREATE OR REPLACE FUNCTION public.vigia_apply_entry_to_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.vigia_company_balances
+        SET balance = balance - CASE WHEN OLD.type = 'revenue' THEN OLD.amount ELSE -OLD.amount END,
+            entry_count = entry_count - 1,
+            updated_at = now()
+        WHERE company_id = OLD.company_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.vigia_company_balances (company_id, balance, entry_count, updated_at)
+        VALUES (NEW.company_id, CASE WHEN NEW.type = 'revenue' THEN NEW.amount ELSE -NEW.amount END, 1, now())
+        ON CONFLICT (company_id) DO UPDATE
+        SET balance = public.vigia_company_balances.balance + EXCLUDED.balance,
+            entry_count = public.vigia_company_balances.entry_count + 1,
+            updated_at = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vigia_entries_balance ON public.vigia_entries;
+CREATE TRIGGER vigia_entries_balance AFTER INSERT OR UPDATE OF amount, type, company_id OR DELETE ON public.vigia_entries
+    FOR EACH ROW EXECUTE FUNCTION public.vigia_apply_entry_to_balance();
+
+-- Backfill from existing entries
+INSERT INTO public.vigia_company_balances (company_id, balance, entry_count, updated_at)
+SELECT company_id,
+       SUM(CASE WHEN type = 'revenue' THEN amount ELSE -amount END),
+       COUNT(*),
+       now()
+FROM public.vigia_entries
+GROUP BY company_id
+ON CONFLICT (company_id) DO UPDATE
+SET balance = EXCLUDED.balance,
+    entry_count = EXCLUDED.entry_count,
+    updated_at = now();
+
+CREATE OR REPLACE FUNCTION public.vigia_take_balance_snapshots(p_snapshot_date DATE DEFAULT CURRENT_DATE)
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    INSERT INTO public.vigia_balance_snapshots (company_id, snapshot_date, balance)
+    SELECT company_id, p_snapshot_date, balance FROM public.vigia_company_balances
+    ON CONFLICT (company_id, snapshot_date) DO UPDATE SET balance = EXCLUDED.balance;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Grant permissions
+GRANT ALL ON public.vigia_company_balances TO anon, authenticated, service_role;
+GRANT ALL ON public.vigia_balance_snapshots TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_take_balance_snapshots(DATE) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
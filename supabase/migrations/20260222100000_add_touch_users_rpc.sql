@@ -0,0 +1,20 @@
+-- Bulk update of last_interaction_at used by the write-behind interaction buffer
+
+CREATE OR REPLACE FUNCTION public.vigia_touch_users(p_touches JSONB)
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    UPDATE public.vigia_users AS u
+    SET last_interaction_at = t.seen_at
+    FROM jsonb_to_recordset(p_touches) AS t(id UUID, seen_at TIMESTAMPTZ)
+    WHERE u.id = t.id
+      AND (u.last_interaction_at IS NULL OR u.last_interaction_at < t.seen_at);
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION public.vigia_touch_users(JSONB) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
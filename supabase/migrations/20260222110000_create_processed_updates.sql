@@ -0,0 +1,14 @@
+-- Telegram update_ids already processed, used to drop webhook redeliveries across processes
+
+CREATE TABLE IF NOT EXISTS public.vigia_processed_updates (
+    update_id BIGINT PRIMARY KEY,
+    chat_id BIGINT,
+    message_id BIGINT,
+    processed_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_processed_updates_processed_at ON public.vigia_processed_updates(processed_at);
+
+GRANT ALL ON public.vigia_processed_updates TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,75 @@
+-- Report figures aggregated server-side, one row per company
+
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics(p_company_id UUID, p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    SELECT
+        p_company_id,
+        COALESCE((
+            SELECT SUM(e.amount) FROM public.vigia_entries e
+            WHERE e.company_id = p_company_id AND e.type = 'revenue' AND e.entry_date = p_as_of - 1
+        ), 0),
+        COALESCE((
+            SELECT SUM(e.amount) FROM public.vigia_entries e
+            WHERE e.company_id = p_company_id AND e.type = 'revenue' AND e.entry_date >= p_as_of - 7
+        ), 0) / 7,
+        COALESCE((
+            SELECT b.balance FROM public.vigia_company_balances b WHERE b.company_id = p_company_id
+        ), 0),
+        (
+            SELECT COUNT(*) FROM public.vigia_receivables r
+            WHERE r.company_id = p_company_id AND r.status IN ('pending', 'overdue')
+        ),
+        COALESCE((
+            SELECT SUM(r.amount) FROM public.vigia_receivables r
+            WHERE r.company_id = p_company_id AND r.status IN ('pending', 'overdue')
+        ), 0);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics_all(p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    WITH revenue AS (
+        SELECT e.company_id,
+               SUM(e.amount) FILTER (WHERE e.entry_date = p_as_of - 1) AS yesterday_revenue,
+               SUM(e.amount) AS revenue_7d
+        FROM public.vigia_entries e
+        WHERE e.type = 'revenue' AND e.entry_date >= p_as_of - 7
+        GROUP BY e.company_id
+    ),
+    overdue AS (
+        SELECT r.company_id, COUNT(*) AS overdue_count, SUM(r.amount) AS overdue_total
+        FROM public.vigia_receivables r
+        WHERE r.status IN ('pending', 'overdue')
+        GROUP BY r.company_id
+    )
+    SELECT
+        c.id,
+        COALESCE(rv.yesterday_revenue, 0),
+        COALESCE(rv.revenue_7d, 0) / 7,
+        COALESCE(b.balance, 0),
+        COALESCE(o.overdue_count, 0),
+        COALESCE(o.overdue_total, 0)
+    FROM public.vigia_companies c
+    LEFT JOIN revenue rv ON rv.company_id = c.id
+    LEFT JOIN public.vigia_company_balances b ON b.company_id = c.id
+    LEFT JOIN overdue o ON o.company_id = c.id
+    WHERE c.status = 'active';
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.vigia_report_metrics(UUID, DATE) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_report_metrics_all(DATE) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
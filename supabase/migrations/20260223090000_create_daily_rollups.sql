@@ -0,0 +1,151 @@
+-- Per-company per-day entry totals, kept in sync by a trigger on vigia_entries
+
+CREATE TABLE IF NOT EXISTS public.vigia_daily_rollups (
+    company_id UUID NOT NULL REFERENCES public.vigia_companies(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    revenue_total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    expense_total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    entry_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (company_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_daily_rollups_day ON public.vigia_daily_rollups(day);
+
+CREATE OR REPLACE FUNCTION public.vigia_apply_entry_to_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.vigia_daily_rollups
+        SET revenue_total = revenue_total - CASE WHEN OLD.type = 'revenue' THEN OLD.amount ELSE 0 END,
+            expense_total = expense_total - CASE WHEN OLD.type = 'expense' THEN OLD.amount ELSE 0 END,
+            entry_count = entry_count - 1,
+            updated_at = now()
+        WHERE company_id = OLD.company_id AND day = OLD.entry_date;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.vigia_daily_rollups (company_id, day, revenue_total, expense_total, entry_count, updated_at)
+        VALUES (
+            NEW.company_id,
+            NEW.entry_date,
+            CASE WHEN NEW.type = 'revenue' THEN NEW.amount ELSE 0 END,
+            CASE WHEN NEW.type = 'expense' THEN NEW.amount ELSE 0 END,
+            1,
+            now()
+        )
+        ON CONFLICT (company_id, day) DO UPDATE
+        SET revenue_total = public.vigia_daily_rollups.revenue_total + EXCLUDED.revenue_total,
+            expense_total = public.vigia_daily_rollups.expense_total + EXCLUDED.expense_total,
+            entry_count = public.vigia_daily_rollups.entry_count + 1,
+            updated_at = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vigia_entries_rollup ON public.vigia_entries;
+CREATE TRIGGER vigia_entries_rollup AFTER INSERT OR UPDATE OF amount, type, company_id, entry_date OR DELETE ON public.vigia_entries
+    FOR EACH ROW EXECUTE FUNCTION public.vigia_apply_entry_to_rollup();
+
+-- Rebuild from vigia_entries: all companies, or one when p_company_id is given
+CREATE OR REPLACE FUNCTION public.vigia_rebuild_daily_rollups(p_company_id UUID DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    DELETE FROM public.vigia_daily_rollups
+    WHERE p_company_id IS NULL OR company_id = p_company_id;
+
+    INSERT INTO public.vigia_daily_rollups (company_id, day, revenue_total, expense_total, entry_count, updated_at)
+    SELECT company_id,
+           entry_date,
+           COALESCE(SUM(amount) FILTER (WHERE type = 'revenue'), 0),
+           COALESCE(SUM(amount) FILTER (WHERE type = 'expense'), 0),
+           COUNT(*),
+           now()
+    FROM public.vigia_entries
+    WHERE p_company_id IS NULL OR company_id = p_company_id
+    GROUP BY company_id, entry_date;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT public.vigia_rebuild_daily_rollups();
+
+-- Report metrics now read the rollups instead of raw entries
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics(p_company_id UUID, p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    SELECT
+        p_company_id,
+        COALESCE((
+            SELECT r.revenue_total FROM public.vigia_daily_rollups r
+            WHERE r.company_id = p_company_id AND r.day = p_as_of - 1
+        ), 0),
+        COALESCE((
+            SELECT SUM(r.revenue_total) FROM public.vigia_daily_rollups r
+            WHERE r.company_id = p_company_id AND r.day >= p_as_of - 7
+        ), 0) / 7,
+        COALESCE((
+            SELECT b.balance FROM public.vigia_company_balances b WHERE b.company_id = p_company_id
+        ), 0),
+        (
+            SELECT COUNT(*) FROM public.vigia_receivables rc
+            WHERE rc.company_id = p_company_id AND rc.status IN ('pending', 'overdue')
+        ),
+        COALESCE((
+            SELECT SUM(rc.amount) FROM public.vigia_receivables rc
+            WHERE rc.company_id = p_company_id AND rc.status IN ('pending', 'overdue')
+        ), 0);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics_all(p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    WITH revenue AS (
+        SELECT r.company_id,
+               SUM(r.revenue_total) FILTER (WHERE r.day = p_as_of - 1) AS yesterday_revenue,
+               SUM(r.revenue_total) AS revenue_7d
+        FROM public.vigia_daily_rollups r
+        WHERE r.day >= p_as_of - 7
+        GROUP BY r.company_id
+    ),
+    overdue AS (
+        SELECT rc.company_id, COUNT(*) AS overdue_count, SUM(rc.amount) AS overdue_total
+        FROM public.vigia_receivables rc
+        WHERE rc.status IN ('pending', 'overdue')
+        GROUP BY rc.company_id
+    )
+    SELECT
+        c.id,
+        COALESCE(rv.yesterday_revenue, 0),
+        COALESCE(rv.revenue_7d, 0) / 7,
+        COALESCE(b.balance, 0),
+        COALESCE(o.overdue_count, 0),
+        COALESCE(o.overdue_total, 0)
+    FROM public.vigia_companies c
+    LEFT JOIN revenue rv ON rv.company_id = c.id
+    LEFT JOIN public.vigia_company_balances b ON b.company_id = c.id
+    LEFT JOIN overdue o ON o.company_id = c.id
+    WHERE c.status = 'active';
+$$ LANGUAGE sql STABLE;
+
+GRANT ALL ON public.vigia_daily_rollups TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_rebuild_daily_rollups(UUID) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,32 @@
+-- Bank statement imports: a per-company import key makes re-importing the same file a no-op
+
+ALTER TABLE public.vigia_entries ADD COLUMN IF NOT EXISTS import_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vigia_entries_import_key ON public.vigia_entries(company_id, import_key);
+
+CREATE OR REPLACE FUNCTION public.vigia_import_entries(p_rows JSONB)
+RETURNS INT AS $$
+DECLARE
+    inserted INT;
+BEGIN
+    INSERT INTO public.vigia_entries (company_id, user_id, entry_date, amount, type, source, description, import_key)
+    SELECT r.company_id, r.user_id, r.entry_date, r.amount, r.type, COALESCE(r.source, 'import'), r.description, r.import_key
+    FROM jsonb_to_recordset(p_rows) AS r(
+        company_id UUID,
+        user_id UUID,
+        entry_date DATE,
+        amount DECIMAL(12,2),
+        type TEXT,
+        source TEXT,
+        description TEXT,
+        import_key TEXT
+    )
+    ON CONFLICT (company_id, import_key) DO NOTHING;
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION public.vigia_import_entries(JSONB) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,62 @@
+-- Cluster-wide job leases: one owner per (job run, shard) until the lease expires
+
+CREATE TABLE IF NOT EXISTS public.vigia_job_leases (
+    name TEXT NOT NULL,
+    shard INT NOT NULL DEFAULT 0,
+    owner TEXT NOT NULL,
+    acquired_at TIMESTAMPTZ DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (name, shard)
+);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_job_leases_expires_at ON public.vigia_job_leases(expires_at);
+
+CREATE OR REPLACE FUNCTION public.vigia_acquire_lease(p_name TEXT, p_shard INT, p_owner TEXT, p_ttl_seconds INT)
+RETURNS BOOLEAN AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    DELETE FROM public.vigia_job_leases WHERE expires_at < now() - INTERVAL '7 days';
+
+    INSERT INTO public.vigia_job_leases (name, shard, owner, acquired_at, expires_at)
+    VALUES (p_name, p_shard, p_owner, now(), now() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name, shard) DO UPDATE
+    SET owner = EXCLUDED.owner,
+        acquired_at = EXCLUDED.acquired_at,
+        expires_at = EXCLUDED.expires_at
+    WHERE public.vigia_job_leases.expires_at < now()
+       OR public.vigia_job_leases.owner = EXCLUDED.owner
+    RETURNING true INTO acquired;
+
+    RETURN COALESCE(acquired, false);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_release_lease(p_name TEXT, p_shard INT, p_owner TEXT)
+RETURNS BOOLEAN AS $$
+BEGIN
+    DELETE FROM public.vigia_job_leases WHERE name = p_name AND shard = p_shard AND owner = p_owner;
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Idempotent "report sent" markers on vigia_companies.last_report_sent_at
+CREATE OR REPLACE FUNCTION public.vigia_mark_reports_sent(p_company_ids UUID[], p_sent_at TIMESTAMPTZ)
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    UPDATE public.vigia_companies
+    SET last_report_sent_at = p_sent_at
+    WHERE id = ANY(p_company_ids);
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT ALL ON public.vigia_job_leases TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_acquire_lease(TEXT, INT, TEXT, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_release_lease(TEXT, INT, TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_mark_reports_sent(UUID[], TIMESTAMPTZ) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
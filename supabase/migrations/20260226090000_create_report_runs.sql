@@ -0,0 +1,66 @@
+-- Persisted daily report runs: one row per run date, one status row per company
+
+CREATE TABLE IF NOT EXISTS public.vigia_report_runs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    run_date DATE NOT NULL UNIQUE,
+    shards INT NOT NULL,
+    completed_shards INT[] NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'running',
+    sent INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    skipped INT NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ DEFAULT now(),
+    finished_at TIMESTAMPTZ,
+    CONSTRAINT chk_report_run_status CHECK (status IN ('running', 'completed'))
+);
+
+CREATE TABLE IF NOT EXISTS public.vigia_report_deliveries (
+    run_id UUID NOT NULL REFERENCES public.vigia_report_runs(id) ON DELETE CASCADE,
+    company_id UUID NOT NULL REFERENCES public.vigia_companies(id) ON DELETE CASCADE,
+    shard INT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    message_id BIGINT,
+    error TEXT,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (run_id, company_id),
+    CONSTRAINT chk_report_delivery_status CHECK (status IN ('pending', 'sent', 'failed'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_report_deliveries_shard ON public.vigia_report_deliveries(run_id, shard, status);
+
+CREATE OR REPLACE FUNCTION public.vigia_start_report_run(p_run_date DATE, p_shards INT)
+RETURNS SETOF public.vigia_report_runs AS $$
+BEGIN
+    INSERT INTO public.vigia_report_runs (run_date, shards)
+    VALUES (p_run_date, p_shards)
+    ON CONFLICT (run_date) DO NOTHING;
+
+    RETURN QUERY SELECT * FROM public.vigia_report_runs WHERE run_date = p_run_date;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_complete_report_shard(p_run_id UUID, p_shard INT, p_sent INT, p_failed INT, p_skipped INT)
+RETURNS SETOF public.vigia_report_runs AS $$
+BEGIN
+    UPDATE public.vigia_report_runs
+    SET completed_shards = completed_shards || p_shard,
+        sent = sent + p_sent,
+        failed = failed + p_failed,
+        skipped = skipped + p_skipped
+    WHERE id = p_run_id AND NOT (p_shard = ANY(completed_shards));
+
+    UPDATE public.vigia_report_runs
+    SET status = 'completed', finished_at = now()
+    WHERE id = p_run_id AND status = 'running' AND cardinality(completed_shards) >= shards;
+
+    RETURN QUERY SELECT * FROM public.vigia_report_runs WHERE id = p_run_id;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT ALL ON public.vigia_report_runs TO service_role;
+GRANT ALL ON public.vigia_report_deliveries TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_start_report_run(DATE, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_complete_report_shard(UUID, INT, INT, INT, INT) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
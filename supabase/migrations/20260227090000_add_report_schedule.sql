@@ -0,0 +1,83 @@
+-- Per-company report schedule: local timezone, preferred hour and a stable offset inside the delivery window
+
+ALTER TABLE public.vigia_companies ADD COLUMN IF NOT EXISTS timezone TEXT NOT NULL DEFAULT 'America/Sao_Paulo';
+ALTER TABLE public.vigia_companies ADD COLUMN IF NOT EXISTS report_hour SMALLINT NOT NULL DEFAULT 7;
+ALTER TABLE public.vigia_companies ADD COLUMN IF NOT EXISTS report_offset SMALLINT
+    GENERATED ALWAYS AS (((hashtext(id::text)::BIGINT & 2147483647) % 60)::SMALLINT) STORED;
+
+ALTER TABLE public.vigia_companies DROP CONSTRAINT IF EXISTS chk_report_hour;
+ALTER TABLE public.vigia_companies ADD CONSTRAINT chk_report_hour CHECK (report_hour BETWEEN 0 AND 23);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_companies_report_schedule
+    ON public.vigia_companies(report_hour, timezone, report_offset)
+    WHERE status = 'active';
+
+CREATE OR REPLACE FUNCTION public.vigia_report_timezones()
+RETURNS TABLE (timezone TEXT) AS $$
+    SELECT DISTINCT c.timezone FROM public.vigia_companies c WHERE c.status = 'active';
+$$ LANGUAGE sql STABLE;
+
+-- Runs are keyed by run_key ('daily:<date>' or 'slot:<utc slot start>') instead of run_date
+ALTER TABLE public.vigia_report_runs ADD COLUMN IF NOT EXISTS run_key TEXT;
+UPDATE public.vigia_report_runs SET run_key = 'daily:' || run_date WHERE run_key IS NULL;
+ALTER TABLE public.vigia_report_runs ALTER COLUMN run_key SET NOT NULL;
+ALTER TABLE public.vigia_report_runs DROP CONSTRAINT IF EXISTS vigia_report_runs_run_date_key;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vigia_report_runs_run_key ON public.vigia_report_runs(run_key);
+CREATE INDEX IF NOT EXISTS idx_vigia_report_runs_status ON public.vigia_report_runs(status, started_at);
+
+DROP FUNCTION IF EXISTS public.vigia_start_report_run(DATE, INT);
+
+CREATE OR REPLACE FUNCTION public.vigia_start_report_run(p_run_key TEXT, p_run_date DATE, p_shards INT)
+RETURNS SETOF public.vigia_report_runs AS $$
+BEGIN
+    INSERT INTO public.vigia_report_runs (run_key, run_date, shards)
+    VALUES (p_run_key, p_run_date, p_shards)
+    ON CONFLICT (run_key) DO NOTHING;
+
+    RETURN QUERY SELECT * FROM public.vigia_report_runs WHERE run_key = p_run_key;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Report metrics for the companies due in one delivery slot
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics_for(p_company_ids UUID[], p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    WITH revenue AS (
+        SELECT r.company_id,
+               SUM(r.revenue_total) FILTER (WHERE r.day = p_as_of - 1) AS yesterday_revenue,
+               SUM(r.revenue_total) AS revenue_7d
+        FROM public.vigia_daily_rollups r
+        WHERE r.company_id = ANY(p_company_ids) AND r.day >= p_as_of - 7
+        GROUP BY r.company_id
+    ),
+    overdue AS (
+        SELECT rc.company_id, COUNT(*) AS overdue_count, SUM(rc.amount) AS overdue_total
+        FROM public.vigia_receivables rc
+        WHERE rc.company_id = ANY(p_company_ids) AND rc.status IN ('pending', 'overdue')
+        GROUP BY rc.company_id
+    )
+    SELECT
+        c.id,
+        COALESCE(rv.yesterday_revenue, 0),
+        COALESCE(rv.revenue_7d, 0) / 7,
+        COALESCE(b.balance, 0),
+        COALESCE(o.overdue_count, 0),
+        COALESCE(o.overdue_total, 0)
+    FROM public.vigia_companies c
+    LEFT JOIN revenue rv ON rv.company_id = c.id
+    LEFT JOIN public.vigia_company_balances b ON b.company_id = c.id
+    LEFT JOIN overdue o ON o.company_id = c.id
+    WHERE c.id = ANY(p_company_ids);
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.vigia_report_timezones() TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_start_report_run(TEXT, DATE, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_report_metrics_for(UUID[], DATE) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,124 @@
+-- Receivables: index for due-date scans, set-based overdue sweep and grouped per-company totals
+
+DROP INDEX IF EXISTS public.idx_vigia_receivables_company_status;
+CREATE INDEX IF NOT EXISTS idx_vigia_receivables_open
+    ON public.vigia_receivables(company_id, due_date) INCLUDE (amount, status)
+    WHERE status IN ('pending', 'overdue');
+CREATE INDEX IF NOT EXISTS idx_vigia_receivables_pending_due
+    ON public.vigia_receivables(due_date)
+    WHERE status = 'pending';
+
+CREATE OR REPLACE FUNCTION public.vigia_mark_overdue_receivables(p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS INT AS $$
+DECLARE
+    v_count INT;
+BEGIN
+    UPDATE public.vigia_receivables
+    SET status = 'overdue', updated_at = now()
+    WHERE status = 'pending' AND due_date < p_as_of;
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A pending receivable past its due date counts as overdue even before the sweep flips it
+CREATE OR REPLACE FUNCTION public.vigia_receivable_totals(p_company_ids UUID[] DEFAULT NULL, p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    open_count BIGINT,
+    open_total NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC,
+    next_due_date DATE
+) AS $$
+    SELECT
+        rc.company_id,
+        COUNT(*),
+        SUM(rc.amount),
+        COUNT(*) FILTER (WHERE rc.status = 'overdue' OR rc.due_date < p_as_of),
+        COALESCE(SUM(rc.amount) FILTER (WHERE rc.status = 'overdue' OR rc.due_date < p_as_of), 0),
+        MIN(rc.due_date) FILTER (WHERE rc.due_date >= p_as_of)
+    FROM public.vigia_receivables rc
+    WHERE rc.status IN ('pending', 'overdue')
+      AND (p_company_ids IS NULL OR rc.company_id = ANY(p_company_ids))
+    GROUP BY rc.company_id;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics(p_company_id UUID, p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    SELECT * FROM public.vigia_report_metrics_for(ARRAY[p_company_id], p_as_of);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics_for(p_company_ids UUID[], p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    WITH revenue AS (
+        SELECT r.company_id,
+               SUM(r.revenue_total) FILTER (WHERE r.day = p_as_of - 1) AS yesterday_revenue,
+               SUM(r.revenue_total) AS revenue_7d
+        FROM public.vigia_daily_rollups r
+        WHERE r.company_id = ANY(p_company_ids) AND r.day >= p_as_of - 7
+        GROUP BY r.company_id
+    )
+    SELECT
+        c.id,
+        COALESCE(rv.yesterday_revenue, 0),
+        COALESCE(rv.revenue_7d, 0) / 7,
+        COALESCE(b.balance, 0),
+        COALESCE(t.overdue_count, 0),
+        COALESCE(t.overdue_total, 0)
+    FROM public.vigia_companies c
+    LEFT JOIN revenue rv ON rv.company_id = c.id
+    LEFT JOIN public.vigia_company_balances b ON b.company_id = c.id
+    LEFT JOIN public.vigia_receivable_totals(p_company_ids, p_as_of) t ON t.company_id = c.id
+    WHERE c.id = ANY(p_company_ids);
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.vigia_report_metrics_all(p_as_of DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    company_id UUID,
+    yesterday_revenue NUMERIC,
+    avg_revenue_7d NUMERIC,
+    cash_balance NUMERIC,
+    overdue_count BIGINT,
+    overdue_total NUMERIC
+) AS $$
+    WITH revenue AS (
+        SELECT r.company_id,
+               SUM(r.revenue_total) FILTER (WHERE r.day = p_as_of - 1) AS yesterday_revenue,
+               SUM(r.revenue_total) AS revenue_7d
+        FROM public.vigia_daily_rollups r
+        WHERE r.day >= p_as_of - 7
+        GROUP BY r.company_id
+    )
+    SELECT
+        c.id,
+        COALESCE(rv.yesterday_revenue, 0),
+        COALESCE(rv.revenue_7d, 0) / 7,
+        COALESCE(b.balance, 0),
+        COALESCE(t.overdue_count, 0),
+        COALESCE(t.overdue_total, 0)
+    FROM public.vigia_companies c
+    LEFT JOIN revenue rv ON rv.company_id = c.id
+    LEFT JOIN public.vigia_company_balances b ON b.company_id = c.id
+    LEFT JOIN public.vigia_receivable_totals(NULL, p_as_of) t ON t.company_id = c.id
+    WHERE c.status = 'active';
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.vigia_mark_overdue_receivables(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_receivable_totals(UUID[], DATE) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,55 @@
+-- Alert engine: at most one unresolved alert per company, type and severity
+
+CREATE INDEX IF NOT EXISTS idx_vigia_alerts_open
+    ON public.vigia_alerts(company_id, alert_type)
+    WHERE resolved_at IS NULL;
+
+-- Resolves open alerts of the same type with another severity and inserts the new one
+-- unless an identical alert is still open. Returns the inserted row, or nothing when deduplicated.
+CREATE OR REPLACE FUNCTION public.vigia_raise_alert(
+    p_company_id UUID,
+    p_alert_type TEXT,
+    p_severity TEXT,
+    p_message TEXT,
+    p_data JSONB DEFAULT NULL
+)
+RETURNS SETOF public.vigia_alerts AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(p_company_id::text || ':' || p_alert_type));
+
+    UPDATE public.vigia_alerts
+    SET resolved_at = now()
+    WHERE company_id = p_company_id AND alert_type = p_alert_type
+      AND resolved_at IS NULL AND severity <> p_severity;
+
+    IF EXISTS (
+        SELECT 1 FROM public.vigia_alerts
+        WHERE company_id = p_company_id AND alert_type = p_alert_type AND resolved_at IS NULL
+    ) THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    INSERT INTO public.vigia_alerts (company_id, alert_type, severity, message, data)
+    VALUES (p_company_id, p_alert_type, p_severity, p_message, p_data)
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_resolve_alerts(p_company_id UUID, p_alert_type TEXT)
+RETURNS INT AS $$
+DECLARE
+    v_count INT;
+BEGIN
+    UPDATE public.vigia_alerts
+    SET resolved_at = now()
+    WHERE company_id = p_company_id AND alert_type = p_alert_type AND resolved_at IS NULL;
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION public.vigia_raise_alert(UUID, TEXT, TEXT, TEXT, JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_resolve_alerts(UUID, TEXT) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
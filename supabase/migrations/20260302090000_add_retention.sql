@@ -0,0 +1,314 @@
+-- Retention: old message logs and entries move to monthly-partitioned archive tables.
+-- Compacted entries keep counting through vigia_company_balances and vigia_daily_rollups.
+
+DROP INDEX IF EXISTS public.idx_vigia_entries_created;
+CREATE INDEX IF NOT EXISTS idx_vigia_entries_entry_date ON public.vigia_entries(entry_date);
+CREATE INDEX IF NOT EXISTS idx_vigia_logs_created ON public.vigia_message_logs(created_at);
+
+CREATE TABLE IF NOT EXISTS public.vigia_message_logs_archive (
+    id UUID NOT NULL,
+    company_id UUID,
+    user_id UUID,
+    direction TEXT NOT NULL,
+    message_text TEXT,
+    telegram_message_id BIGINT,
+    payload JSONB,
+    created_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_logs_archive_company_created ON public.vigia_message_logs_archive(company_id, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS public.vigia_entries_archive (
+    id UUID NOT NULL,
+    company_id UUID NOT NULL REFERENCES public.vigia_companies(id) ON DELETE CASCADE,
+    user_id UUID,
+    entry_date DATE NOT NULL,
+    amount DECIMAL(12,2) NOT NULL,
+    type TEXT NOT NULL,
+    source TEXT,
+    description TEXT,
+    import_key TEXT,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    archived_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (id, entry_date)
+) PARTITION BY RANGE (entry_date);
+
+CREATE INDEX IF NOT EXISTS idx_vigia_entries_archive_company_date ON public.vigia_entries_archive(company_id, entry_date DESC);
+CREATE INDEX IF NOT EXISTS idx_vigia_entries_archive_import_key ON public.vigia_entries_archive(company_id, import_key) WHERE import_key IS NOT NULL;
+
+-- What compaction has taken out of vigia_entries, per company
+CREATE TABLE IF NOT EXISTS public.vigia_compacted_balances (
+    company_id UUID PRIMARY KEY REFERENCES public.vigia_companies(id) ON DELETE CASCADE,
+    balance DECIMAL(14,2) NOT NULL DEFAULT 0,
+    entry_count BIGINT NOT NULL DEFAULT 0,
+    compacted_through DATE NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION public.vigia_ensure_month_partitions(p_table TEXT, p_from DATE, p_to DATE)
+RETURNS INT AS $$
+DECLARE
+    month DATE := date_trunc('month', p_from)::DATE;
+    created INT := 0;
+    partition TEXT;
+BEGIN
+    WHILE month <= p_to LOOP
+        partition := format('%s_p%s', p_table, to_char(month, 'YYYYMM'));
+        IF to_regclass(format('public.%I', partition)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE public.%I PARTITION OF public.%I FOR VALUES FROM (%L) TO (%L)',
+                partition, p_table, month, (month + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+        month := (month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_archive_message_logs(p_before TIMESTAMPTZ, p_limit INT DEFAULT 5000)
+RETURNS INT AS $$
+DECLARE
+    oldest TIMESTAMPTZ;
+    newest TIMESTAMPTZ;
+    moved INT;
+BEGIN
+    CREATE TEMP TABLE IF NOT EXISTS vigia_logs_batch (id UUID PRIMARY KEY) ON COMMIT DROP;
+    TRUNCATE vigia_logs_batch;
+
+    INSERT INTO vigia_logs_batch
+    SELECT id FROM public.vigia_message_logs
+    WHERE created_at < p_before
+    ORDER BY created_at
+    LIMIT p_limit;
+
+    SELECT MIN(l.created_at), MAX(l.created_at) INTO oldest, newest
+    FROM public.vigia_message_logs l JOIN vigia_logs_batch b ON b.id = l.id;
+    IF oldest IS NULL THEN
+        RETURN 0;
+    END IF;
+    PERFORM public.vigia_ensure_month_partitions('vigia_message_logs_archive', oldest::DATE, newest::DATE);
+
+    WITH removed AS (
+        DELETE FROM public.vigia_message_logs l
+        USING vigia_logs_batch b
+        WHERE l.id = b.id
+        RETURNING l.*
+    )
+    INSERT INTO public.vigia_message_logs_archive (id, company_id, user_id, direction, message_text, telegram_message_id, payload, created_at)
+    SELECT id, company_id, user_id, direction, message_text, telegram_message_id, payload, created_at FROM removed;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_drop_message_log_partitions(p_before DATE)
+RETURNS INT AS $$
+DECLARE
+    partition RECORD;
+    dropped INT := 0;
+BEGIN
+    FOR partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.vigia_message_logs_archive'::regclass
+          AND c.relname ~ '_p[0-9]{6}$'
+          AND (to_date(right(c.relname, 6), 'YYYYMM') + INTERVAL '1 month')::DATE <= p_before
+    LOOP
+        EXECUTE format('DROP TABLE public.%I', partition.relname);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers skip rows that compaction moves out: their amounts stay in balances and rollups
+CREATE OR REPLACE FUNCTION public.vigia_apply_entry_to_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' AND current_setting('vigia.compacting', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.vigia_company_balances
+        SET balance = balance - CASE WHEN OLD.type = 'revenue' THEN OLD.amount ELSE -OLD.amount END,
+            entry_count = entry_count - 1,
+            updated_at = now()
+        WHERE company_id = OLD.company_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.vigia_company_balances (company_id, balance, entry_count, updated_at)
+        VALUES (NEW.company_id, CASE WHEN NEW.type = 'revenue' THEN NEW.amount ELSE -NEW.amount END, 1, now())
+        ON CONFLICT (company_id) DO UPDATE
+        SET balance = public.vigia_company_balances.balance + EXCLUDED.balance,
+            entry_count = public.vigia_company_balances.entry_count + 1,
+            updated_at = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_apply_entry_to_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' AND current_setting('vigia.compacting', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.vigia_daily_rollups
+        SET revenue_total = revenue_total - CASE WHEN OLD.type = 'revenue' THEN OLD.amount ELSE 0 END,
+            expense_total = expense_total - CASE WHEN OLD.type = 'expense' THEN OLD.amount ELSE 0 END,
+            entry_count = entry_count - 1,
+            updated_at = now()
+        WHERE company_id = OLD.company_id AND day = OLD.entry_date;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO public.vigia_daily_rollups (company_id, day, revenue_total, expense_total, entry_count, updated_at)
+        VALUES (
+            NEW.company_id,
+            NEW.entry_date,
+            CASE WHEN NEW.type = 'revenue' THEN NEW.amount ELSE 0 END,
+            CASE WHEN NEW.type = 'expense' THEN NEW.amount ELSE 0 END,
+            1,
+            now()
+        )
+        ON CONFLICT (company_id, day) DO UPDATE
+        SET revenue_total = public.vigia_daily_rollups.revenue_total + EXCLUDED.revenue_total,
+            expense_total = public.vigia_daily_rollups.expense_total + EXCLUDED.expense_total,
+            entry_count = public.vigia_daily_rollups.entry_count + 1,
+            updated_at = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.vigia_compact_entries(p_before DATE, p_limit INT DEFAULT 5000)
+RETURNS INT AS $$
+DECLARE
+    oldest DATE;
+    newest DATE;
+    moved INT;
+BEGIN
+    CREATE TEMP TABLE IF NOT EXISTS vigia_entries_batch (id UUID PRIMARY KEY) ON COMMIT DROP;
+    TRUNCATE vigia_entries_batch;
+
+    INSERT INTO vigia_entries_batch
+    SELECT id FROM public.vigia_entries
+    WHERE entry_date < p_before
+    ORDER BY entry_date
+    LIMIT p_limit;
+
+    SELECT MIN(e.entry_date), MAX(e.entry_date) INTO oldest, newest
+    FROM public.vigia_entries e JOIN vigia_entries_batch b ON b.id = e.id;
+    IF oldest IS NULL THEN
+        RETURN 0;
+    END IF;
+    PERFORM public.vigia_ensure_month_partitions('vigia_entries_archive', oldest, newest);
+    PERFORM set_config('vigia.compacting', 'on', true);
+
+    WITH removed AS (
+        DELETE FROM public.vigia_entries e
+        USING vigia_entries_batch b
+        WHERE e.id = b.id
+        RETURNING e.*
+    ),
+    archived AS (
+        INSERT INTO public.vigia_entries_archive (id, company_id, user_id, entry_date, amount, type, source, description, import_key, created_at, updated_at)
+        SELECT id, company_id, user_id, entry_date, amount, type, source, description, import_key, created_at, updated_at FROM removed
+        RETURNING company_id, entry_date, amount, type
+    )
+    INSERT INTO public.vigia_compacted_balances (company_id, balance, entry_count, compacted_through, updated_at)
+    SELECT company_id,
+           SUM(CASE WHEN type = 'revenue' THEN amount ELSE -amount END),
+           COUNT(*),
+           MAX(entry_date),
+           now()
+    FROM archived
+    GROUP BY company_id
+    ON CONFLICT (company_id) DO UPDATE
+    SET balance = public.vigia_compacted_balances.balance + EXCLUDED.balance,
+        entry_count = public.vigia_compacted_balances.entry_count + EXCLUDED.entry_count,
+        compacted_through = GREATEST(public.vigia_compacted_balances.compacted_through, EXCLUDED.compacted_through),
+        updated_at = now();
+
+    PERFORM set_config('vigia.compacting', 'off', true);
+    SELECT COUNT(*) INTO moved FROM vigia_entries_batch;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollup rebuilds read the archive too, so compacted days are not lost
+CREATE OR REPLACE FUNCTION public.vigia_rebuild_daily_rollups(p_company_id UUID DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    affected INT;
+BEGIN
+    DELETE FROM public.vigia_daily_rollups
+    WHERE p_company_id IS NULL OR company_id = p_company_id;
+
+    INSERT INTO public.vigia_daily_rollups (company_id, day, revenue_total, expense_total, entry_count, updated_at)
+    SELECT company_id,
+           entry_date,
+           COALESCE(SUM(amount) FILTER (WHERE type = 'revenue'), 0),
+           COALESCE(SUM(amount) FILTER (WHERE type = 'expense'), 0),
+           COUNT(*),
+           now()
+    FROM (
+        SELECT company_id, entry_date, amount, type FROM public.vigia_entries
+        UNION ALL
+        SELECT company_id, entry_date, amount, type FROM public.vigia_entries_archive
+    ) e
+    WHERE p_company_id IS NULL OR company_id = p_company_id
+    GROUP BY company_id, entry_date;
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Re-importing a statement must not bring back lines that were already archived
+CREATE OR REPLACE FUNCTION public.vigia_import_entries(p_rows JSONB)
+RETURNS INT AS $$
+DECLARE
+    inserted INT;
+BEGIN
+    INSERT INTO public.vigia_entries (company_id, user_id, entry_date, amount, type, source, description, import_key)
+    SELECT r.company_id, r.user_id, r.entry_date, r.amount, r.type, COALESCE(r.source, 'import'), r.description, r.import_key
+    FROM jsonb_to_recordset(p_rows) AS r(
+        company_id UUID,
+        user_id UUID,
+        entry_date DATE,
+        amount DECIMAL(12,2),
+        type TEXT,
+        source TEXT,
+        description TEXT,
+        import_key TEXT
+    )
+    WHERE NOT EXISTS (
+        SELECT 1 FROM public.vigia_entries_archive a
+        WHERE a.company_id = r.company_id AND a.import_key = r.import_key AND a.entry_date = r.entry_date
+    )
+    ON CONFLICT (company_id, import_key) DO NOTHING;
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT ALL ON public.vigia_message_logs_archive TO service_role;
+GRANT ALL ON public.vigia_entries_archive TO service_role;
+GRANT ALL ON public.vigia_compacted_balances TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_archive_message_logs(TIMESTAMPTZ, INT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_drop_message_log_partitions(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.vigia_compact_entries(DATE, INT) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,31 @@
+-- Settling a receivable and recording its revenue entry happen in one transaction
+
+CREATE OR REPLACE FUNCTION public.vigia_settle_receivable(
+    p_id UUID,
+    p_company_id UUID,
+    p_paid_at TIMESTAMPTZ DEFAULT now(),
+    p_entry_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS SETOF public.vigia_receivables AS $$
+DECLARE
+    v_receivable public.vigia_receivables;
+BEGIN
+    UPDATE public.vigia_receivables
+    SET status = 'paid', paid_at = p_paid_at, updated_at = now()
+    WHERE id = p_id AND company_id = p_company_id AND status IN ('pending', 'overdue')
+    RETURNING * INTO v_receivable;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.vigia_entries (company_id, entry_date, amount, type, source, description)
+    VALUES (v_receivable.company_id, p_entry_date, v_receivable.amount, 'revenue', 'receivable', v_receivable.client_name);
+
+    RETURN NEXT v_receivable;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION public.vigia_settle_receivable(UUID, UUID, TIMESTAMPTZ, DATE) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
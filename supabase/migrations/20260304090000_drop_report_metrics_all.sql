@@ -0,0 +1,5 @@
+-- Reports read metrics per shard through vigia_report_metrics_for; the unpaginated portfolio variant has no caller
+
+DROP FUNCTION IF EXISTS public.vigia_report_metrics_all(DATE);
+
+NOTIFY pgrst, 'reload schema';
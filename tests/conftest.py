@@ -0,0 +1,50 @@
+import pytest
+
+from src import database
+from src.config import settings
+from src.services import outbox
+from src.services import telegram as telegram_service
+from src.services.audit import audit_log
+from src.services.cache import clear_caches
+from src.services.dedup import deduplicator
+from tests.fakes import FakePostgrest, FakeTelegram, use_fake_database
+
+
+@pytest.fixture(autouse=True)
+def reset_deduplicator():
+    deduplicator.clear()
+    yield
+    deduplicator.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_audit_log():
+    audit_log.clear()
+    yield
+    audit_log.clear()
+
+
+@pytest.fixture
+def fake_db():
+    fake = FakePostgrest()
+    use_fake_database(fake)
+    clear_caches()
+    yield fake
+    clear_caches()
+    database._async_client = None
+    database._async_service_client = None
+
+
+@pytest.fixture
+def fake_telegram(monkeypatch):
+    monkeypatch.setattr(settings, "telegram_chat_interval_seconds", 0.0)
+    return FakeTelegram()
+
+
+@pytest.fixture
+def fake_bot(fake_telegram):
+    telegram_service.get_bot(fake_telegram.request())
+    outbox._sender = None
+    yield fake_telegram
+    outbox._sender = None
+    telegram_service._bot = None
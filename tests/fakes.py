@@ -0,0 +1,692 @@
+import asyncio
+import bisect
+import json
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable
+from urllib.parse import parse_qsl
+
+import httpx
+from telegram.request import HTTPXRequest
+
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_INDEXED_COLUMNS = ("id", "company_id", "chat_id")
+
+
+def _coerce(raw: str, sample):
+    if raw == "null":
+        return None
+    if isinstance(sample, bool):
+        return raw == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _matches(row: dict, column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, arg = expression.partition(".")
+    value = row.get(column)
+    if op == "is":
+        result = value is None if arg == "null" else value == (arg == "true")
+    elif op == "in":
+        options = [o.strip('"') for o in arg.strip("()").split(",")] if arg.strip("()") else []
+        result = str(value) in options
+    else:
+        target = _coerce(arg, value)
+        if value is None or target is None:
+            result = op == "eq" and value is None and target is None
+        elif isinstance(target, float) and not isinstance(value, str):
+            value = float(value)
+            result = _compare(op, value, target)
+        else:
+            result = _compare(op, str(value), str(target))
+    return not result if negate else result
+
+
+def _compare(op: str, value, target) -> bool:
+    if op == "eq":
+        return value == target
+    if op == "neq":
+        return value != target
+    if op == "gt":
+        return value > target
+    if op == "gte":
+        return value >= target
+    if op == "lt":
+        return value < target
+    if op == "lte":
+        return value <= target
+    raise ValueError(f"operador não suportado: {op}")
+
+
+def _split_top_level(expression: str) -> list[str]:
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _matches_logical(row: dict, op: str, expression: str) -> bool:
+    results = []
+    for condition in _split_top_level(expression.strip()[1:-1]):
+        if condition.startswith(("and(", "or(")):
+            inner_op, _, inner = condition.partition("(")
+            results.append(_matches_logical(row, inner_op, "(" + inner))
+        else:
+            column, _, rest = condition.partition(".")
+            results.append(_matches(row, column, rest))
+    return all(results) if op == "and" else any(results)
+
+
+def _take_balance_snapshots(fake: "FakePostgrest", p_snapshot_date: str) -> int:
+    balances = fake.tables["vigia_company_balances"]
+    for row in balances:
+        fake.insert("vigia_balance_snapshots", {
+            "company_id": row["company_id"], "snapshot_date": p_snapshot_date, "balance": row["balance"],
+        })
+    return len(balances)
+
+
+def _touch_users(fake: "FakePostgrest", p_touches: list[dict]) -> int:
+    users = fake._index("vigia_users", "id")
+    touched = 0
+    for touch in p_touches:
+        for user in users.get(touch["id"], []):
+            user["last_interaction_at"] = touch["seen_at"]
+            touched += 1
+    return touched
+
+
+def _import_entries(fake: "FakePostgrest", p_rows: list[dict]) -> int:
+    existing: dict[str, set] = {}
+    inserted = 0
+    for row in p_rows:
+        keys = existing.get(row["company_id"])
+        if keys is None:
+            entries = fake._index("vigia_entries", "company_id").get(str(row["company_id"]), [])
+            archived = [e for e in fake.tables["vigia_entries_archive"] if e["company_id"] == row["company_id"]]
+            keys = existing[row["company_id"]] = {e.get("import_key") for e in entries + archived if e.get("import_key")}
+        if row["import_key"] in keys:
+            continue
+        keys.add(row["import_key"])
+        fake.insert("vigia_entries", {**row, "source": row.get("source") or "import"})
+        inserted += 1
+    return inserted
+
+
+def _acquire_lease(fake: "FakePostgrest", p_name: str, p_shard: int, p_owner: str, p_ttl_seconds: int) -> bool:
+    leases = fake.tables["vigia_job_leases"]
+    lease = next((l for l in leases if l["name"] == p_name and l["shard"] == p_shard), None)
+    if lease is None:
+        lease = {"name": p_name, "shard": p_shard}
+        leases.append(lease)
+    elif lease["owner"] != p_owner and lease["expires_at"] > time.time():
+        return False
+    lease.update(owner=p_owner, expires_at=time.time() + p_ttl_seconds)
+    return True
+
+
+def _release_lease(fake: "FakePostgrest", p_name: str, p_shard: int, p_owner: str) -> bool:
+    leases = fake.tables["vigia_job_leases"]
+    remaining = [l for l in leases if not (l["name"] == p_name and l["shard"] == p_shard and l["owner"] == p_owner)]
+    fake.tables["vigia_job_leases"] = remaining
+    return len(remaining) < len(leases)
+
+
+def _mark_reports_sent(fake: "FakePostgrest", p_company_ids: list[str], p_sent_at: str) -> int:
+    companies = fake._index("vigia_companies", "id")
+    marked = 0
+    for company_id in p_company_ids:
+        for company in companies.get(company_id, []):
+            company["last_report_sent_at"] = p_sent_at
+            marked += 1
+    return marked
+
+
+def _start_report_run(fake: "FakePostgrest", p_run_key: str, p_run_date: str, p_shards: int) -> list[dict]:
+    run = next((r for r in fake.tables["vigia_report_runs"] if r["run_key"] == p_run_key), None)
+    if run is None:
+        run = fake.insert("vigia_report_runs", {
+            "run_key": p_run_key, "run_date": p_run_date, "shards": p_shards, "completed_shards": [],
+            "status": "running", "sent": 0, "failed": 0, "skipped": 0,
+            "started_at": datetime.now(timezone.utc).isoformat(), "finished_at": None,
+        })
+    return [dict(run)]
+
+
+def _complete_report_shard(fake: "FakePostgrest", p_run_id: str, p_shard: int, p_sent: int, p_failed: int, p_skipped: int) -> list[dict]:
+    run = next(r for r in fake.tables["vigia_report_runs"] if r["id"] == p_run_id)
+    if p_shard not in run["completed_shards"]:
+        run["completed_shards"] = run["completed_shards"] + [p_shard]
+        run["sent"] += p_sent
+        run["failed"] += p_failed
+        run["skipped"] += p_skipped
+    if run["status"] == "running" and len(run["completed_shards"]) >= run["shards"]:
+        run["status"] = "completed"
+        run["finished_at"] = datetime.now(timezone.utc).isoformat()
+    return [dict(run)]
+
+
+def _rebuild_daily_rollups(fake: "FakePostgrest", p_company_id: str | None = None) -> int:
+    fake.tables["vigia_daily_rollups"] = [
+        r for r in fake.tables["vigia_daily_rollups"] if p_company_id is not None and r["company_id"] != p_company_id
+    ]
+    fake._indexes = {k: v for k, v in fake._indexes.items() if k[0] != "vigia_daily_rollups"}
+    before = len(fake.tables["vigia_daily_rollups"])
+    for entry in fake.tables["vigia_entries"] + fake.tables["vigia_entries_archive"]:
+        if p_company_id is None or entry["company_id"] == p_company_id:
+            fake._apply_entry_to_rollup(entry, 1)
+    return len(fake.tables["vigia_daily_rollups"]) - before
+
+
+def _archive_message_logs(fake: "FakePostgrest", p_before: str, p_limit: int) -> int:
+    before = datetime.fromisoformat(p_before)
+    old = sorted(
+        (r for r in fake.tables["vigia_message_logs"] if datetime.fromisoformat(r["created_at"]) < before),
+        key=lambda r: r["created_at"],
+    )[:p_limit]
+    moved = {id(r) for r in old}
+    fake.tables["vigia_message_logs"] = [r for r in fake.tables["vigia_message_logs"] if id(r) not in moved]
+    fake._indexes = {k: v for k, v in fake._indexes.items() if k[0] != "vigia_message_logs"}
+    archived_at = datetime.now(timezone.utc).isoformat()
+    fake.tables["vigia_message_logs_archive"].extend({**r, "archived_at": archived_at} for r in old)
+    return len(old)
+
+
+def _drop_message_log_partitions(fake: "FakePostgrest", p_before: str) -> int:
+    def month(row: dict) -> date:
+        return datetime.fromisoformat(row["created_at"]).date().replace(day=1)
+
+    def month_end(first: date) -> date:
+        return (first + timedelta(days=32)).replace(day=1)
+
+    rows = fake.tables["vigia_message_logs_archive"]
+    expired = {month(r) for r in rows if month_end(month(r)) <= date.fromisoformat(p_before)}
+    fake.tables["vigia_message_logs_archive"] = [r for r in rows if month(r) not in expired]
+    return len(expired)
+
+
+def _compact_entries(fake: "FakePostgrest", p_before: str, p_limit: int) -> int:
+    old = sorted((e for e in fake.tables["vigia_entries"] if e["entry_date"] < p_before), key=lambda e: e["entry_date"])[:p_limit]
+    moved = {id(e) for e in old}
+    fake.tables["vigia_entries"] = [e for e in fake.tables["vigia_entries"] if id(e) not in moved]
+    fake._indexes = {k: v for k, v in fake._indexes.items() if k[0] != "vigia_entries"}
+    archived_at = datetime.now(timezone.utc).isoformat()
+    compacted = fake._index("vigia_compacted_balances", "company_id")
+    for entry in old:
+        fake.tables["vigia_entries_archive"].append({**entry, "archived_at": archived_at})
+        signed = float(entry["amount"]) if entry["type"] == "revenue" else -float(entry["amount"])
+        rows = compacted.get(str(entry["company_id"]))
+        if rows:
+            rows[0]["balance"] += signed
+            rows[0]["entry_count"] += 1
+            rows[0]["compacted_through"] = max(rows[0]["compacted_through"], entry["entry_date"])
+        else:
+            fake.insert("vigia_compacted_balances", {
+                "company_id": entry["company_id"], "balance": signed, "entry_count": 1, "compacted_through": entry["entry_date"],
+            })
+    return len(old)
+
+
+def _metrics_row(fake: "FakePostgrest", company_id: str, as_of: date) -> dict:
+    yesterday = (as_of - timedelta(days=1)).isoformat()
+    window_start = (as_of - timedelta(days=7)).isoformat()
+    revenue_7d = yesterday_revenue = 0.0
+    for r in fake._index("vigia_daily_rollups", "company_id").get(str(company_id), []):
+        if r["day"] >= window_start:
+            revenue_7d += float(r["revenue_total"])
+            if r["day"] == yesterday:
+                yesterday_revenue += float(r["revenue_total"])
+    balance = fake._index("vigia_company_balances", "company_id").get(str(company_id), [])
+    totals = _receivable_totals(fake, [company_id], as_of.isoformat())
+    return {
+        "company_id": company_id,
+        "yesterday_revenue": yesterday_revenue,
+        "avg_revenue_7d": revenue_7d / 7,
+        "cash_balance": balance[0]["balance"] if balance else 0,
+        "overdue_count": totals[0]["overdue_count"] if totals else 0,
+        "overdue_total": totals[0]["overdue_total"] if totals else 0,
+    }
+
+
+def _receivable_totals(fake: "FakePostgrest", p_company_ids: list[str] | None, p_as_of: str) -> list[dict]:
+    if p_company_ids is None:
+        candidates = fake.tables["vigia_receivables"]
+    else:
+        index = fake._index("vigia_receivables", "company_id")
+        candidates = [r for company_id in p_company_ids for r in index.get(str(company_id), [])]
+    totals: dict[str, dict] = {}
+    for r in candidates:
+        if r.get("status") not in ("pending", "overdue"):
+            continue
+        row = totals.setdefault(r["company_id"], {
+            "company_id": r["company_id"], "open_count": 0, "open_total": 0.0,
+            "overdue_count": 0, "overdue_total": 0.0, "next_due_date": None,
+        })
+        row["open_count"] += 1
+        row["open_total"] += float(r["amount"])
+        if r["status"] == "overdue" or r["due_date"] < p_as_of:
+            row["overdue_count"] += 1
+            row["overdue_total"] += float(r["amount"])
+        elif row["next_due_date"] is None or r["due_date"] < row["next_due_date"]:
+            row["next_due_date"] = r["due_date"]
+    return list(totals.values())
+
+
+def _raise_alert(fake: "FakePostgrest", p_company_id: str, p_alert_type: str, p_severity: str, p_message: str, p_data: dict | None = None) -> list[dict]:
+    now = datetime.now(timezone.utc).isoformat()
+    open_alerts = [
+        a for a in fake.tables["vigia_alerts"]
+        if a["company_id"] == p_company_id and a["alert_type"] == p_alert_type and a.get("resolved_at") is None
+    ]
+    for alert in open_alerts:
+        if alert["severity"] != p_severity:
+            alert["resolved_at"] = now
+    if any(a["resolved_at"] is None for a in open_alerts):
+        return []
+    return [dict(fake.insert("vigia_alerts", {
+        "company_id": p_company_id, "alert_type": p_alert_type, "severity": p_severity, "message": p_message,
+        "data": p_data, "sent_at": now, "read_at": None, "resolved_at": None,
+    }))]
+
+
+def _resolve_alerts(fake: "FakePostgrest", p_company_id: str, p_alert_type: str) -> int:
+    resolved = 0
+    for alert in fake.tables["vigia_alerts"]:
+        if alert["company_id"] == p_company_id and alert["alert_type"] == p_alert_type and alert.get("resolved_at") is None:
+            alert["resolved_at"] = datetime.now(timezone.utc).isoformat()
+            resolved += 1
+    return resolved
+
+
+def _mark_overdue_receivables(fake: "FakePostgrest", p_as_of: str) -> int:
+    marked = 0
+    for r in fake.tables["vigia_receivables"]:
+        if r.get("status") == "pending" and r["due_date"] < p_as_of:
+            r["status"] = "overdue"
+            marked += 1
+    return marked
+
+
+def _settle_receivable(fake: "FakePostgrest", p_id: str, p_company_id: str, p_paid_at: str, p_entry_date: str) -> list[dict]:
+    receivable = next((
+        r for r in fake.tables["vigia_receivables"]
+        if r["id"] == p_id and r["company_id"] == p_company_id and r.get("status") in ("pending", "overdue")
+    ), None)
+    if receivable is None:
+        return []
+    receivable.update(status="paid", paid_at=p_paid_at)
+    fake.insert("vigia_entries", {
+        "company_id": receivable["company_id"], "entry_date": p_entry_date, "amount": receivable["amount"],
+        "type": "revenue", "source": "receivable", "description": receivable["client_name"],
+    })
+    return [dict(receivable)]
+
+
+def _report_metrics(fake: "FakePostgrest", p_company_id: str, p_as_of: str) -> list[dict]:
+    return [_metrics_row(fake, p_company_id, date.fromisoformat(p_as_of))]
+
+
+def _report_metrics_for(fake: "FakePostgrest", p_company_ids: list[str], p_as_of: str) -> list[dict]:
+    as_of = date.fromisoformat(p_as_of)
+    return [_metrics_row(fake, company_id, as_of) for company_id in p_company_ids]
+
+
+def _report_timezones(fake: "FakePostgrest") -> list[dict]:
+    zones = {c["timezone"] for c in fake.tables["vigia_companies"] if c.get("status") == "active"}
+    return [{"timezone": zone} for zone in sorted(zones)]
+
+
+class FakePostgrest:
+    """In-memory stand-in for the PostgREST endpoints used by the bot."""
+
+    def __init__(self, latency: float = 0.0, blocking: bool = False, max_rows: int | None = None) -> None:
+        self.latency = latency
+        self.blocking = blocking
+        self.max_rows = max_rows
+        self.tables: dict[str, list[dict]] = defaultdict(list)
+        self.rpcs: dict[str, Callable[..., object]] = {}
+        self.calls: list[tuple[str, str]] = []
+        self._indexes: dict[tuple[str, str], dict[str, list[dict]]] = {}
+        self._by_id: dict[str, tuple] = {}
+        self.rpcs["vigia_take_balance_snapshots"] = _take_balance_snapshots
+        self.rpcs["vigia_touch_users"] = _touch_users
+        self.rpcs["vigia_report_metrics"] = _report_metrics
+        self.rpcs["vigia_report_metrics_for"] = _report_metrics_for
+        self.rpcs["vigia_report_timezones"] = _report_timezones
+        self.rpcs["vigia_receivable_totals"] = _receivable_totals
+        self.rpcs["vigia_mark_overdue_receivables"] = _mark_overdue_receivables
+        self.rpcs["vigia_settle_receivable"] = _settle_receivable
+        self.rpcs["vigia_raise_alert"] = _raise_alert
+        self.rpcs["vigia_resolve_alerts"] = _resolve_alerts
+        self.rpcs["vigia_rebuild_daily_rollups"] = _rebuild_daily_rollups
+        self.rpcs["vigia_import_entries"] = _import_entries
+        self.rpcs["vigia_archive_message_logs"] = _archive_message_logs
+        self.rpcs["vigia_drop_message_log_partitions"] = _drop_message_log_partitions
+        self.rpcs["vigia_compact_entries"] = _compact_entries
+        self.rpcs["vigia_acquire_lease"] = _acquire_lease
+        self.rpcs["vigia_release_lease"] = _release_lease
+        self.rpcs["vigia_mark_reports_sent"] = _mark_reports_sent
+        self.rpcs["vigia_start_report_run"] = _start_report_run
+        self.rpcs["vigia_complete_report_shard"] = _complete_report_shard
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+
+    def insert(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        if table == "vigia_companies":
+            row.setdefault("timezone", "America/Sao_Paulo")
+            row.setdefault("report_hour", 7)
+            row["report_offset"] = zlib.crc32(row["id"].encode()) % 60
+        self.tables[table].append(row)
+        for (indexed_table, column), index in self._indexes.items():
+            if indexed_table == table:
+                index.setdefault(str(row.get(column)), []).append(row)
+        if table == "vigia_entries":
+            self._apply_entry_to_balance(row, 1)
+            self._apply_entry_to_rollup(row, 1)
+        return row
+
+    def _apply_entry_to_rollup(self, entry: dict, direction: int) -> None:
+        rollups = self._index("vigia_daily_rollups", "company_id").get(str(entry["company_id"]), [])
+        rollup = next((r for r in rollups if r["day"] == entry["entry_date"]), None)
+        if rollup is None:
+            rollup = self.insert("vigia_daily_rollups", {
+                "company_id": entry["company_id"], "day": entry["entry_date"],
+                "revenue_total": 0.0, "expense_total": 0.0, "entry_count": 0,
+            })
+        rollup[f"{entry['type']}_total"] += direction * float(entry["amount"])
+        rollup["entry_count"] += direction
+
+    def _apply_entry_to_balance(self, entry: dict, direction: int) -> None:
+        signed = float(entry["amount"]) if entry["type"] == "revenue" else -float(entry["amount"])
+        balances = self._index("vigia_company_balances", "company_id").get(str(entry["company_id"]))
+        if balances:
+            balances[0]["balance"] += direction * signed
+            balances[0]["entry_count"] += direction
+        else:
+            self.insert("vigia_company_balances", {
+                "company_id": entry["company_id"], "balance": direction * signed, "entry_count": direction,
+            })
+
+    def _index(self, table: str, column: str) -> dict[str, list[dict]]:
+        key = (table, column)
+        if key not in self._indexes:
+            index: dict[str, list[dict]] = {}
+            for row in self.tables[table]:
+                index.setdefault(str(row.get(column)), []).append(row)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            if self.blocking:
+                time.sleep(self.latency)
+            else:
+                await asyncio.sleep(self.latency)
+
+        path = request.url.path.split("/rest/v1/", 1)[-1]
+        self.calls.append((request.method, path))
+        params = parse_qsl(request.url.query.decode(), keep_blank_values=True)
+        body = json.loads(request.content) if request.content else None
+
+        if path.startswith("rpc/"):
+            handler = self.rpcs[path[4:]]
+            return httpx.Response(200, json=handler(self, **(body or {})))
+
+        rows = self.tables[path]
+        options = dict(params)
+        if request.method == "GET" and options.get("order") == "id" and "limit" in options and "offset" not in options:
+            scanned = self._scan_by_id(path, params, min(int(options["limit"]), self.max_rows or int(options["limit"])))
+            return httpx.Response(200, json=self._project(scanned, params))
+        selected = self._filter(self._candidates(path, params), params)
+
+        if request.method == "GET":
+            return httpx.Response(200, json=self._project(self._order(selected, params)[:self.max_rows], params))
+        if request.method == "POST":
+            payload = body if isinstance(body, list) else [body]
+            prefer = request.headers.get("prefer", "")
+            on_conflict = dict(params).get("on_conflict")
+            created = []
+            keys = on_conflict.split(",") if "duplicates" in prefer and on_conflict else []
+            by_key = {tuple(str(r.get(k)) for k in keys): r for r in rows} if keys else {}
+            for item in payload:
+                existing = by_key.get(tuple(str(item.get(k)) for k in keys)) if keys else None
+                if existing is not None:
+                    if "merge-duplicates" in prefer:
+                        existing.update(item)
+                        created.append(existing)
+                else:
+                    created.append(self.insert(path, item))
+                    if keys:
+                        by_key[tuple(str(item.get(k)) for k in keys)] = created[-1]
+            if "return=minimal" in prefer:
+                return httpx.Response(201)
+            return httpx.Response(201, json=created)
+        if request.method == "PATCH":
+            for row in selected:
+                row.update(body)
+            return httpx.Response(200, json=selected)
+        if request.method == "DELETE":
+            self.tables[path] = [r for r in rows if r not in selected]
+            if path == "vigia_entries":
+                for row in selected:
+                    self._apply_entry_to_balance(row, -1)
+                    self._apply_entry_to_rollup(row, -1)
+            self._indexes = {k: v for k, v in self._indexes.items() if k[0] != path}
+            return httpx.Response(200, json=selected)
+        return httpx.Response(405, json={"message": "method not allowed"})
+
+    def _candidates(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        for key, value in params:
+            if key in _INDEXED_COLUMNS and value.startswith("eq."):
+                return self._index(table, key).get(value[3:], [])
+        return self.tables[table]
+
+    def _scan_by_id(self, table: str, params: list[tuple[str, str]], limit: int) -> list[dict]:
+        rows = self.tables[table]
+        cached = self._by_id.get(table)
+        if cached is None or cached[0] is not rows or cached[1] != len(rows):
+            ordered = sorted(rows, key=lambda r: str(r["id"]))
+            cached = self._by_id[table] = (rows, len(rows), ordered, [str(r["id"]) for r in ordered])
+        _, _, ordered, keys = cached
+        start, stop = 0, len(ordered)
+        for key, value in params:
+            op, _, arg = value.partition(".")
+            if key != "id":
+                continue
+            if op in ("gt", "gte"):
+                start = max(start, (bisect.bisect_right if op == "gt" else bisect.bisect_left)(keys, arg))
+            elif op in ("lt", "lte"):
+                stop = min(stop, (bisect.bisect_left if op == "lt" else bisect.bisect_right)(keys, arg))
+        selected = []
+        for i in range(start, stop):
+            if self._filter([ordered[i]], params):
+                selected.append(ordered[i])
+                if len(selected) == limit:
+                    break
+        return selected
+
+    def _filter(self, rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+        selected = rows
+        for key, value in params:
+            if key in _RESERVED_PARAMS:
+                continue
+            if key in ("or", "and"):
+                selected = [r for r in selected if _matches_logical(r, key, value)]
+            else:
+                selected = [r for r in selected if _matches(r, key, value)]
+        return selected
+
+    def _order(self, rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+        options = dict(params)
+        if "order" in options:
+            for clause in reversed(options["order"].split(",")):
+                column, _, direction = clause.partition(".")
+                rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+        offset = int(options.get("offset", 0))
+        if "limit" in options:
+            return rows[offset:offset + int(options["limit"])]
+        return rows[offset:]
+
+    def _project(self, rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+        columns = dict(params).get("select", "*")
+        if columns == "*":
+            return [dict(r) for r in rows]
+        return [self._project_row(r, _split_top_level(columns)) for r in rows]
+
+    def _project_row(self, row: dict, columns: list[str]) -> dict:
+        projected = {}
+        for column in columns:
+            column = column.strip()
+            if "(" not in column:
+                projected[column] = row.get(column)
+                continue
+            alias, _, embed = column.partition(":")
+            table, _, inner = embed.partition("(")
+            parent = self._index(table, "id").get(str(row.get(f"{alias}_id")), [])
+            projected[alias] = self._project_row(parent[0], _split_top_level(inner[:-1])) if parent else None
+        return projected
+
+
+class FakeTelegram:
+    """Minimal Bot API server answering getMe, sendMessage, editMessageText and file downloads."""
+
+    def __init__(self, latency: float = 0.0, flood_every: int = 0, retry_after: int = 1) -> None:
+        self.latency = latency
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.blocked_chats: set[int] = set()
+        self.sent: list[dict] = []
+        self.edited: list[dict] = []
+        self.files: dict[str, bytes] = {}
+        self.flooded = 0
+        self._requests = 0
+        self._message_id = 0
+
+    def request(self) -> HTTPXRequest:
+        return HTTPXRequest(httpx_kwargs={"transport": httpx.MockTransport(self.handle)})
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if "/file/bot" in request.url.path:
+            return httpx.Response(200, content=self.files[request.url.path.rsplit("/", 1)[-1]])
+        method = request.url.path.rsplit("/", 1)[-1]
+        data = dict(parse_qsl(request.content.decode())) if request.content else {}
+
+        if method == "getMe":
+            return httpx.Response(200, json={"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "VigIA", "username": "vigia_bot",
+            }})
+        if method == "sendMessage":
+            self._requests += 1
+            if int(data["chat_id"]) in self.blocked_chats:
+                return httpx.Response(403, json={
+                    "ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user",
+                })
+            if self.flood_every and self._requests % self.flood_every == 0:
+                self.flooded += 1
+                return httpx.Response(429, json={
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                })
+            self._message_id += 1
+            self.sent.append(data)
+            return httpx.Response(200, json={"ok": True, "result": {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": int(data["chat_id"]), "type": "private"},
+                "text": data.get("text", ""),
+            }})
+        if method == "getFile":
+            file_id = data["file_id"]
+            return httpx.Response(200, json={"ok": True, "result": {
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_size": len(self.files[file_id]),
+                "file_path": f"documents/{file_id}",
+            }})
+        if method == "editMessageText":
+            self.edited.append(data)
+        return httpx.Response(200, json={"ok": True, "result": True})
+
+
+def make_update(update_id: int, chat_id: int, text: str, message_id: int | None = None) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"Cliente {chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": message_id if message_id is not None else update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+def make_document_update(update_id: int, chat_id: int, file_id: str, file_name: str, file_size: int) -> dict:
+    update = make_update(update_id, chat_id, "")
+    del update["message"]["text"]
+    update["message"]["document"] = {
+        "file_id": file_id, "file_unique_id": file_id, "file_name": file_name, "file_size": file_size,
+    }
+    return update
+
+
+def use_fake_database(fake: FakePostgrest) -> None:
+    from src import database
+    transport = fake.transport()
+    database._async_client = database.PooledPostgrestClient("anon", transport=transport)
+    database._async_service_client = database.PooledPostgrestClient("service", transport=transport)
+
+
+def seed_active_company(fake: FakePostgrest, chat_id: int, **overrides) -> tuple[dict, dict]:
+    company = fake.insert("vigia_companies", {
+        "name": f"Empresa {chat_id}",
+        "status": "active",
+        "plan": "early_adopter",
+        "fixed_cost_avg": 9000,
+        "variable_cost_percent": 30,
+        "cash_minimum": 5000,
+        "alert_days_threshold": 10,
+        "chat_id": chat_id,
+        "last_report_sent_at": None,
+        **overrides,
+    })
+    user = fake.insert("vigia_users", {
+        "company_id": company["id"],
+        "chat_id": chat_id,
+        "telegram_id": chat_id,
+        "first_name": f"Cliente {chat_id}",
+        "state": "active",
+        "current_action": None,
+        "onboarding_step": 4,
+    })
+    return company, user
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import date, timedelta
+
+from src import main
+from src.services import alerts
+from src.services.cache import runway_states
+from tests.fakes import make_update, seed_active_company
+
+
+def _seed_company(fake_db, cash: float) -> dict:
+    company, _ = seed_active_company(fake_db, 100)
+    fake_db.insert("vigia_entries", {
+        "company_id": company["id"], "entry_date": (date.today() - timedelta(days=40)).isoformat(),
+        "amount": cash, "type": "revenue",
+    })
+    return company
+
+
+def _record(fake_db, company: dict, amount: float, entry_type: str) -> list[dict]:
+    entry = {"company_id": company["id"], "entry_date": date.today().isoformat(), "amount": amount, "type": entry_type}
+    fake_db.insert("vigia_entries", entry)
+    return asyncio.run(alerts.evaluate_entry(company, entry))
+
+
+def _open_alerts(fake_db) -> list[tuple[str, str]]:
+    return sorted((a["alert_type"], a["severity"]) for a in fake_db.tables["vigia_alerts"] if a["resolved_at"] is None)
+
+
+class TestEvaluateEntry:
+    def test_fires_only_on_level_changes_and_minimum_crossings(self, fake_db):
+        company = _seed_company(fake_db, 20_000)
+
+        assert _record(fake_db, company, 400, "expense") == []
+        to_attention = _record(fake_db, company, 14_500, "expense")
+        same_level = _record(fake_db, company, 50, "expense")
+        below_minimum = _record(fake_db, company, 100, "expense")
+        to_critical = _record(fake_db, company, 2_000, "expense")
+
+        assert [a["severity"] for a in to_attention] == ["atenção"]
+        assert same_level == []
+        assert [a["alert_type"] for a in below_minimum] == ["cash_minimum"]
+        assert [(a["alert_type"], a["severity"]) for a in to_critical] == [("runway", "crítico")]
+        assert "cobre só 9 dias" in to_critical[0]["message"]
+        assert _open_alerts(fake_db) == [("cash_minimum", "atenção"), ("runway", "crítico")]
+
+        assert _record(fake_db, company, 50_000, "revenue") == []
+        assert _open_alerts(fake_db) == []
+
+    def test_uses_cached_aggregates_after_first_entry(self, fake_db):
+        company = _seed_company(fake_db, 20_000)
+
+        for _ in range(5):
+            _record(fake_db, company, 100, "expense")
+
+        assert fake_db.calls.count(("POST", "rpc/vigia_report_metrics")) == 1
+        assert runway_states.get(company["id"])["cash_balance"] == 19_500
+
+    def test_reloads_when_another_worker_changed_the_ledger(self, fake_db):
+        company = _seed_company(fake_db, 20_000)
+        _record(fake_db, company, 100, "expense")
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": date.today().isoformat(), "amount": 12_000, "type": "expense",
+        })
+
+        raised = _record(fake_db, company, 2_000, "expense")
+
+        assert [a["severity"] for a in raised] == ["atenção"]
+        assert fake_db.calls.count(("POST", "rpc/vigia_report_metrics")) == 2
+        assert runway_states.get(company["id"])["cash_balance"] == 5_900
+
+    def test_cold_state_does_not_double_count_the_entry(self, fake_db):
+        company = _seed_company(fake_db, 20_000)
+
+        raised = _record(fake_db, company, 15_000, "expense")
+
+        assert [a["severity"] for a in raised] == ["atenção"]
+        assert runway_states.get(company["id"])["cash_balance"] == 5_000
+
+    def test_open_alert_is_not_repeated_after_cache_loss(self, fake_db):
+        company = _seed_company(fake_db, 20_000)
+        _record(fake_db, company, 15_000, "expense")
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": "2020-01-01", "amount": 15_000, "type": "revenue",
+        })
+        runway_states.clear()
+
+        again = _record(fake_db, company, 15_000, "expense")
+
+        assert again == []
+        assert _open_alerts(fake_db) == [("runway", "atenção")]
+
+
+async def _post(fake_telegram, updates: list[dict]) -> None:
+    main.telegram_app = main.build_telegram_app(fake_telegram.request())
+    await main.telegram_app.initialize()
+    try:
+        for update in updates:
+            await main.telegram_app.process_update(main.Update.de_json(update, main.telegram_app.bot))
+    finally:
+        await main.telegram_app.shutdown()
+        main.telegram_app = None
+
+
+class TestAlertMessages:
+    def test_expense_that_changes_level_sends_alert(self, fake_db, fake_telegram):
+        _seed_company(fake_db, 20_000)
+
+        asyncio.run(_post(fake_telegram, [make_update(1, 100, "/despesa 17100"), make_update(2, 100, "/despesa 10")]))
+
+        texts = [m["text"] for m in fake_telegram.sent]
+        assert "Despesa de R$ 17.100,00 registrada" in texts[0]
+        assert "Alerta crítico" in texts[1] and "abaixo do mínimo" in texts[2]
+        assert len(texts) == 4
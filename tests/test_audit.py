@@ -0,0 +1,84 @@
+import asyncio
+
+from src.services import supabase as supabase_service
+from src.services.audit import AuditLog, audit_log
+from tests.fakes import make_update, seed_active_company
+from tests.test_webhook import _post_updates
+
+
+def _row(i: int) -> dict:
+    return {"company_id": None, "user_id": None, "direction": "in", "message_text": f"msg {i}", "payload": {}}
+
+
+class TestAuditLog:
+    def test_inbound_and_outbound_messages_are_recorded(self, fake_db, fake_telegram):
+        company, user = seed_active_company(fake_db, 100)
+
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 100, "/receita 150")]))
+        assert fake_db.tables["vigia_message_logs"] == []
+        asyncio.run(audit_log.flush())
+
+        logs = fake_db.tables["vigia_message_logs"]
+        assert [(log["direction"], log["company_id"], log["user_id"]) for log in logs] == [
+            ("in", company["id"], user["id"]), ("out", company["id"], user["id"]),
+        ]
+        assert logs[0]["message_text"] == "/receita 150"
+        assert "registrada" in logs[1]["message_text"]
+        assert fake_db.calls.count(("POST", "vigia_message_logs")) == 1
+
+    def test_flushes_in_bulk_when_batch_fills(self, fake_db):
+        log = AuditLog(capacity=100, batch_size=10, flush_interval=60)
+
+        async def scenario():
+            for i in range(25):
+                log.record(_row(i))
+                await asyncio.sleep(0)
+            await log.stop()
+
+        asyncio.run(scenario())
+
+        assert len(fake_db.tables["vigia_message_logs"]) == 25
+        assert fake_db.calls.count(("POST", "vigia_message_logs")) == 3
+
+    def test_full_buffer_drops_oldest_instead_of_blocking(self):
+        log = AuditLog(capacity=5, batch_size=100, flush_interval=60)
+
+        for i in range(8):
+            log.record(_row(i))
+
+        assert log.stats()["dropped"] == 3
+        assert [row["message_text"] for row in log._buffer] == [f"msg {i}" for i in range(3, 8)]
+
+    def test_failed_flush_keeps_records_for_next_attempt(self, fake_db, monkeypatch):
+        log = AuditLog(capacity=100, batch_size=100, flush_interval=60)
+        for i in range(4):
+            log.record(_row(i))
+
+        async def broken(rows):
+            raise RuntimeError("banco indisponível")
+
+        monkeypatch.setattr(supabase_service, "log_messages", broken)
+        assert asyncio.run(log.flush()) == 0
+        monkeypatch.undo()
+
+        assert log.stats()["failed_flushes"] == 1 and log.pending == 4
+        assert asyncio.run(log.flush()) == 4
+        assert [row["message_text"] for row in fake_db.tables["vigia_message_logs"]] == [f"msg {i}" for i in range(4)]
+
+    def test_bad_row_is_isolated_after_retry_limit(self, fake_db, monkeypatch):
+        log = AuditLog(capacity=100, batch_size=100, flush_interval=60, max_retries=2)
+        for i in range(5):
+            log.record(_row(i))
+        log_messages = supabase_service.log_messages
+
+        async def rejects_msg_2(rows):
+            if any(row["message_text"] == "msg 2" for row in rows):
+                raise RuntimeError("violates check constraint")
+            await log_messages(rows)
+
+        monkeypatch.setattr(supabase_service, "log_messages", rejects_msg_2)
+        attempts = [asyncio.run(log.flush()) for _ in range(3)]
+
+        assert attempts == [0, 0, 4]
+        assert log.stats()["rejected"] == 1 and log.pending == 0
+        assert [row["message_text"] for row in fake_db.tables["vigia_message_logs"]] == ["msg 0", "msg 1", "msg 3", "msg 4"]
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import httpx
+
+from src import main
+from src.services import cache
+from src.services import supabase as supabase_service
+from src.services.cache import TTLCache
+from src.services.unit_of_work import UnitOfWork
+from tests.fakes import make_update, seed_active_company
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        lru = TTLCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        assert lru.get("b") is None
+        assert lru.get("a") == 1
+        assert lru.stats()["evictions"] == 1
+
+    def test_expired_entries_are_misses(self, monkeypatch):
+        lru = TTLCache(maxsize=10, ttl=5)
+        lru.set("a", 1)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+        assert lru.get("a") is None
+        assert lru.stats()["misses"] == 1
+
+
+class TestCachedLookups:
+    def test_update_user_writes_through(self, fake_db):
+        _, user = seed_active_company(fake_db, 7)
+
+        async def scenario():
+            await UnitOfWork(7).load()
+            await supabase_service.update_user(user["id"], {"onboarding_step": 3})
+            return await UnitOfWork(7).load()
+
+        refreshed = asyncio.run(scenario())
+
+        assert refreshed["onboarding_step"] == 3
+        assert cache.users.stats()["hits"] == 1
+
+    def test_active_message_needs_one_read(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 9)
+
+        async def scenario():
+            main.telegram_app = main.build_telegram_app(fake_telegram.request())
+            await main.telegram_app.initialize()
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.post("/webhook", json=make_update(1, 9, "/receita 100"))
+                fake_db.reset_calls()
+                await client.post("/webhook", json=make_update(2, 9, "/receita 200"))
+            await main.telegram_app.shutdown()
+            main.telegram_app = None
+
+        asyncio.run(scenario())
+
+        reads = [call for call in fake_db.calls if call[0] == "GET"]
+        assert reads == [("GET", "vigia_company_balances")]
+        assert ("POST", "vigia_entries") in fake_db.calls
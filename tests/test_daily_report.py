@@ -0,0 +1,219 @@
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+
+from src.config import settings
+from src.handlers.daily_report import already_sent, due_buckets, resume_daily_reports, send_daily_reports, send_due_reports
+from src.services.outbox import get_sender
+from src.services.report_metrics import compute_metrics_for
+from tests.fakes import seed_active_company
+
+
+def _seed_portfolio(fake_db, count: int) -> None:
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    for chat_id in range(1, count + 1):
+        company, _ = seed_active_company(fake_db, chat_id)
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": yesterday, "amount": 1000, "type": "revenue",
+        })
+
+
+class TestSendDailyReports:
+    def test_fans_out_and_summarises(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        _seed_portfolio(fake_db, 40)
+        fake_db.insert("vigia_companies", {"name": "Sem chat", "status": "active", "chat_id": None})
+
+        summary = asyncio.run(send_daily_reports())
+
+        assert summary["sent"] == 40
+        assert summary["skipped"] == 1
+        assert summary["failed"] == 0
+        assert len(fake_bot.sent) == 40
+        assert {int(m["chat_id"]) for m in fake_bot.sent} == set(range(1, 41))
+
+    def test_runway_uses_daily_average_revenue(self, fake_db, fake_bot):
+        company, _ = seed_active_company(fake_db, 1)
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": (date.today() - timedelta(days=1)).isoformat(),
+            "amount": 7000, "type": "revenue",
+        })
+
+        asyncio.run(send_daily_reports())
+
+        assert "Dias de Caixa:* 11 dias" in fake_bot.sent[0]["text"]
+
+    def test_retries_flood_wait(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        fake_bot.flood_every = 5
+        fake_bot.retry_after = 0
+        _seed_portfolio(fake_db, 20)
+
+        summary = asyncio.run(send_daily_reports())
+
+        assert summary["sent"] == 20
+        assert summary["failed"] == 0
+        assert fake_bot.flooded > 0
+        assert len(fake_bot.sent) == 20
+
+
+class TestBatchMetrics:
+    def test_aggregates_every_company_in_one_rpc(self, fake_db):
+        today = date(2026, 3, 10)
+        first, _ = seed_active_company(fake_db, 1)
+        second, _ = seed_active_company(fake_db, 2)
+        rows = [
+            (first, "2026-03-09", 700, "revenue"),
+            (first, "2026-03-05", 700, "revenue"),
+            (first, "2026-03-01", 500, "revenue"),
+            (first, "2026-03-08", 200, "expense"),
+            (first, "2025-10-01", 9999, "revenue"),
+            (second, "2026-03-09", 100, "expense"),
+        ]
+        for company, day, amount, kind in rows:
+            fake_db.insert("vigia_entries", {
+                "company_id": company["id"], "entry_date": day, "amount": amount, "type": kind,
+            })
+        fake_db.insert("vigia_receivables", {"company_id": second["id"], "amount": 300, "status": "overdue"})
+        fake_db.insert("vigia_receivables", {"company_id": second["id"], "amount": 50, "status": "paid"})
+        fake_db.reset_calls()
+
+        metrics = asyncio.run(compute_metrics_for([first["id"], second["id"]], today))
+
+        assert fake_db.calls == [("POST", "rpc/vigia_report_metrics_for")]
+        assert metrics[first["id"]] == {
+            "yesterday_revenue": 700,
+            "avg_revenue": 200,
+            "cash_balance": 11699,
+            "overdue_count": 0,
+            "overdue_total": 0,
+        }
+        assert metrics[second["id"]]["cash_balance"] == -100
+        assert metrics[second["id"]]["overdue_total"] == 300
+
+
+class TestResumableRuns:
+    def test_restart_resumes_from_checkpoint(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        monkeypatch.setattr(settings, "report_shards", 4)
+        monkeypatch.setattr(settings, "report_checkpoint_size", 5)
+        _seed_portfolio(fake_db, 30)
+        sender = get_sender()
+        send = sender.send
+        crash = {"after": 12}
+
+        async def flaky_send(chat_id: int, text: str, **kwargs) -> dict:
+            if crash["after"] <= 0:
+                raise RuntimeError("processo reiniciado")
+            crash["after"] -= 1
+            return await send(chat_id, text, **kwargs)
+
+        monkeypatch.setattr(sender, "send", flaky_send)
+        interrupted = asyncio.run(send_daily_reports())
+        run = fake_db.tables["vigia_report_runs"][0]
+        status_after_crash = run["status"]
+        run["started_at"] = (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()
+        for lease in fake_db.tables["vigia_job_leases"]:
+            lease["expires_at"] = 0
+        crash["after"] = 10_000
+
+        resumed = asyncio.run(resume_daily_reports())
+
+        assert interrupted["failed_shards"] and status_after_crash == "running"
+        assert sum(d["status"] == "sent" for d in fake_db.tables["vigia_report_deliveries"]) == 30
+        assert resumed["runs"] == 1 and resumed["sent"] == 18
+        assert sorted(int(m["chat_id"]) for m in fake_bot.sent) == list(range(1, 31))
+        assert run["status"] == "completed" and sorted(run["completed_shards"]) == [0, 1, 2, 3]
+        assert asyncio.run(resume_daily_reports()) is None
+
+    def test_failed_delivery_is_retried_on_resume(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        _seed_portfolio(fake_db, 3)
+        fake_bot.blocked_chats.add(2)
+
+        first = asyncio.run(send_daily_reports())
+        _expire_run(fake_db)
+        fake_bot.blocked_chats.clear()
+        resumed = asyncio.run(resume_daily_reports())
+
+        assert first["sent"] == 2 and first["retrying"] == 1 and first["failed"] == 0
+        assert resumed["sent"] == 1 and resumed["failed"] == 0
+        assert sorted(int(m["chat_id"]) for m in fake_bot.sent) == [1, 2, 3]
+        assert fake_db.tables["vigia_report_runs"][0]["status"] == "completed"
+
+    def test_delivery_stops_retrying_after_max_attempts(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        monkeypatch.setattr(settings, "report_max_attempts", 2)
+        _seed_portfolio(fake_db, 3)
+        fake_bot.blocked_chats.add(2)
+
+        asyncio.run(send_daily_reports())
+        _expire_run(fake_db)
+        resumed = asyncio.run(resume_daily_reports())
+        _expire_run(fake_db)
+
+        delivery = next(d for d in fake_db.tables["vigia_report_deliveries"] if d["status"] == "failed")
+        assert resumed["failed"] == 1 and resumed["retrying"] == 0
+        assert delivery["attempts"] == 2
+        assert fake_db.tables["vigia_report_runs"][0]["status"] == "completed"
+        assert asyncio.run(resume_daily_reports()) is None
+
+    def test_completed_run_is_not_repeated(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        _seed_portfolio(fake_db, 5)
+
+        asyncio.run(send_daily_reports())
+        again = asyncio.run(send_daily_reports())
+
+        assert again["shards"] == [] and again["sent"] == 0
+        assert len(fake_bot.sent) == 5
+
+
+def _expire_run(fake_db) -> None:
+    for run in fake_db.tables["vigia_report_runs"]:
+        run["started_at"] = (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()
+    for lease in fake_db.tables["vigia_job_leases"]:
+        lease["expires_at"] = 0
+
+
+def _utc(hour: int, minute: int) -> datetime:
+    return datetime.combine(date.today(), time(hour, minute), tzinfo=timezone.utc)
+
+
+class TestStaggeredDelivery:
+    def test_buckets_follow_local_time(self, monkeypatch):
+        monkeypatch.setattr(settings, "report_window_minutes", 30)
+        monkeypatch.setattr(settings, "report_slot_minutes", 5)
+        zones = ["America/Sao_Paulo", "America/Manaus", "Asia/Kolkata"]
+
+        assert due_buckets(_utc(10, 0), zones) == [("America/Sao_Paulo", 7, 0, 10), ("America/Manaus", 6, 0, 10)]
+        assert due_buckets(_utc(10, 25), zones) == [("America/Sao_Paulo", 7, 50, 60), ("America/Manaus", 6, 50, 60)]
+        assert due_buckets(_utc(10, 30), zones) == [("Asia/Kolkata", 16, 0, 10)]
+
+    def test_already_sent_uses_company_local_date(self):
+        company = {"timezone": "America/Sao_Paulo", "last_report_sent_at": "2026-03-02T01:30:00+00:00"}
+
+        assert already_sent(company, date(2026, 3, 1))
+        assert not already_sent(company, date(2026, 3, 2))
+
+    def test_window_spreads_sends_and_delivers_each_company_once(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        monkeypatch.setattr(settings, "report_window_minutes", 30)
+        monkeypatch.setattr(settings, "report_slot_minutes", 5)
+        _seed_portfolio(fake_db, 60)
+        for chat_id in range(61, 71):
+            seed_active_company(fake_db, chat_id, timezone="America/Manaus")
+        seed_active_company(fake_db, 71, report_hour=8)
+
+        per_slot = {}
+        for minute in range(-5, 95, 5):
+            slot = _utc(10, 0) + timedelta(minutes=minute)
+            before = len(fake_bot.sent)
+            asyncio.run(send_due_reports(slot))
+            per_slot[slot.strftime("%H:%M")] = len(fake_bot.sent) - before
+
+        assert sorted(int(m["chat_id"]) for m in fake_bot.sent) == list(range(1, 72))
+        assert per_slot["09:55"] == per_slot["10:30"] == 0
+        assert sum(per_slot[f"10:{m:02d}"] for m in range(0, 30, 5)) == 60
+        assert sum(per_slot[f"11:{m:02d}"] for m in range(0, 30, 5)) == 11
+        assert max(per_slot.values()) < 30
+        assert len(fake_db.tables["vigia_report_runs"]) == sum(1 for sent in per_slot.values() if sent)
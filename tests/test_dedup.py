@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+from telegram import Update
+
+from src import main
+from src.services.dedup import UpdateDeduplicator, deduplicator
+from src.services.ingestion import UpdateQueue
+from tests.fakes import make_update, seed_active_company
+
+
+def _update(update_id: int, chat_id: int = 1, message_id: int | None = None) -> Update:
+    return Update.de_json(make_update(update_id, chat_id, "/receita 10", message_id=message_id), None)
+
+
+class TestUpdateDeduplicator:
+    def test_drops_repeated_update_and_message_ids(self):
+        dedup = UpdateDeduplicator(window=100)
+
+        async def scenario():
+            return [
+                await dedup.is_duplicate(_update(1, message_id=10)),
+                await dedup.is_duplicate(_update(1, message_id=10)),
+                await dedup.is_duplicate(_update(2, message_id=10)),
+                await dedup.is_duplicate(_update(3, message_id=11)),
+            ]
+
+        assert asyncio.run(scenario()) == [False, True, True, False]
+        assert dedup.stats()["duplicates"] == 2
+
+    def test_window_is_bounded(self):
+        dedup = UpdateDeduplicator(window=10)
+
+        async def scenario():
+            for update_id in range(100):
+                await dedup.is_duplicate(_update(update_id))
+
+        asyncio.run(scenario())
+
+        assert dedup.stats()["window"] <= 10
+
+    def test_persistent_table_catches_duplicates_from_other_processes(self, fake_db):
+        first = UpdateDeduplicator(window=100, persistent=True)
+        second = UpdateDeduplicator(window=100, persistent=True)
+
+        async def scenario():
+            return await first.is_duplicate(_update(42)), await second.is_duplicate(_update(42))
+
+        assert asyncio.run(scenario()) == (False, True)
+        assert len(fake_db.tables["vigia_processed_updates"]) == 1
+
+
+class TestWebhookReplay:
+    def test_burst_of_redeliveries_inserts_each_entry_once(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 5)
+        originals = [make_update(update_id, 5, f"/receita {update_id}00") for update_id in range(1, 6)]
+        burst = originals * 4
+
+        async def scenario():
+            main.telegram_app = main.build_telegram_app(fake_telegram.request())
+            await main.telegram_app.initialize()
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                statuses = await asyncio.gather(*(client.post("/webhook", json=u) for u in burst))
+            await main.telegram_app.shutdown()
+            main.telegram_app = None
+            return [r.status_code for r in statuses]
+
+        statuses = asyncio.run(scenario())
+
+        assert set(statuses) == {200}
+        amounts = sorted(e["amount"] for e in fake_db.tables["vigia_entries"])
+        assert amounts == [100, 200, 300, 400, 500]
+        assert deduplicator.stats()["duplicates"] == 15
+
+    def test_update_rejected_by_full_queue_is_accepted_on_redelivery(self, fake_db, fake_telegram, monkeypatch):
+        seed_active_company(fake_db, 5)
+        monkeypatch.setattr(deduplicator, "persistent", True)
+        update = make_update(7, 5, "/receita 700")
+
+        async def scenario():
+            main.telegram_app = main.build_telegram_app(fake_telegram.request())
+            await main.telegram_app.initialize()
+            main.update_queue = UpdateQueue(main.telegram_app.process_update, workers=1, max_size=1, enqueue_timeout=0.01)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                rejected = await client.post("/webhook", json=update)
+                main.update_queue.start()
+                redelivered = await client.post("/webhook", json=update)
+            await main.update_queue.drain(timeout=1)
+            main.update_queue = None
+            await main.telegram_app.shutdown()
+            main.telegram_app = None
+            return rejected.status_code, redelivered.status_code
+
+        assert asyncio.run(scenario()) == (503, 200)
+        assert [e["amount"] for e in fake_db.tables["vigia_entries"]] == [700]
+        assert deduplicator.stats()["duplicates"] == 0
+        assert len(fake_db.tables["vigia_processed_updates"]) == 1
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.services.entries_store import EntriesStore
+from src.services.forecast import forecast_all, project_cash, weekday_revenue_profile
+from tests.fakes import seed_active_company
+
+AS_OF = date(2026, 3, 10)
+
+
+def _project(cash=1000.0, weekday_revenue=None, receivables=None, fixed=300.0, percent=0.0, minimum=950.0, horizon=30):
+    return project_cash(
+        cash=np.array([cash]),
+        weekday_revenue=np.array([weekday_revenue or [0.0] * 7]),
+        receivables=np.array([receivables or [0.0] * horizon]),
+        fixed_cost_avg=np.array([fixed]),
+        variable_cost_percent=np.array([percent]),
+        cash_minimum=np.array([minimum]),
+        as_of=AS_OF,
+    )
+
+
+class TestProjection:
+    def test_finds_first_day_below_minimum_and_zero(self):
+        result = _project(horizon=120)
+
+        assert result["days_to_minimum"][0] == 6
+        assert result["days_to_zero"][0] == 101
+        assert result["curve"][0][0] == 990
+
+    def test_never_crossing_returns_minus_one(self):
+        result = _project(fixed=0.0, minimum=0.0)
+
+        assert result["days_to_minimum"][0] == -1
+        assert result["days_to_zero"][0] == -1
+
+    def test_revenue_follows_weekday_profile(self):
+        monday_only = [700.0, 0, 0, 0, 0, 0, 0]
+
+        result = _project(weekday_revenue=monday_only, fixed=0.0, percent=30.0, horizon=7)
+
+        net = np.diff(np.concatenate([[1000.0], result["curve"][0]]))
+        weekdays = [(AS_OF + timedelta(days=d)).weekday() for d in range(1, 8)]
+        assert net.tolist() == [490.0 if w == 0 else 0.0 for w in weekdays]
+
+    def test_scheduled_receivable_lifts_curve_on_due_day(self):
+        receivables = [0.0] * 10
+        receivables[2] = 5000.0
+
+        result = _project(receivables=receivables, horizon=10)
+
+        assert result["days_to_minimum"][0] == -1
+        assert result["curve"][0][2] - result["curve"][0][1] == 4990
+
+
+class TestWeekdayProfile:
+    def test_averages_revenue_per_weekday(self):
+        mondays = [AS_OF - timedelta(days=d) for d in range(1, 57) if (AS_OF - timedelta(days=d)).weekday() == 0]
+        rows = [{"company_id": "c", "day": d.isoformat(), "revenue_total": 800, "expense_total": 0} for d in mondays]
+        rows[0]["expense_total"] = 999
+
+        profile = weekday_revenue_profile(EntriesStore.from_rollups(rows, ["c"]), AS_OF, 56)
+
+        assert profile[0].tolist() == [800.0, 0, 0, 0, 0, 0, 0]
+
+
+class TestForecastAll:
+    def test_projects_every_active_company_in_one_batch(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1, fixed_cost_avg=3000, cash_minimum=500)
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": (date.today() - timedelta(days=90)).isoformat(),
+            "amount": 1000, "type": "revenue",
+        })
+        due = (date.today() + timedelta(days=20)).isoformat()
+        fake_db.insert("vigia_receivables", {"company_id": company["id"], "amount": 2000, "due_date": due, "status": "pending"})
+        fake_db.insert("vigia_receivables", {"company_id": company["id"], "amount": 9000, "due_date": due, "status": "overdue"})
+
+        rows = asyncio.run(forecast_all())
+
+        curve = rows[company["id"]]["curve"]
+        assert rows[company["id"]]["days_to_minimum"] == 6
+        assert rows[company["id"]]["date_below_zero"] == (date.today() + timedelta(days=11)).isoformat()
+        assert curve[19] - curve[18] == 1900
+        assert len(curve) == 90
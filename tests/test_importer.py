@@ -0,0 +1,177 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+
+from src import main
+from src.config import settings
+from src.services.importer import import_statement, parse_amount, parse_csv, parse_ofx
+from tests.fakes import make_document_update, seed_active_company
+
+CSV_STATEMENT = """Data;Descrição;Valor
+01/03/2026;Venda balcão;1.500,00
+01/03/2026;Aluguel;-3.200,00
+02/03/2026;Venda balcão;1.500,00
+01/03/2026;Venda balcão;1.500,00
+31/02/2026;Data ruim;10,00
+03/03/2026;Sem valor;abc
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+CHARSET:1252
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20260301120000[-3:BRT]
+<TRNAMT>250.75
+<MEMO>PIX RECEBIDO
+</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260302<TRNAMT>-99.90<NAME>TARIFA</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def _import(company_id: str, content: str, filename: str, **kwargs) -> dict:
+    return asyncio.run(import_statement(company_id, io.BytesIO(content.encode("cp1252")), filename, **kwargs))
+
+
+class TestParsers:
+    @pytest.mark.parametrize("value, expected", [
+        ("1.500,00", 1500.0),
+        ("-3.200,50", -3200.5),
+        ("R$ 99,90", 99.9),
+        ("1500.25", 1500.25),
+        ("1.500", 1500.0),
+        ("(45,00)", -45.0),
+        ("120,00 D", -120.0),
+        ("1,234.56", 1234.56),
+        ("-12,345,678.90", -12345678.9),
+        ("R$ 1.234,56", 1234.56),
+        ("1,234.5.6", None),
+        ("inf", None),
+        ("abc", None),
+    ])
+    def test_amounts_follow_br_format(self, value, expected):
+        assert parse_amount(value) == expected
+
+    def test_csv_rows_and_errors(self):
+        rows = list(parse_csv(io.StringIO(CSV_STATEMENT)))
+
+        assert rows[0] == {
+            "line": 2, "entry_date": "2026-03-01", "amount": 1500.0, "type": "revenue", "description": "Venda balcão",
+        }
+        assert rows[1]["type"] == "expense" and rows[1]["amount"] == 3200.0
+        assert rows[4] == {"line": 6, "error": "data inválida"}
+        assert rows[5] == {"line": 7, "error": "valor inválido"}
+
+    def test_amounts_are_rounded_before_range_checks(self):
+        rows = list(parse_csv(io.StringIO("Data;Descrição;Valor\n01/03/2026;Centavo;0,004\n01/03/2026;Enorme;99999999999,00\n01/03/2026;Ok;0,006\n")))
+
+        assert rows[0] == {"line": 2, "error": "valor zerado"}
+        assert rows[1] == {"line": 3, "error": "valor inválido"}
+        assert rows[2]["amount"] == 0.01
+
+    def test_csv_without_required_columns_is_rejected(self):
+        with pytest.raises(ValueError):
+            list(parse_csv(io.StringIO("nome,total\nx,1\n")))
+
+    def test_ofx_transactions_with_and_without_line_breaks(self):
+        rows = list(parse_ofx(io.StringIO(OFX_STATEMENT)))
+
+        assert [(r["entry_date"], r["amount"], r["type"], r["description"]) for r in rows] == [
+            ("2026-03-01", 250.75, "revenue", "PIX RECEBIDO"),
+            ("2026-03-02", 99.9, "expense", "TARIFA"),
+        ]
+
+
+class TestImportStatement:
+    def test_csv_import_skips_duplicates_and_invalid_rows(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+
+        summary = _import(company["id"], CSV_STATEMENT, "extrato.csv")
+
+        assert (summary["imported"], summary["duplicates"], summary["invalid"]) == (3, 1, 2)
+        assert summary["errors"] == ["linha 6: data inválida", "linha 7: valor inválido"]
+        entries = fake_db.tables["vigia_entries"]
+        assert {e["source"] for e in entries} == {"import"}
+        assert fake_db.tables["vigia_company_balances"][0]["balance"] == -200
+
+    def test_reimport_is_a_no_op(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _import(company["id"], OFX_STATEMENT, "extrato.ofx")
+
+        summary = _import(company["id"], OFX_STATEMENT, "extrato.ofx")
+
+        assert (summary["imported"], summary["duplicates"]) == (0, 2)
+        assert len(fake_db.tables["vigia_entries"]) == 2
+
+    def test_inserts_in_chunks_and_reports_progress(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        lines = "".join(f"2026-01-{day:02d},Venda {i},{i + 1}.00\n" for day in range(1, 11) for i in range(25))
+        progress = []
+
+        async def on_progress(summary: dict) -> None:
+            progress.append(summary["imported"])
+
+        summary = _import(company["id"], "data,descricao,valor\n" + lines, "vendas.csv", chunk_size=100, on_progress=on_progress)
+
+        assert summary["imported"] == 250
+        assert fake_db.calls.count(("POST", "rpc/vigia_import_entries")) == 3
+        assert progress == [100, 200, 250]
+
+
+async def _post(fake_telegram, update: dict) -> None:
+    main.telegram_app = main.build_telegram_app(fake_telegram.request())
+    await main.telegram_app.initialize()
+    try:
+        await main.telegram_app.process_update(main.Update.de_json(update, main.telegram_app.bot))
+    finally:
+        await main.telegram_app.shutdown()
+        main.telegram_app = None
+
+
+async def _post_file(content: bytes, company_id: str, token: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(
+            f"/companies/{company_id}/entries/import",
+            params={"filename": "extrato.csv"},
+            content=content,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+
+class TestImportEntrypoints:
+    def test_document_sent_to_bot_is_imported(self, fake_db, fake_telegram):
+        company, _ = seed_active_company(fake_db, 100)
+        fake_telegram.files["doc1"] = CSV_STATEMENT.encode()
+
+        asyncio.run(_post(fake_telegram, make_document_update(1, 100, "doc1", "extrato.csv", len(CSV_STATEMENT))))
+
+        assert len(fake_db.tables["vigia_entries"]) == 3
+        assert "Importando" in fake_telegram.sent[-1]["text"]
+        final = fake_telegram.edited[-1]["text"]
+        assert "3 lançamento(s) importado(s)" in final
+        assert "linha 6: data inválida" in final
+
+    def test_oversized_document_is_refused(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 100)
+
+        asyncio.run(_post(fake_telegram, make_document_update(1, 100, "big", "extrato.csv", settings.import_max_bytes + 1)))
+
+        assert "muito grande" in fake_telegram.sent[-1]["text"]
+        assert fake_db.tables["vigia_entries"] == []
+
+    def test_http_endpoint_requires_token(self, fake_db, monkeypatch):
+        company, _ = seed_active_company(fake_db, 1)
+        monkeypatch.setattr(settings, "import_api_token", "segredo")
+
+        refused = asyncio.run(_post_file(CSV_STATEMENT.encode(), company["id"], "errado"))
+        accepted = asyncio.run(_post_file(CSV_STATEMENT.encode(), company["id"], "segredo"))
+
+        assert refused.status_code == 401
+        assert accepted.status_code == 200
+        assert accepted.json()["imported"] == 3
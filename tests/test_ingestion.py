@@ -0,0 +1,76 @@
+import asyncio
+import random
+
+from telegram import Update
+
+from src.services.ingestion import UpdateQueue
+from tests.fakes import make_update
+
+
+def _update(update_id: int, chat_id: int) -> Update:
+    return Update.de_json(make_update(update_id, chat_id, f"/receita {update_id}"), None)
+
+
+class TestUpdateQueue:
+    def test_keeps_per_chat_order_and_never_overlaps_a_chat(self):
+        seen: dict[int, list[int]] = {}
+        running: set[int] = set()
+        overlaps = []
+
+        async def process(update: Update) -> None:
+            chat_id = update.effective_chat.id
+            if chat_id in running:
+                overlaps.append(chat_id)
+            running.add(chat_id)
+            await asyncio.sleep(random.random() / 1000)
+            seen.setdefault(chat_id, []).append(update.update_id)
+            running.discard(chat_id)
+
+        async def scenario():
+            queue = UpdateQueue(process, workers=4, max_size=1000, enqueue_timeout=1)
+            queue.start()
+            for update_id in range(200):
+                await queue.submit(_update(update_id, update_id % 7))
+            await queue.drain(timeout=5)
+            return queue
+
+        queue = asyncio.run(scenario())
+
+        assert overlaps == []
+        assert queue.stats()["processed"] == 200
+        for chat_id, ids in seen.items():
+            assert ids == sorted(ids)
+
+    def test_rejects_when_full(self):
+        release = None
+
+        async def process(update: Update) -> None:
+            await release.wait()
+
+        async def scenario():
+            nonlocal release
+            release = asyncio.Event()
+            queue = UpdateQueue(process, workers=1, max_size=2, enqueue_timeout=0.01)
+            queue.start()
+            results = [await queue.submit(_update(i, 1)) for i in range(5)]
+            release.set()
+            await queue.drain(timeout=1)
+            return queue, results
+
+        queue, results = asyncio.run(scenario())
+
+        assert results.count(False) == queue.stats()["rejected"] > 0
+        assert queue.stats()["processed"] == results.count(True)
+
+    def test_failures_are_counted_not_raised(self):
+        async def process(update: Update) -> None:
+            raise RuntimeError("falhou")
+
+        async def scenario():
+            queue = UpdateQueue(process, workers=2, max_size=10, enqueue_timeout=1)
+            queue.start()
+            await queue.submit(_update(1, 1))
+            await queue.drain(timeout=1)
+            return queue
+
+        assert asyncio.run(scenario()).stats()["failed"] == 1
@@ -0,0 +1,56 @@
+import asyncio
+
+from src.services.interactions import InteractionBuffer
+from tests.fakes import seed_active_company
+
+
+class TestInteractionBuffer:
+    def test_coalesces_per_user_into_one_bulk_call(self, fake_db):
+        _, first = seed_active_company(fake_db, 1)
+        _, second = seed_active_company(fake_db, 2)
+        buffer = InteractionBuffer(flush_interval=60, max_pending=100)
+
+        async def scenario():
+            for _ in range(10):
+                buffer.record(first["id"])
+                buffer.record(second["id"])
+            assert buffer.pending == 2
+            return await buffer.flush()
+
+        assert asyncio.run(scenario()) == 2
+        assert fake_db.calls == [("POST", "rpc/vigia_touch_users")]
+        assert first["last_interaction_at"] is not None
+        assert buffer.pending == 0
+
+    def test_flushes_when_batch_is_full(self, fake_db):
+        users = [seed_active_company(fake_db, chat_id)[1] for chat_id in range(1, 4)]
+        buffer = InteractionBuffer(flush_interval=60, max_pending=3)
+
+        async def scenario():
+            for user in users:
+                buffer.record(user["id"])
+            await asyncio.sleep(0.05)
+
+        asyncio.run(scenario())
+
+        assert buffer.stats()["flushed"] == 3
+        assert buffer.pending == 0
+
+    def test_failed_flush_keeps_pending_and_stop_drains(self, fake_db):
+        _, user = seed_active_company(fake_db, 1)
+        buffer = InteractionBuffer(flush_interval=60, max_pending=100)
+        touch = fake_db.rpcs.pop("vigia_touch_users")
+
+        async def scenario():
+            buffer.start()
+            buffer.record(user["id"])
+            assert await buffer.flush() == 0
+            assert buffer.pending == 1
+            fake_db.rpcs["vigia_touch_users"] = touch
+            await buffer.stop()
+
+        asyncio.run(scenario())
+
+        assert buffer.stats()["failed_flushes"] == 1
+        assert buffer.pending == 0
+        assert user["last_interaction_at"] is not None
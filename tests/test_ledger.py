@@ -0,0 +1,40 @@
+import asyncio
+
+from src.services.supabase import get_company_ledger
+from src.services.ledger import reconcile_balances, snapshot_daily_balances
+from tests.fakes import seed_active_company
+
+
+def _add_entry(fake_db, company: dict, amount: float, kind: str) -> None:
+    fake_db.insert("vigia_entries", {
+        "company_id": company["id"], "entry_date": "2026-03-01", "amount": amount, "type": kind,
+    })
+
+
+class TestLedger:
+    def test_balance_read_is_single_row_lookup(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _add_entry(fake_db, company, 1000, "revenue")
+        _add_entry(fake_db, company, 250, "expense")
+        fake_db.reset_calls()
+
+        assert asyncio.run(get_company_ledger(company["id"])) == {"balance": 750, "entry_count": 2}
+        assert fake_db.calls == [("GET", "vigia_company_balances")]
+
+    def test_reconcile_detects_and_fixes_drift(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _add_entry(fake_db, company, 1000, "revenue")
+        fake_db.tables["vigia_company_balances"][0]["balance"] = 400
+
+        mismatches = asyncio.run(reconcile_balances(fix=True))
+
+        assert mismatches == [{"company_id": company["id"], "expected": 1000, "actual": 400}]
+        assert fake_db.tables["vigia_company_balances"][0]["balance"] == 1000
+        assert asyncio.run(reconcile_balances()) == []
+
+    def test_snapshot_copies_current_balances(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _add_entry(fake_db, company, 300, "revenue")
+
+        assert asyncio.run(snapshot_daily_balances()) == 1
+        assert fake_db.tables["vigia_balance_snapshots"][0]["balance"] == 300
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import date, timedelta
+
+from src.config import settings
+from src.handlers.daily_report import send_daily_reports
+from src.services import locks
+from src.services.locks import FileLeaseBackend, run_exclusive, run_sharded
+from tests.fakes import seed_active_company
+
+
+def _seed(fake_db, count: int) -> None:
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    for chat_id in range(1, count + 1):
+        company, _ = seed_active_company(fake_db, chat_id)
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": yesterday, "amount": 500, "type": "revenue",
+        })
+
+
+class TestLeases:
+    def test_concurrent_nodes_split_shards(self, fake_db):
+        handled: dict[str, list[int]] = {"a": [], "b": []}
+
+        def handler(node: str):
+            async def handle(shard: int) -> None:
+                await asyncio.sleep(0.001)
+                handled[node].append(shard)
+            return handle
+
+        async def run_both():
+            return await asyncio.gather(
+                run_sharded("job:2026-03-01", 8, handler("a"), concurrency=2, owner="a"),
+                run_sharded("job:2026-03-01", 8, handler("b"), concurrency=2, owner="b"),
+            )
+
+        (done_a, _), (done_b, _) = asyncio.run(run_both())
+
+        assert sorted(done_a + done_b) == list(range(8))
+        assert not set(done_a) & set(done_b)
+        assert done_a and done_b
+
+    def test_failed_shard_is_released(self, fake_db):
+        async def handle(shard: int) -> None:
+            if shard == 1:
+                raise RuntimeError("boom")
+
+        done, failed = asyncio.run(run_sharded("job:2026-03-01", 3, handle, owner="a"))
+        retry_done, _ = asyncio.run(run_sharded("job:2026-03-01", 3, handle, owner="b"))
+
+        assert failed == [1]
+        assert sorted(done) == [0, 2]
+        assert retry_done == []
+        assert asyncio.run(locks.acquire("job:2026-03-01", 1, owner="b"))
+
+    def test_exclusive_job_runs_once_per_day(self, fake_db, monkeypatch):
+        calls = []
+
+        async def job() -> int:
+            calls.append(1)
+            return len(calls)
+
+        wrapped = run_exclusive("snapshot", job)
+        assert asyncio.run(wrapped()) == 1
+        monkeypatch.setattr(locks, "NODE_ID", "outro-no")
+
+        assert asyncio.run(wrapped()) is None
+        assert calls == [1]
+
+    def test_file_backend_honours_owner_and_expiry(self, tmp_path):
+        backend = FileLeaseBackend(str(tmp_path))
+
+        async def scenario():
+            assert await backend.acquire("report:2026-03-01", 0, "a", 60)
+            assert not await backend.acquire("report:2026-03-01", 0, "b", 60)
+            assert await backend.acquire("report:2026-03-01", 0, "a", 60)
+            await backend.release("report:2026-03-01", 0, "b")
+            assert not await backend.acquire("report:2026-03-01", 0, "b", 60)
+            await backend.release("report:2026-03-01", 0, "a")
+            assert await backend.acquire("report:2026-03-01", 0, "b", -1)
+            assert await backend.acquire("report:2026-03-01", 0, "a", 60)
+
+        asyncio.run(scenario())
+
+
+class TestReportMarkers:
+    def test_second_node_and_rerun_send_nothing(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        _seed(fake_db, 30)
+
+        first = asyncio.run(send_daily_reports())
+        monkeypatch.setattr(locks, "NODE_ID", "segundo-no")
+        second = asyncio.run(send_daily_reports())
+        for lease in fake_db.tables["vigia_job_leases"]:
+            lease["expires_at"] = 0
+        fake_db.tables["vigia_report_runs"].clear()
+        fake_db.tables["vigia_report_deliveries"].clear()
+        fresh_run = asyncio.run(send_daily_reports())
+
+        assert first["sent"] == 30
+        assert len(first["shards"]) == settings.report_shards
+        assert second["shards"] == [] and second["sent"] == 0
+        assert fresh_run["sent"] == 0 and fresh_run["already_sent"] == 30
+        assert len(fake_bot.sent) == 30
+        assert all(c["last_report_sent_at"] for c in fake_db.tables["vigia_companies"])
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src import main
+from src.services import metrics
+from tests.fakes import make_update, seed_active_company
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+class TestMetrics:
+    def test_histogram_renders_cumulative_buckets(self):
+        latency = metrics.Histogram("test_seconds", "teste", ("op",), buckets=(0.1, 1.0))
+        latency.observe(0.05, op="a")
+        latency.observe(0.5, op="a")
+        latency.observe(3, op="a")
+
+        samples = list(latency.samples())
+
+        assert 'test_seconds_bucket{op="a",le="0.1"} 1' in samples
+        assert 'test_seconds_bucket{op="a",le="1"} 2' in samples
+        assert 'test_seconds_bucket{op="a",le="+Inf"} 3' in samples
+        assert 'test_seconds_count{op="a"} 3' in samples
+
+    def test_failed_db_call_is_timed_and_counted(self):
+        @metrics.instrument_db("vigia_entries", "insert")
+        async def broken():
+            raise RuntimeError("falhou")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(broken())
+
+        assert metrics.db_seconds.count(table="vigia_entries", operation="insert") == 1
+        assert metrics.db_errors.value(table="vigia_entries", operation="insert") == 1
+
+    def test_webhook_exposes_hot_path_metrics(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 100)
+
+        async def scenario():
+            main.telegram_app = main.build_telegram_app(fake_telegram.request())
+            await main.telegram_app.initialize()
+            try:
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    await client.post("/webhook", json=make_update(1, 100, "/receita 150"))
+                    return await client.get("/metrics")
+            finally:
+                await main.telegram_app.shutdown()
+                main.telegram_app = None
+
+        response = asyncio.run(scenario())
+
+        assert response.status_code == 200
+        body = response.text
+        assert 'vigia_webhook_seconds_count{outcome="processed"} 1' in body
+        assert 'vigia_routed_messages_total{state="active"} 1' in body
+        assert 'vigia_db_seconds_count{table="vigia_users",operation="select"} 1' in body
+        assert 'vigia_db_seconds_count{table="vigia_entries",operation="insert"} 1' in body
+        assert "# TYPE vigia_interactions_pending gauge" in body
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from src import main
+from src.config import settings
+from src.services import telegram as telegram_service
+from src.services.outbox import MessageSender
+
+
+def _sender(concurrency: int = 10, retries: int = 2) -> MessageSender:
+    return MessageSender(concurrency=concurrency, max_queue=100, retries=retries, backoff=0.0)
+
+
+class TestMessageSender:
+    def test_pipelines_sends_concurrently(self, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        fake_bot.latency = 0.05
+        sender = _sender(concurrency=10)
+
+        async def scenario():
+            started = time.perf_counter()
+            outcomes = await sender.send_many((chat_id, "oi") for chat_id in range(20))
+            await sender.stop()
+            return outcomes, time.perf_counter() - started
+
+        outcomes, elapsed = asyncio.run(scenario())
+
+        assert [o["status"] for o in outcomes] == ["sent"] * 20
+        assert elapsed < 0.5
+        assert len(fake_bot.sent) == 20
+
+    def test_reports_outcomes_per_message(self, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        fake_bot.blocked_chats = {2}
+        fake_bot.flood_every = 3
+        fake_bot.retry_after = 0
+        sender = _sender()
+
+        async def scenario():
+            outcomes = await sender.send_many([(1, "a"), (2, "b"), (3, "c"), (4, "d")])
+            await sender.stop()
+            return outcomes
+
+        outcomes = asyncio.run(scenario())
+
+        by_chat = {o["chat_id"]: o for o in outcomes}
+        assert by_chat[2]["status"] == "failed"
+        assert by_chat[2]["attempts"] == 1
+        assert all(by_chat[c]["status"] == "sent" for c in (1, 3, 4))
+        assert sender.stats()["errors"] == {"Forbidden": 1}
+        assert sender.stats()["retried"] >= 1
+
+    def test_handlers_and_scheduler_share_one_bot(self, fake_telegram):
+        application = main.build_telegram_app(fake_telegram.request())
+        try:
+            assert application.bot is telegram_service.get_bot()
+        finally:
+            telegram_service._bot = None
+
+    def test_handler_replies_share_the_per_chat_limit(self, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_chat_interval_seconds", 0.2)
+        sender = _sender()
+
+        async def scenario():
+            started = time.perf_counter()
+            await telegram_service.get_bot().send_message(chat_id=7, text="resposta")
+            outcome = await sender.send(7, "relatório")
+            await sender.stop()
+            return outcome, time.perf_counter() - started
+
+        outcome, elapsed = asyncio.run(scenario())
+
+        assert outcome["status"] == "sent"
+        assert elapsed >= 0.2
+        assert [m["text"] for m in fake_bot.sent] == ["resposta", "relatório"]
@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+from datetime import date, timedelta
+
+from src.config import settings
+from src.database import get_async_supabase
+from src.handlers.daily_report import send_daily_reports
+from src.services import locks
+from src.services import supabase as supabase_service
+from tests.fakes import seed_active_company
+
+
+class TestKeysetPagination:
+    def test_streams_100k_companies_past_the_row_cap(self, fake_db):
+        fake_db.max_rows = 1000
+        for i in range(100_000):
+            fake_db.insert("vigia_companies", {"name": f"Empresa {i}", "status": "active" if i % 10 else "inactive"})
+
+        async def scan() -> tuple[int, list[dict], int]:
+            capped = await get_async_supabase().table("vigia_companies").select("id").eq("status", "active").execute()
+            ids = [company["id"] async for company in supabase_service.iter_active_companies(page_size=1000)]
+            return len(capped.data), ids, len(fake_db.calls)
+
+        capped, ids, calls = asyncio.run(scan())
+
+        assert capped == 1000
+        assert len(ids) == len(set(ids)) == 90_000
+        assert ids == sorted(ids)
+        assert calls == 1 + 91
+
+    def test_reads_one_page_at_a_time(self, fake_db):
+        for i in range(50):
+            fake_db.insert("vigia_companies", {"name": f"Empresa {i}", "status": "active"})
+
+        async def first_rows() -> int:
+            stream = supabase_service.iter_active_companies(page_size=10)
+            for _ in range(10):
+                await anext(stream)
+            await stream.aclose()
+            return len(fake_db.calls)
+
+        assert asyncio.run(first_rows()) == 1
+
+    def test_entries_page_on_date_and_id(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        days = [(date.today() - timedelta(days=d % 4)).isoformat() for d in range(23)]
+        for day in days:
+            fake_db.insert("vigia_entries", {"company_id": company["id"], "entry_date": day, "amount": 10, "type": "revenue"})
+
+        async def collect() -> list[dict]:
+            return [e async for e in supabase_service.iter_entries_by_company(company["id"], page_size=5)]
+
+        entries = asyncio.run(collect())
+
+        assert len({e["id"] for e in entries}) == 23
+        assert [(e["entry_date"], e["id"]) for e in entries] == sorted((e["entry_date"], e["id"]) for e in entries)
+
+
+class TestShardRanges:
+    def test_every_id_falls_in_exactly_one_shard(self):
+        ranges = [locks.shard_range(shard, 16) for shard in range(16)]
+        for _ in range(2000):
+            key = str(uuid.uuid4())
+            assert sum((low is None or key >= low) and (high is None or key < high) for low, high in ranges) == 1
+
+
+class TestStreamingReports:
+    def test_daily_report_reaches_companies_past_the_row_cap(self, fake_db, fake_bot, monkeypatch):
+        monkeypatch.setattr(settings, "telegram_rate_per_second", 1000.0)
+        monkeypatch.setattr(settings, "report_checkpoint_size", 20)
+        fake_db.max_rows = 25
+        for chat_id in range(1, 131):
+            seed_active_company(fake_db, chat_id)
+
+        summary = asyncio.run(send_daily_reports())
+
+        assert summary["sent"] == 130
+        assert {int(m["chat_id"]) for m in fake_bot.sent} == set(range(1, 131))
+        assert fake_db.calls.count(("POST", "rpc/vigia_report_metrics_for")) >= 16
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from src import main
+from src.services import receivables
+from src.services.report_metrics import compute_metrics_for
+from tests.fakes import make_update, seed_active_company
+
+
+def _days(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+async def _post(fake_telegram, updates: list[dict]) -> None:
+    main.telegram_app = main.build_telegram_app(fake_telegram.request())
+    await main.telegram_app.initialize()
+    try:
+        for update in updates:
+            await main.telegram_app.process_update(main.Update.de_json(update, main.telegram_app.bot))
+    finally:
+        await main.telegram_app.shutdown()
+        main.telegram_app = None
+
+
+class TestParseDueDate:
+    @pytest.mark.parametrize("value, expected", [
+        ("15/03", date(2026, 3, 15)),
+        ("15/03/2027", date(2027, 3, 15)),
+        ("15-03-27", date(2027, 3, 15)),
+        ("31/02", None),
+        ("amanhã", None),
+    ])
+    def test_accepts_day_month_with_optional_year(self, value, expected):
+        assert receivables.parse_due_date(value, today=date(2026, 1, 10)) == expected
+
+
+class TestOverdue:
+    def test_sweep_flips_only_past_due_pending(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        for due, status in ((-3, "pending"), (-1, "pending"), (0, "pending"), (5, "pending"), (-9, "paid")):
+            fake_db.insert("vigia_receivables", {
+                "company_id": company["id"], "client_name": "Cliente", "amount": 100, "due_date": _days(due), "status": status,
+            })
+
+        marked = asyncio.run(receivables.sweep_overdue())
+
+        assert marked == 2
+        assert [r["status"] for r in fake_db.tables["vigia_receivables"]] == ["overdue", "overdue", "pending", "pending", "paid"]
+        assert fake_db.calls.count(("POST", "rpc/vigia_mark_overdue_receivables")) == 1
+
+    def test_report_counts_past_due_pending_before_the_sweep(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        for due, amount in ((-2, 300), (3, 700)):
+            fake_db.insert("vigia_receivables", {
+                "company_id": company["id"], "client_name": "Cliente", "amount": amount, "due_date": _days(due), "status": "pending",
+            })
+
+        metrics = asyncio.run(compute_metrics_for([company["id"]], date.today()))[company["id"]]
+        totals = asyncio.run(receivables.get_totals([company["id"]]))[company["id"]]
+
+        assert (metrics["overdue_count"], metrics["overdue_total"]) == (1, 300)
+        assert totals == {"open_count": 2, "open_total": 1000, "overdue_count": 1, "overdue_total": 300, "next_due_date": _days(3)}
+
+
+class TestMarkPaid:
+    def test_settles_and_records_revenue_in_one_call(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        receivable = fake_db.insert("vigia_receivables", {
+            "company_id": company["id"], "client_name": "Cliente", "amount": 450, "due_date": _days(-1), "status": "overdue",
+        })
+        fake_db.reset_calls()
+
+        first = asyncio.run(receivables.mark_paid(company["id"], receivable))
+        again = asyncio.run(receivables.mark_paid(company["id"], receivable))
+
+        assert first["status"] == "paid" and again is None
+        assert fake_db.calls == [("POST", "rpc/vigia_settle_receivable")] * 2
+        assert [(e["amount"], e["source"]) for e in fake_db.tables["vigia_entries"]] == [(450, "receivable")]
+
+
+class TestReceberCommand:
+    def test_create_list_and_settle(self, fake_db, fake_telegram):
+        company, _ = seed_active_company(fake_db, 100)
+        overdue = (date.today() - timedelta(days=4)).strftime("%d/%m/%Y")
+        upcoming = (date.today() + timedelta(days=10)).strftime("%d/%m/%Y")
+
+        asyncio.run(_post(fake_telegram, [
+            make_update(1, 100, f"/receber 1.500 {upcoming} Padaria do Zé"),
+            make_update(2, 100, f"/receber 320,50 {overdue} Mercado Central"),
+            make_update(3, 100, "/receber"),
+            make_update(4, 100, "/receber pago 1"),
+        ]))
+
+        listing = fake_telegram.sent[2]["text"]
+        assert listing.index("Mercado Central") < listing.index("Padaria do Zé")
+        assert "1. Mercado Central - R$ 320,50" in listing and "em atraso" in listing
+        assert "Em atraso: 1 somando R$ 320,50" in listing
+        assert "Mercado Central confirmado" in fake_telegram.sent[3]["text"]
+        statuses = {r["client_name"]: r["status"] for r in fake_db.tables["vigia_receivables"]}
+        assert statuses == {"Padaria do Zé": "pending", "Mercado Central": "paid"}
+        entry = fake_db.tables["vigia_entries"][0]
+        assert (entry["company_id"], entry["amount"], entry["source"]) == (company["id"], 320.5, "receivable")
+
+    def test_invalid_input_shows_usage(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 100)
+
+        asyncio.run(_post(fake_telegram, [
+            make_update(1, 100, "/receber 100 ontem"),
+            make_update(2, 100, "/receber pago 3"),
+            make_update(3, 100, "/receber 99999999999 15/03 Cliente"),
+            make_update(4, 100, "/receber 0,004 15/03 Cliente"),
+        ]))
+
+        assert "/receber 1500 15/03 Nome do cliente" in fake_telegram.sent[0]["text"]
+        assert "número do item" in fake_telegram.sent[1]["text"]
+        assert all("/receber 1500 15/03 Nome do cliente" in m["text"] for m in fake_telegram.sent[2:4])
+        assert fake_db.tables["vigia_receivables"] == []
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from src.config import settings
+from src.services import retention
+from src.services import supabase as supabase_service
+from src.services.ledger import reconcile_balances
+from src.services.report_metrics import get_company_metrics
+from src.services.rollups import backfill_rollups, reconcile_rollups
+from tests.fakes import seed_active_company
+
+TODAY = date(2026, 10, 18)
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+
+def _add_entry(fake_db, company: dict, days_ago: int, amount: float, kind: str, **extra) -> dict:
+    return fake_db.insert("vigia_entries", {
+        "company_id": company["id"], "entry_date": (TODAY - timedelta(days=days_ago)).isoformat(),
+        "amount": amount, "type": kind, **extra,
+    })
+
+
+def _seed_history(fake_db) -> dict:
+    company, _ = seed_active_company(fake_db, 1)
+    _add_entry(fake_db, company, 1100, 5000, "revenue")
+    _add_entry(fake_db, company, 1100, 700, "expense")
+    _add_entry(fake_db, company, 900, 1200, "expense")
+    _add_entry(fake_db, company, 3, 400, "revenue")
+    return company
+
+
+class TestCompactEntries:
+    def test_moves_old_entries_without_changing_balance_or_rollups(self, fake_db):
+        company = _seed_history(fake_db)
+        rollups_before = [dict(r) for r in fake_db.tables["vigia_daily_rollups"]]
+
+        result = asyncio.run(retention.compact_entries(TODAY))
+
+        assert result == {"entries_compacted": 3}
+        assert [e["amount"] for e in fake_db.tables["vigia_entries"]] == [400]
+        assert len(fake_db.tables["vigia_entries_archive"]) == 3
+        assert fake_db.tables["vigia_company_balances"][0]["balance"] == 3500
+        assert fake_db.tables["vigia_daily_rollups"] == rollups_before
+        assert asyncio.run(get_company_metrics(company["id"], TODAY))["cash_balance"] == 3500
+        assert asyncio.run(reconcile_balances()) == []
+        assert asyncio.run(reconcile_rollups()) == []
+
+    def test_runs_in_batches_until_drained(self, fake_db, monkeypatch):
+        monkeypatch.setattr(settings, "retention_batch_size", 2)
+        _seed_history(fake_db)
+
+        assert asyncio.run(retention.compact_entries(TODAY)) == {"entries_compacted": 3}
+        assert fake_db.calls.count(("POST", "rpc/vigia_compact_entries")) == 2
+
+    def test_rebuild_keeps_compacted_days(self, fake_db):
+        _seed_history(fake_db)
+        asyncio.run(retention.compact_entries(TODAY))
+
+        asyncio.run(backfill_rollups())
+
+        days = sorted((r["day"], r["revenue_total"], r["expense_total"]) for r in fake_db.tables["vigia_daily_rollups"])
+        assert days[0] == ((TODAY - timedelta(days=1100)).isoformat(), 5000, 700)
+        assert len(days) == 3
+
+    def test_reimport_does_not_restore_archived_lines(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        row = {
+            "company_id": company["id"], "user_id": None, "entry_date": (TODAY - timedelta(days=800)).isoformat(),
+            "amount": 90, "type": "expense", "description": "Tarifa", "import_key": "abc",
+        }
+        asyncio.run(supabase_service.import_entries([row]))
+        asyncio.run(retention.compact_entries(TODAY))
+
+        assert asyncio.run(supabase_service.import_entries([row])) == 0
+        assert fake_db.tables["vigia_entries"] == []
+
+
+class TestArchiveMessageLogs:
+    def test_moves_old_logs_and_drops_expired_months(self, fake_db):
+        for days_ago in (10, 100, 500):
+            fake_db.insert("vigia_message_logs", {
+                "direction": "in", "message_text": f"{days_ago} dias", "created_at": (NOW - timedelta(days=days_ago)).isoformat(),
+            })
+
+        result = asyncio.run(retention.archive_message_logs(NOW))
+
+        assert result == {"logs_archived": 2, "log_partitions_dropped": 1}
+        assert [r["message_text"] for r in fake_db.tables["vigia_message_logs"]] == ["10 dias"]
+        assert [r["message_text"] for r in fake_db.tables["vigia_message_logs_archive"]] == ["100 dias"]
+
+    def test_disabled_retention_does_nothing(self, fake_db, monkeypatch):
+        monkeypatch.setattr(settings, "retention_enabled", False)
+
+        assert asyncio.run(retention.run_retention()) is None
+        assert fake_db.calls == []
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import date, timedelta
+
+from src.services.report_metrics import get_company_metrics
+from src.services.rollups import backfill_rollups, reconcile_rollups
+from tests.fakes import seed_active_company
+
+
+def _add_entry(fake_db, company: dict, day: str, amount: float, kind: str) -> dict:
+    return fake_db.insert("vigia_entries", {
+        "company_id": company["id"], "entry_date": day, "amount": amount, "type": kind,
+    })
+
+
+def _rollup(fake_db, day: str) -> dict | None:
+    return next((r for r in fake_db.tables["vigia_daily_rollups"] if r["day"] == day), None)
+
+
+class TestDailyRollups:
+    def test_trigger_accumulates_entries_per_day(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _add_entry(fake_db, company, "2026-03-01", 1000, "revenue")
+        _add_entry(fake_db, company, "2026-03-01", 300, "revenue")
+        _add_entry(fake_db, company, "2026-03-01", 250, "expense")
+        _add_entry(fake_db, company, "2026-03-02", 80, "expense")
+
+        first = _rollup(fake_db, "2026-03-01")
+        assert (first["revenue_total"], first["expense_total"], first["entry_count"]) == (1300, 250, 3)
+        assert _rollup(fake_db, "2026-03-02")["expense_total"] == 80
+
+    def test_reconcile_detects_and_fixes_drift(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _add_entry(fake_db, company, "2026-03-01", 1000, "revenue")
+        _rollup(fake_db, "2026-03-01")["revenue_total"] = 400
+
+        mismatches = asyncio.run(reconcile_rollups(fix=True))
+
+        assert mismatches == [{
+            "company_id": company["id"],
+            "day": "2026-03-01",
+            "expected": {"revenue_total": 1000, "expense_total": 0, "entry_count": 1},
+            "actual": {"revenue_total": 400, "expense_total": 0, "entry_count": 1},
+        }]
+        assert _rollup(fake_db, "2026-03-01")["revenue_total"] == 1000
+        assert asyncio.run(reconcile_rollups()) == []
+
+    def test_backfill_rebuilds_from_entries(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        _add_entry(fake_db, company, "2026-03-01", 500, "revenue")
+        _add_entry(fake_db, company, "2026-03-02", 200, "expense")
+        fake_db.tables["vigia_daily_rollups"].clear()
+        fake_db._indexes.clear()
+
+        assert asyncio.run(backfill_rollups()) == 2
+        assert asyncio.run(reconcile_rollups()) == []
+
+    def test_report_metrics_read_rollups(self, fake_db):
+        company, _ = seed_active_company(fake_db, 1)
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        _add_entry(fake_db, company, yesterday, 700, "revenue")
+        fake_db.tables["vigia_entries"].clear()
+        fake_db._indexes.pop(("vigia_entries", "company_id"), None)
+
+        metrics = asyncio.run(get_company_metrics(company["id"]))
+
+        assert metrics["avg_revenue"] == 100
+        assert metrics["yesterday_revenue"] == 700
@@ -1,39 +1,41 @@
 import pytest
-from src.utils.burn_rate import calculate_runway, calculate_monthly_burn
-from src.utils.formatters import format_currency, format_runway, format_company_status
+from src.utils.burn_rate import calculate_daily_burn, calculate_monthly_burn, calculate_runway, get_alert_level
+from src.utils.formatters import format_currency, format_days, format_simple_report
 
 
 class TestBurnRate:
     def test_calculate_runway(self):
         assert calculate_runway(10000, 1000) == 10
-        assert calculate_runway(5000, 500) == 10
+        assert calculate_runway(5000, 2000) == 2.5
         assert calculate_runway(0, 1000) == 0
 
     def test_calculate_runway_zero_burn(self):
-        result = calculate_runway(10000, 0)
-        assert result == float("inf")
+        assert calculate_runway(10000, 0) == 999
+
+    def test_calculate_daily_burn(self):
+        assert calculate_daily_burn(9000, 1000, 30) == pytest.approx(600)
 
     def test_calculate_monthly_burn(self):
-        entries = [
-            {"amount": 1000, "entry_type": "expense"},
-            {"amount": 500, "entry_type": "expense"},
-            {"amount": 2000, "entry_type": "income"},
-        ]
-        assert calculate_monthly_burn(entries) == 1500
+        assert calculate_monthly_burn(9000, 1000, 30) == pytest.approx(18000)
+
+    def test_get_alert_level(self):
+        assert get_alert_level(5) == ("🔴", "crítico")
+        assert get_alert_level(15) == ("⚠️", "atenção")
+        assert get_alert_level(45) == ("✅", "normal")
 
 
 class TestFormatters:
     def test_format_currency(self):
         assert format_currency(1000) == "R$ 1.000,00"
         assert format_currency(1000.50) == "R$ 1.000,50"
+        assert format_currency(None) == "R$ 0,00"
 
-    def test_format_runway(self):
-        assert format_runway(10.5) == "10.5 meses"
-        assert format_runway(float("inf")) == "∞ meses"
+    def test_format_days(self):
+        assert format_days(10.4) == "10"
+        assert format_days(999) == "∞"
 
-    def test_format_company_status(self):
-        company = {"name": "Teste", "cash": 10000}
-        result = format_company_status(company, 1000, 10)
+    def test_format_simple_report(self):
+        result = format_simple_report("Teste", 10000, 1000, 10, "🔴", "crítico")
         assert "Teste" in result
         assert "R$ 10.000,00" in result
-        assert "R$ 1.000,00/mês" in result
+        assert "R$ 1.000,00/dia" in result
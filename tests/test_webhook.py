@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+
+from src import main
+from tests.fakes import make_update, seed_active_company
+
+
+async def _post_updates(fake_telegram, updates: list[dict]) -> list[int]:
+    main.telegram_app = main.build_telegram_app(fake_telegram.request())
+    await main.telegram_app.initialize()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await client.post("/webhook", json=update) for update in updates]
+    finally:
+        await main.telegram_app.shutdown()
+        main.telegram_app = None
+    return [r.status_code for r in responses]
+
+
+class TestWebhook:
+    def test_revenue_is_recorded_through_async_layer(self, fake_db, fake_telegram):
+        company, _ = seed_active_company(fake_db, 100)
+
+        statuses = asyncio.run(_post_updates(fake_telegram, [make_update(1, 100, "/receita 1500")]))
+
+        assert statuses == [200]
+        entries = fake_db.tables["vigia_entries"]
+        assert len(entries) == 1
+        assert entries[0]["company_id"] == company["id"]
+        assert entries[0]["amount"] == 1500
+        assert "registrada" in fake_telegram.sent[-1]["text"]
+
+    def test_new_chat_creates_company_and_user(self, fake_db, fake_telegram):
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 200, "oi")]))
+
+        assert len(fake_db.tables["vigia_companies"]) == 1
+        assert fake_db.tables["vigia_users"][0]["chat_id"] == 200
+        assert "Bem-vindo" in fake_telegram.sent[-1]["text"]
+
+    def test_report_uses_single_metrics_rpc(self, fake_db, fake_telegram):
+        company, _ = seed_active_company(fake_db, 300)
+        fake_db.insert("vigia_entries", {
+            "company_id": company["id"], "entry_date": "2020-01-01", "amount": 12000, "type": "revenue",
+        })
+        fake_db.insert("vigia_receivables", {"company_id": company["id"], "amount": 800, "status": "overdue"})
+
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 300, "/relatorio")]))
+
+        assert ("POST", "rpc/vigia_report_metrics") in fake_db.calls
+        assert not any(table == "vigia_entries" for _, table in fake_db.calls)
+        text = fake_telegram.sent[-1]["text"]
+        assert "R$ 12.000,00" in text
+        assert "1 cliente(s) em atraso somando R$ 800,00" in text
+
+
+class TestQueryCounts:
+    def test_revenue_loads_user_and_company_in_one_round_trip(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 100)
+
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 100, "/receita 150")]))
+
+        assert fake_db.calls == [
+            ("GET", "vigia_users"),
+            ("POST", "vigia_entries"),
+            ("GET", "vigia_company_balances"),
+            ("POST", "rpc/vigia_report_metrics"),
+        ]
+
+    def test_warm_cache_only_writes_and_checks_the_ledger(self, fake_db, fake_telegram):
+        seed_active_company(fake_db, 100)
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 100, "/receita 150")]))
+        fake_db.reset_calls()
+
+        asyncio.run(_post_updates(fake_telegram, [
+            make_update(2, 100, "/despesa 40"),
+            make_update(3, 100, "/relatorio"),
+            make_update(4, 100, "/ajuda"),
+        ]))
+
+        assert fake_db.calls == [
+            ("POST", "vigia_entries"),
+            ("GET", "vigia_company_balances"),
+            ("POST", "rpc/vigia_report_metrics"),
+        ]
+
+    def test_onboarding_step_updates_company_and_user(self, fake_db, fake_telegram):
+        company, user = seed_active_company(fake_db, 100, fixed_cost_avg=0)
+        user.update(state="onboarding", onboarding_step=1)
+
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 100, "8000")]))
+
+        assert fake_db.calls == [("GET", "vigia_users"), ("PATCH", "vigia_companies"), ("PATCH", "vigia_users")]
+        assert company["fixed_cost_avg"] == 8000
+        assert user["onboarding_step"] == 2
+
+    def test_new_chat_creates_rows_without_rereading(self, fake_db, fake_telegram):
+        asyncio.run(_post_updates(fake_telegram, [make_update(1, 200, "/start")]))
+
+        assert fake_db.calls == [
+            ("GET", "vigia_users"),
+            ("POST", "vigia_companies"),
+            ("POST", "vigia_users"),
+            ("PATCH", "vigia_users"),
+        ]